@@ -4,7 +4,8 @@ from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 from app.core.config import settings
 from app.schemas.user import User
-from app.db.supabase import supabase
+from app.db.supabase import supabase, run_supabase
+from app.db.user_cache import user_cache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/auth/login")
 
@@ -21,19 +22,28 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
         if user_id is None:
             raise credentials_exception
 
+        # The JWT is verified locally, so a recently fetched profile can be reused as-is
+        cached_user = await user_cache.get(user_id)
+        if cached_user is not None:
+            return cached_user
+
         # Fetch profile info from your DB
-        user_data = supabase.table("users").select("*").eq("id", user_id).single().execute()
+        user_data = await run_supabase(
+            lambda: supabase.table("users").select("*").eq("id", user_id).single().execute()
+        )
         if not user_data.data:
             raise credentials_exception
 
         # Fetch email from Supabase Auth
-        auth_user = supabase.auth.get_user()
+        auth_user = await run_supabase(supabase.auth.get_user)
         if not auth_user or not auth_user.user or not auth_user.user.email:
             raise credentials_exception
 
         # Inject the email into the user data
         user_data.data["email"] = auth_user.user.email
-        return User(**user_data.data)
+        user = User(**user_data.data)
+        await user_cache.set(user)
+        return user
 
     except JWTError:
         raise credentials_exception
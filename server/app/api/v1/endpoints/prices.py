@@ -0,0 +1,60 @@
+from typing import List
+from fastapi import APIRouter, HTTPException, Depends, Query, status
+from app.db.price_store import price_store, new_tracked_product
+from app.services.price_tracker import price_tracker
+from app.api.deps import get_current_user
+from app.schemas.user import User
+from app.schemas.price import TrackProductRequest, TrackedProduct, PriceHistory, PriceAlert
+import traceback
+
+router = APIRouter()
+
+@router.post("/track", response_model=TrackedProduct, status_code=status.HTTP_201_CREATED)
+async def track_product(
+    request: TrackProductRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Track a product's price. It is checked shortly after (within PRICE_SYNC_INTERVAL_S when the
+    scheduler runs in another process) and then every interval_s seconds; alerts are recorded
+    when it reaches target_price or drops sharply.
+    """
+    try:
+        product = new_tracked_product(current_user.id, str(request.url), request.target_price, request.interval_s)
+        product = await price_store.add(product)
+        price_tracker.track(product)
+        return product
+    except Exception as e:
+        print(f"Error tracking product: {str(e)}")
+        traceback.print_exc()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Failed to track product: {str(e)}"
+        )
+
+@router.get("/tracked", response_model=List[TrackedProduct])
+async def list_tracked_products(current_user: User = Depends(get_current_user)):
+    return await price_store.list_for_user(current_user.id)
+
+@router.delete("/tracked/{product_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def untrack_product(product_id: str, current_user: User = Depends(get_current_user)):
+    if not await price_store.remove(product_id, current_user.id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Tracked product not found")
+    price_tracker.untrack(product_id)
+
+@router.get("/tracked/{product_id}/history", response_model=PriceHistory)
+async def price_history(
+    product_id: str,
+    limit: int = Query(100, ge=1, le=1000),
+    current_user: User = Depends(get_current_user)
+):
+    if await price_store.get(product_id, current_user.id) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Tracked product not found")
+    return {"product_id": product_id, "history": await price_store.history(product_id, limit)}
+
+@router.get("/alerts", response_model=List[PriceAlert])
+async def price_alerts(
+    limit: int = Query(50, ge=1, le=500),
+    current_user: User = Depends(get_current_user)
+):
+    return await price_store.alerts_for_user(current_user.id, limit)
@@ -1,59 +1,60 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List, Dict, Any, Optional
-from pydantic import BaseModel, HttpUrl
-from app.services.product_analyzer import ProductAnalyzer
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Depends, Path, Query, Request, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from app.services.analysis import run_analysis, run_batch_analysis, stream_analysis, NoReviewsError
+from app.services.analysis_jobs import analysis_jobs
+from app.services.admission import AdmissionRejected, Saturated, scrape_limiter, user_quotas
+from app.services.compact_response import wants_compact, compact_response
+from app.services.metrics import timed
+from app.services.review_index import review_index
+from app.core.config import settings
 from app.api.deps import get_current_user
 from app.schemas.user import User
+from app.schemas.product import (
+    ProductAnalysisRequest, ProductAnalysisResponse, AnalysisJob, BatchAnalysisRequest, BatchAnalysisResponse,
+    ReviewSearchResponse
+)
+import asyncio
 import traceback
+import json
 import sys
 
 router = APIRouter()
-product_analyzer = ProductAnalyzer()
 
-class ProductAnalysisRequest(BaseModel):
-    url: HttpUrl
-    pages: int = 1
-    model: str = "distilbert-base-uncased-finetuned-sst-2-english"
-
-class ProductAnalysisResponse(BaseModel):
-    product_reviews: List[Dict[str, Any]]
-    sentiment_analysis: Optional[List[Dict[str, Any]]] = []
-    aspect_analysis: Optional[List[Dict[str, Any]]] = []
-    credibility_scores: Optional[List[Dict[str, Any]]] = []
+def admission_error(e: AdmissionRejected) -> HTTPException:
+    return HTTPException(
+        status_code=e.status_code,
+        detail=str(e),
+        headers={"Retry-After": str(e.retry_after)}
+    )
 
 @router.post("/analyze", response_model=ProductAnalysisResponse)
 async def analyze_product(
     request: ProductAnalysisRequest,
+    http_request: Request,
+    format: Optional[str] = Query(None, description='"compact" for the columnar response'),
     current_user: User = Depends(get_current_user)
 ):
+    """
+    Analyze a product's reviews. Pass ?format=compact (or Accept:
+    application/vnd.surfmarc.columnar+json) for a columnar response that holds
+    each review text once, serialized with orjson and compressed per Accept-Encoding.
+    """
     try:
-        analyzer = ProductAnalyzer(model_name=request.model)
-
-        product_reviews = await analyzer.extract_reviews(request.url, request.pages)
-        if not product_reviews:
-            raise HTTPException(status_code=400, detail="No reviews found for analysis.")
-
-        sentiment_analysis = await analyzer.analyze_sentiment(product_reviews)
-        aspect_analysis = analyzer.detect_bias(product_reviews)
-        credibility_scores = analyzer.assess_credibility(product_reviews)
-
-        processed_reviews = []
-        for i, review in enumerate(product_reviews):
-            processed_reviews.append({
-                "product_review": review.get("product_review", ""),
-                "rating": review.get("rating", 0),
-                "sentiment": sentiment_analysis[i] if i < len(sentiment_analysis) else None,
-                "bias_scores": aspect_analysis[i]["bias_scores"] if i < len(aspect_analysis) else {},
-                "credibility_score": credibility_scores[i]["credibility_score"] if i < len(credibility_scores) else 0
-            })
-
-        return ProductAnalysisResponse(
-            product_reviews=processed_reviews,
-            sentiment_analysis=sentiment_analysis,
-            aspect_analysis=aspect_analysis,
-            credibility_scores=credibility_scores
-        )
+        async with user_quotas.hold(current_user.id):
+            result = await run_analysis(request.url, request.pages, request.model)
+        # Serialized here rather than by FastAPI so the time shows up as its own stage
+        with timed("serialization"):
+            if wants_compact(format, http_request.headers.get("accept")):
+                return compact_response(result, http_request.headers.get("accept-encoding", ""))
+            return JSONResponse(content=jsonable_encoder(ProductAnalysisResponse(**result)))
 
+    except AdmissionRejected as e:
+        raise admission_error(e)
+    except NoReviewsError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         print(f"\n=== Error Details ===\nError Type: {type(e).__name__}\nError Message: {str(e)}\n")
         traceback.print_exc()
@@ -61,3 +62,125 @@ async def analyze_product(
             status_code=500,
             detail=f"Failed to analyze product reviews: {str(e)}"
         )
+
+@router.post("/analyze/batch", response_model=BatchAnalysisResponse)
+async def analyze_products_batch(
+    request: BatchAnalysisRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Analyze several products in one request. Reviews from every product share
+    inference batches; each URL gets its own result or error.
+    """
+    try:
+        # Each URL counts against the user's per-minute quota
+        async with user_quotas.hold(current_user.id, len(request.urls)):
+            results = await run_batch_analysis(request.urls, request.pages, request.model)
+        with timed("serialization"):
+            return JSONResponse(content=jsonable_encoder(BatchAnalysisResponse(results=results)))
+    except AdmissionRejected as e:
+        raise admission_error(e)
+    except Exception as e:
+        print(f"\n=== Error Details ===\nError Type: {type(e).__name__}\nError Message: {str(e)}\n")
+        traceback.print_exc()
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to analyze products: {str(e)}"
+        )
+
+@router.post("/analyze/stream")
+async def analyze_product_stream(
+    request: ProductAnalysisRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Stream the analysis as newline-delimited JSON: one "review" record per review
+    as soon as it is scored, then a "summary" record (or an "error" record).
+    """
+    # Over-limit users and a full scrape queue are turned away before the stream starts
+    try:
+        user_quotas.acquire(current_user.id)
+    except AdmissionRejected as e:
+        raise admission_error(e)
+    try:
+        scrape_limiter.check()
+    except AdmissionRejected as e:
+        user_quotas.release(current_user.id, refund=1)
+        raise admission_error(e)
+
+    saturated = False
+
+    async def records():
+        nonlocal saturated
+        # Rejections that happen once the stream has started arrive as "error" records
+        try:
+            async for record in stream_analysis(request.url, request.pages, request.model):
+                yield json.dumps(record) + "\n"
+        except AdmissionRejected as e:
+            saturated = isinstance(e, Saturated)
+            yield json.dumps({"type": "error", "detail": str(e), "retry_after": e.retry_after}) + "\n"
+        except Exception as e:
+            print(f"\n=== Error Details ===\nError Type: {type(e).__name__}\nError Message: {str(e)}\n")
+            traceback.print_exc()
+            yield json.dumps({"type": "error", "detail": f"Failed to analyze product reviews: {str(e)}"}) + "\n"
+
+    def release():
+        # The server turning the stream away does not count against the user
+        user_quotas.release(current_user.id, refund=1 if saturated else 0)
+
+    # Run as a background task so the hold is released even if the client disconnects before the stream starts
+    return StreamingResponse(records(), media_type="application/x-ndjson", background=BackgroundTask(release))
+
+@router.post("/analyze/jobs", response_model=AnalysisJob, status_code=status.HTTP_202_ACCEPTED)
+async def create_analysis_job(
+    request: ProductAnalysisRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Queue a product analysis and return its job id immediately.
+    Requests for a product that is already being analyzed share that job.
+    """
+    try:
+        user_quotas.take(current_user.id)
+    except AdmissionRejected as e:
+        raise admission_error(e)
+    job = await analysis_jobs.submit(request.url, request.pages, request.model, current_user.id)
+    return AnalysisJob(**job)
+
+@router.get("/analyze/jobs/{job_id}", response_model=AnalysisJob)
+async def get_analysis_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get per-stage progress and, once completed, the analysis result.
+    """
+    job = await analysis_jobs.get(job_id, current_user.id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Analysis job not found"
+        )
+    return AnalysisJob(**job)
+
+@router.get("/{product_id}/reviews/search", response_model=ReviewSearchResponse)
+async def search_reviews(
+    product_id: str = Path(..., regex="^[0-9a-f]{16}$"),
+    q: str = Query(..., min_length=1, max_length=500),
+    k: int = Query(10, ge=1, le=settings.REVIEW_SEARCH_MAX_K),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Reviews of an analyzed product most relevant to ``q``, with their stored
+    sentiment, bias and credibility scores. Nothing is scraped or classified;
+    product_id comes from the analysis response.
+    """
+    # Off the inference executor so searches do not queue behind analyses
+    with timed("review_search"):
+        results = await asyncio.to_thread(review_index.search, product_id, q, k)
+    if results is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Product has not been analyzed yet"
+        )
+    return ReviewSearchResponse(product_id=product_id, query=q, results=results)
@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from app.schemas.user import User, UserUpdate, PasswordChange
 from app.api.deps import get_current_user
 from app.db.supabase import supabase
+from app.db.user_cache import user_cache
 from pydantic import BaseModel
 
 router = APIRouter()
@@ -23,6 +24,7 @@ async def update_user(
     """
     try:
         update_data = user_update.dict(exclude_unset=True)
+        await user_cache.invalidate(current_user.id)
 
         # Step 1: Update email if requested
         if "email" in update_data:
@@ -53,7 +55,8 @@ async def update_user(
         auth_user = supabase.auth.get_user()
         updated_user["email"] = auth_user.user.email if auth_user and auth_user.user else None
 
-        # Step 5: Return full user object
+        # Step 5: Return full user object, dropping anything cached while the update ran
+        await user_cache.invalidate(current_user.id)
         return User(**updated_user)
 
     except HTTPException:
@@ -74,6 +77,7 @@ async def change_password(
     Change user password by verifying the current one first.
     Fetch email from Supabase Auth (not DB).
     """
+    await user_cache.invalidate(current_user.id)
     try:
         # Step 1: Get the authenticated user's info from Supabase
         user_info = supabase.auth.get_user()
@@ -128,10 +132,12 @@ async def delete_user(current_user: User = Depends(get_current_user)):
     """
     Delete current user account.
     """
+    await user_cache.invalidate(current_user.id)
     try:
         db_response = supabase.table("users").delete().eq("id", current_user.id).execute()
 
         auth_response = supabase.auth.admin.delete_user(current_user.id)
+        await user_cache.invalidate(current_user.id)
 
         return {"message": "User deleted successfully"}
         
@@ -25,5 +25,139 @@ class Settings(BaseModel):
     # Supabase Configuration
     SUPABASE_URL: str = os.getenv("SUPABASE_URL", "")
     SUPABASE_KEY: str = os.getenv("SUPABASE_KEY", "")
+    SUPABASE_POOL_SIZE: int = int(os.getenv("SUPABASE_POOL_SIZE", "16"))
+
+    # Authenticated User Cache ("sqlite" is shared by every worker; "memory" is per
+    # process, so it is disabled when WEB_CONCURRENCY > 1)
+    USER_CACHE_BACKEND: str = os.getenv("USER_CACHE_BACKEND", "sqlite")
+    USER_CACHE_PATH: str = os.getenv("USER_CACHE_PATH", "user_cache.db")
+    USER_CACHE_TTL_S: int = int(os.getenv("USER_CACHE_TTL_S", "60"))
+    USER_CACHE_MAX_ENTRIES: int = int(os.getenv("USER_CACHE_MAX_ENTRIES", "10000"))
+
+    # Model Configuration
+    SENTIMENT_MODEL: str = os.getenv("SENTIMENT_MODEL", "distilbert-base-uncased-finetuned-sst-2-english")
+    BIAS_MODEL: str = os.getenv("BIAS_MODEL", "facebook/bart-large-mnli")
+    MODEL_REVISION: str = os.getenv("MODEL_REVISION", "main")
+    MODEL_CACHE_MAX_MB: int = int(os.getenv("MODEL_CACHE_MAX_MB", "4096"))
+
+    # Inference Backend per model ("fp32", "int8" dynamic quantization or "onnx" via ONNX Runtime)
+    SENTIMENT_BACKEND: str = os.getenv("SENTIMENT_BACKEND", "fp32")
+    BIAS_BACKEND: str = os.getenv("BIAS_BACKEND", "fp32")
+    ONNX_EXPORT_DIR: str = os.getenv("ONNX_EXPORT_DIR", "onnx_models")
+    PARITY_MIN_AGREEMENT: float = float(os.getenv("PARITY_MIN_AGREEMENT", "0.98"))
+    PARITY_MAX_SCORE_DIFF: float = float(os.getenv("PARITY_MAX_SCORE_DIFF", "0.05"))
+
+    # Inference Batching
+    INFERENCE_MAX_BATCH_SIZE: int = int(os.getenv("INFERENCE_MAX_BATCH_SIZE", "32"))
+    INFERENCE_MAX_WAIT_MS: int = int(os.getenv("INFERENCE_MAX_WAIT_MS", "10"))
+    BIAS_BATCH_SIZE: int = int(os.getenv("BIAS_BATCH_SIZE", "16"))
+    BATCH_MAX_TOKENS: int = int(os.getenv("BATCH_MAX_TOKENS", "16384"))
+
+    # Text Preparation: long reviews are truncated by tokens, or split into
+    # overlapping windows whose scores are averaged when TEXT_MAX_WINDOWS > 1
+    TEXT_MAX_WINDOWS: int = int(os.getenv("TEXT_MAX_WINDOWS", "1"))
+    TEXT_WINDOW_STRIDE: int = int(os.getenv("TEXT_WINDOW_STRIDE", "64"))
+
+    # Inference Executor ("thread" or "process"); TORCH_THREADS=0 splits the cores across workers
+    INFERENCE_EXECUTOR: str = os.getenv("INFERENCE_EXECUTOR", "thread")
+    INFERENCE_WORKERS: int = int(os.getenv("INFERENCE_WORKERS", "2"))
+    TORCH_THREADS: int = int(os.getenv("TORCH_THREADS", "0"))
+
+    # Embeddings and Near-Duplicate Detection
+    EMBEDDING_MODEL: str = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+    EMBEDDING_BATCH_SIZE: int = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+    NEAR_DUPLICATE_DETECTION: bool = os.getenv("NEAR_DUPLICATE_DETECTION", "true").lower() == "true"
+    NEAR_DUPLICATE_THRESHOLD: float = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.92"))
+    NEAR_DUPLICATE_NEIGHBORS: int = int(os.getenv("NEAR_DUPLICATE_NEIGHBORS", "10"))
+    NEAR_DUPLICATE_FLAT_MAX: int = int(os.getenv("NEAR_DUPLICATE_FLAT_MAX", "5000"))
+
+    # Review Search: per-product FAISS indexes of analyzed reviews
+    REVIEW_INDEX_ENABLED: bool = os.getenv("REVIEW_INDEX_ENABLED", "true").lower() == "true"
+    REVIEW_INDEX_DIR: str = os.getenv("REVIEW_INDEX_DIR", "review_index")
+    REVIEW_INDEX_CACHE_SIZE: int = int(os.getenv("REVIEW_INDEX_CACHE_SIZE", "64"))
+    REVIEW_SEARCH_MAX_K: int = int(os.getenv("REVIEW_SEARCH_MAX_K", "50"))
+
+    # Metrics: Prometheus histograms on /metrics and a Server-Timing header per request
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    # With several workers, a directory where each writes its metrics so /metrics reports them all
+    PROMETHEUS_MULTIPROC_DIR: str = os.getenv("PROMETHEUS_MULTIPROC_DIR", "")
+
+    # Compact Analysis Responses
+    COMPACT_MIN_COMPRESS_BYTES: int = int(os.getenv("COMPACT_MIN_COMPRESS_BYTES", "1024"))
+    COMPACT_GZIP_LEVEL: int = int(os.getenv("COMPACT_GZIP_LEVEL", "6"))
+    COMPACT_BROTLI_QUALITY: int = int(os.getenv("COMPACT_BROTLI_QUALITY", "5"))
+
+    # Multi-Process Serving (gunicorn.conf.py): load models in the master before
+    # forking so workers share one copy of the weights. WEB_CONCURRENCY is the
+    # gunicorn worker count and sizes the per-worker thread pools.
+    WEB_CONCURRENCY: int = int(os.getenv("WEB_CONCURRENCY", "1"))
+    PRELOAD_MODELS: bool = os.getenv("PRELOAD_MODELS", "true").lower() == "true"
+    PRICE_LOCK_PATH: str = os.getenv("PRICE_LOCK_PATH", "price_tracker.lock")
+
+    # Background Warmup and Readiness
+    WARMUP_ENABLED: bool = os.getenv("WARMUP_ENABLED", "true").lower() == "true"
+    WARMUP_REQUIRE_BROWSER: bool = os.getenv("WARMUP_REQUIRE_BROWSER", "false").lower() == "true"
+
+    # Browser Pool
+    BROWSER_MAX_CONTEXTS: int = int(os.getenv("BROWSER_MAX_CONTEXTS", "4"))
+    BROWSER_MAX_USES: int = int(os.getenv("BROWSER_MAX_USES", "100"))
+
+    # Scraping
+    SCRAPE_DOMAIN_CONCURRENCY: int = int(os.getenv("SCRAPE_DOMAIN_CONCURRENCY", "3"))
+    SCRAPE_WAIT_TIMEOUT_MS: int = int(os.getenv("SCRAPE_WAIT_TIMEOUT_MS", "5000"))
+    SCRAPE_STATIC_FIRST: bool = os.getenv("SCRAPE_STATIC_FIRST", "true").lower() == "true"
+    HTTP_POOL_SIZE: int = int(os.getenv("HTTP_POOL_SIZE", "100"))
+    HTTP_TIMEOUT_S: int = int(os.getenv("HTTP_TIMEOUT_S", "15"))
+
+    # Scrape Cache ("memory", "sqlite" or "none")
+    SCRAPE_CACHE_BACKEND: str = os.getenv("SCRAPE_CACHE_BACKEND", "memory")
+    SCRAPE_CACHE_PATH: str = os.getenv("SCRAPE_CACHE_PATH", "scrape_cache.db")
+    SCRAPE_CACHE_TTL_S: int = int(os.getenv("SCRAPE_CACHE_TTL_S", "900"))
+    SCRAPE_CACHE_MAX_ENTRIES: int = int(os.getenv("SCRAPE_CACHE_MAX_ENTRIES", "1000"))
+    SCRAPE_CACHE_MAX_AGE_S: int = int(os.getenv("SCRAPE_CACHE_MAX_AGE_S", "604800"))
+    SCRAPE_CACHE_MAX_REVIEWS: int = int(os.getenv("SCRAPE_CACHE_MAX_REVIEWS", "1000"))
+    SCRAPE_CACHE_INCREMENTAL: bool = os.getenv("SCRAPE_CACHE_INCREMENTAL", "true").lower() == "true"
+
+    # Inference Result Cache ("memory", "sqlite" or "none")
+    INFERENCE_CACHE_BACKEND: str = os.getenv("INFERENCE_CACHE_BACKEND", "sqlite")
+    INFERENCE_CACHE_PATH: str = os.getenv("INFERENCE_CACHE_PATH", "inference_cache.db")
+    INFERENCE_CACHE_MAX_ENTRIES: int = int(os.getenv("INFERENCE_CACHE_MAX_ENTRIES", "1000000"))
+
+    # Analysis Jobs ("sqlite" shares them across workers, "memory" keeps them per process)
+    ANALYSIS_JOB_BACKEND: str = os.getenv("ANALYSIS_JOB_BACKEND", "sqlite")
+    ANALYSIS_JOB_PATH: str = os.getenv("ANALYSIS_JOB_PATH", "analysis_jobs.db")
+    ANALYSIS_WORKERS: int = int(os.getenv("ANALYSIS_WORKERS", "2"))
+    ANALYSIS_JOB_TTL_S: int = int(os.getenv("ANALYSIS_JOB_TTL_S", "3600"))
+
+    # Admission Control: concurrent scrapes and inference jobs, a bounded wait queue
+    # per stage, and per-user quotas; saturated requests get 503/429 with Retry-After.
+    # The limits are for the whole node: each of the WEB_CONCURRENCY workers enforces
+    # an equal share (at least 1), so a user's quota is only exact with one worker.
+    ADMISSION_ENABLED: bool = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+    ADMISSION_MAX_SCRAPES: int = int(os.getenv("ADMISSION_MAX_SCRAPES", "4"))
+    ADMISSION_MAX_INFERENCE: int = int(os.getenv("ADMISSION_MAX_INFERENCE", "2"))
+    ADMISSION_MAX_WAITING: int = int(os.getenv("ADMISSION_MAX_WAITING", "16"))
+    ADMISSION_QUEUE_TIMEOUT_S: float = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_S", "10"))
+    ADMISSION_USER_CONCURRENCY: int = int(os.getenv("ADMISSION_USER_CONCURRENCY", "2"))
+    ADMISSION_USER_PER_MINUTE: int = int(os.getenv("ADMISSION_USER_PER_MINUTE", "30"))
+
+    # Batch Analysis
+    BATCH_MAX_URLS: int = int(os.getenv("BATCH_MAX_URLS", "25"))
+
+    # Price Tracking ("supabase" or "sqlite" store); run the scheduler in one process only.
+    # Off by default: the Supabase store needs the tables in app/db/price_tracking.sql
+    PRICE_TRACKING_ENABLED: bool = os.getenv("PRICE_TRACKING_ENABLED", "false").lower() == "true"
+    PRICE_STORE_BACKEND: str = os.getenv("PRICE_STORE_BACKEND", "supabase")
+    PRICE_STORE_PATH: str = os.getenv("PRICE_STORE_PATH", "price_tracking.db")
+    PRICE_DEFAULT_INTERVAL_S: int = int(os.getenv("PRICE_DEFAULT_INTERVAL_S", "21600"))
+    PRICE_MIN_INTERVAL_S: int = int(os.getenv("PRICE_MIN_INTERVAL_S", "900"))
+    PRICE_JITTER: float = float(os.getenv("PRICE_JITTER", "0.1"))
+    PRICE_WORKERS: int = int(os.getenv("PRICE_WORKERS", "32"))
+    PRICE_DOMAIN_RATE: float = float(os.getenv("PRICE_DOMAIN_RATE", "1.0"))
+    PRICE_FLUSH_INTERVAL_S: float = float(os.getenv("PRICE_FLUSH_INTERVAL_S", "5"))
+    PRICE_FLUSH_BATCH: int = int(os.getenv("PRICE_FLUSH_BATCH", "500"))
+    PRICE_LOAD_PAGE_SIZE: int = int(os.getenv("PRICE_LOAD_PAGE_SIZE", "1000"))
+    PRICE_SYNC_INTERVAL_S: float = float(os.getenv("PRICE_SYNC_INTERVAL_S", "30"))
+    PRICE_DROP_ALERT_PCT: float = float(os.getenv("PRICE_DROP_ALERT_PCT", "10"))
 
 settings = Settings() 
\ No newline at end of file
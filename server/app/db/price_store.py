@@ -0,0 +1,292 @@
+from typing import Any, AsyncIterator, Dict, List, Optional
+from app.core.config import settings
+from app.db.supabase import supabase, run_supabase
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+# Columns of a tracked product, in table order
+TRACKED_COLUMNS = (
+    "id", "user_id", "url", "target_price", "interval_s", "last_price", "currency",
+    "etag", "last_modified", "last_checked_at", "created_at",
+)
+# Columns the scheduler writes back after a check
+STATE_COLUMNS = ("id", "last_price", "currency", "etag", "last_modified", "last_checked_at")
+# How long deletions are remembered for the scheduler's sync
+REMOVED_RETENTION_S = 86400
+
+def new_tracked_product(user_id: str, url: str, target_price: Optional[float], interval_s: int) -> Dict[str, Any]:
+    return {
+        "id": str(uuid.uuid4()),
+        "user_id": user_id,
+        "url": url,
+        "target_price": target_price,
+        "interval_s": interval_s,
+        "last_price": None,
+        "currency": None,
+        "etag": None,
+        "last_modified": None,
+        "last_checked_at": None,
+        "created_at": time.time(),
+    }
+
+class SupabasePriceStore:
+    """Tracked products, price history and alerts in Supabase (see price_tracking.sql)."""
+
+    async def add(self, product: Dict[str, Any]) -> Dict[str, Any]:
+        response = await run_supabase(lambda: supabase.table("tracked_products").insert(product).execute())
+        return response.data[0]
+
+    async def remove(self, product_id: str, user_id: str) -> bool:
+        response = await run_supabase(
+            lambda: supabase.table("tracked_products").delete().eq("id", product_id).eq("user_id", user_id).execute()
+        )
+        return bool(response.data)
+
+    async def get(self, product_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+        response = await run_supabase(
+            lambda: supabase.table("tracked_products").select("*").eq("id", product_id).eq("user_id", user_id).execute()
+        )
+        return response.data[0] if response.data else None
+
+    async def list_for_user(self, user_id: str) -> List[Dict[str, Any]]:
+        response = await run_supabase(
+            lambda: supabase.table("tracked_products").select("*").eq("user_id", user_id).order("created_at").execute()
+        )
+        return response.data
+
+    async def history(self, product_id: str, limit: int) -> List[Dict[str, Any]]:
+        response = await run_supabase(
+            lambda: supabase.table("price_history").select("price, currency, checked_at")
+            .eq("product_id", product_id).order("checked_at", desc=True).limit(limit).execute()
+        )
+        return response.data
+
+    async def alerts_for_user(self, user_id: str, limit: int) -> List[Dict[str, Any]]:
+        response = await run_supabase(
+            lambda: supabase.table("price_alerts").select("*")
+            .eq("user_id", user_id).order("created_at", desc=True).limit(limit).execute()
+        )
+        return response.data
+
+    async def iter_all(self, page_size: int = settings.PRICE_LOAD_PAGE_SIZE) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Every tracked product, one page at a time, paging by id."""
+        last_id = None
+        while True:
+            query = supabase.table("tracked_products").select("*")
+            if last_id is not None:
+                query = query.gt("id", last_id)
+            response = await run_supabase(query.order("id").limit(page_size).execute)
+            if not response.data:
+                return
+            yield response.data
+            last_id = response.data[-1]["id"]
+
+    async def added_since(self, since: float, page_size: int = settings.PRICE_LOAD_PAGE_SIZE) -> List[Dict[str, Any]]:
+        """Products created at or after ``since``."""
+        rows: List[Dict[str, Any]] = []
+        while True:
+            response = await run_supabase(
+                supabase.table("tracked_products").select("*").gte("created_at", since)
+                .order("created_at").order("id").range(len(rows), len(rows) + page_size - 1).execute
+            )
+            rows.extend(response.data)
+            if len(response.data) < page_size:
+                return rows
+
+    async def removed_since(self, since: float, page_size: int = settings.PRICE_LOAD_PAGE_SIZE) -> List[str]:
+        """Ids of products deleted at or after ``since``, recorded by a trigger on tracked_products."""
+        ids: List[str] = []
+        while True:
+            response = await run_supabase(
+                supabase.table("untracked_products").select("id").gte("deleted_at", since)
+                .order("id").range(len(ids), len(ids) + page_size - 1).execute
+            )
+            ids.extend(row["id"] for row in response.data)
+            if len(response.data) < page_size:
+                return ids
+
+    async def prune_removed(self, before: float) -> None:
+        await run_supabase(lambda: supabase.table("untracked_products").delete().lt("deleted_at", before).execute())
+
+    async def record(
+        self,
+        history: List[Dict[str, Any]],
+        products: List[Dict[str, Any]],
+        alerts: List[Dict[str, Any]],
+    ) -> None:
+        """Write one flush in a single request: the products' latest state, history rows and any alerts.
+
+        Products deleted since their check are skipped rather than re-inserted, along with their history and alerts.
+        """
+        if not (history or products or alerts):
+            return
+        state = [{column: row[column] for column in STATE_COLUMNS} for row in products]
+        await run_supabase(
+            lambda: supabase.rpc("record_price_checks", {"history": history, "products": state, "alerts": alerts}).execute()
+        )
+
+class SqlitePriceStore:
+    """Local stand-in for the Supabase tables, for development and tests."""
+
+    def __init__(self, path: str = settings.PRICE_STORE_PATH):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        os.register_at_fork(after_in_child=self._reconnect)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS tracked_products ("
+                "id TEXT PRIMARY KEY, user_id TEXT NOT NULL, url TEXT NOT NULL, target_price REAL, "
+                "interval_s INTEGER NOT NULL, last_price REAL, currency TEXT, etag TEXT, "
+                "last_modified TEXT, last_checked_at REAL, created_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS tracked_products_user ON tracked_products (user_id)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS price_history ("
+                "product_id TEXT NOT NULL, price REAL NOT NULL, currency TEXT, checked_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS price_history_product ON price_history (product_id, checked_at)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS price_alerts ("
+                "id TEXT PRIMARY KEY, product_id TEXT NOT NULL, user_id TEXT NOT NULL, kind TEXT NOT NULL, "
+                "price REAL NOT NULL, previous_price REAL, target_price REAL, created_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS price_alerts_user ON price_alerts (user_id, created_at)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS untracked_products (id TEXT PRIMARY KEY, deleted_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS untracked_products_deleted ON untracked_products (deleted_at)")
+            self._conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS tracked_products_untracked AFTER DELETE ON tracked_products BEGIN "
+                "INSERT OR REPLACE INTO untracked_products (id, deleted_at) "
+                "VALUES (old.id, (julianday('now') - 2440587.5) * 86400.0); END"
+            )
+            self._conn.commit()
+
+    def _reconnect(self) -> None:
+        # Forked workers open their own connection and leave the inherited one alone
+        self._inherited = self._conn
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+
+    def _query(self, sql: str, params: tuple = ()) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, params).fetchall()]
+
+    def _execute(self, sql: str, params: tuple = ()) -> int:
+        with self._lock:
+            cursor = self._conn.execute(sql, params)
+            self._conn.commit()
+            return cursor.rowcount
+
+    def _record(self, history: List[Dict[str, Any]], products: List[Dict[str, Any]], alerts: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            # Only the scraped state changes; the rest of the row stays as the user set it
+            self._conn.executemany(
+                "UPDATE tracked_products SET last_price = ?, currency = ?, etag = ?, last_modified = ?, "
+                "last_checked_at = ? WHERE id = ?",
+                [
+                    (row["last_price"], row["currency"], row["etag"], row["last_modified"], row["last_checked_at"], row["id"])
+                    for row in products
+                ],
+            )
+            # History and alerts of products deleted since their check are dropped
+            self._conn.executemany(
+                "INSERT INTO price_history (product_id, price, currency, checked_at) "
+                "SELECT ?, ?, ?, ? WHERE EXISTS (SELECT 1 FROM tracked_products WHERE id = ?)",
+                [(row["product_id"], row["price"], row["currency"], row["checked_at"], row["product_id"]) for row in history],
+            )
+            self._conn.executemany(
+                "INSERT INTO price_alerts (id, product_id, user_id, kind, price, previous_price, target_price, created_at) "
+                "SELECT ?, ?, ?, ?, ?, ?, ?, ? WHERE EXISTS (SELECT 1 FROM tracked_products WHERE id = ?)",
+                [
+                    (row["id"], row["product_id"], row["user_id"], row["kind"], row["price"],
+                     row["previous_price"], row["target_price"], row["created_at"], row["product_id"])
+                    for row in alerts
+                ],
+            )
+            self._conn.commit()
+
+    async def add(self, product: Dict[str, Any]) -> Dict[str, Any]:
+        await asyncio.to_thread(
+            self._execute,
+            f"INSERT INTO tracked_products ({', '.join(TRACKED_COLUMNS)}) VALUES ({', '.join('?' * len(TRACKED_COLUMNS))})",
+            tuple(product[column] for column in TRACKED_COLUMNS),
+        )
+        return product
+
+    async def remove(self, product_id: str, user_id: str) -> bool:
+        removed = await asyncio.to_thread(
+            self._execute, "DELETE FROM tracked_products WHERE id = ? AND user_id = ?", (product_id, user_id)
+        )
+        return removed > 0
+
+    async def get(self, product_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+        rows = await asyncio.to_thread(
+            self._query, "SELECT * FROM tracked_products WHERE id = ? AND user_id = ?", (product_id, user_id)
+        )
+        return rows[0] if rows else None
+
+    async def list_for_user(self, user_id: str) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(
+            self._query, "SELECT * FROM tracked_products WHERE user_id = ? ORDER BY created_at", (user_id,)
+        )
+
+    async def history(self, product_id: str, limit: int) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(
+            self._query,
+            "SELECT price, currency, checked_at FROM price_history WHERE product_id = ? ORDER BY checked_at DESC LIMIT ?",
+            (product_id, limit),
+        )
+
+    async def alerts_for_user(self, user_id: str, limit: int) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(
+            self._query, "SELECT * FROM price_alerts WHERE user_id = ? ORDER BY created_at DESC LIMIT ?", (user_id, limit)
+        )
+
+    async def iter_all(self, page_size: int = settings.PRICE_LOAD_PAGE_SIZE) -> AsyncIterator[List[Dict[str, Any]]]:
+        last_id = ""
+        while True:
+            rows = await asyncio.to_thread(
+                self._query, "SELECT * FROM tracked_products WHERE id > ? ORDER BY id LIMIT ?", (last_id, page_size)
+            )
+            if not rows:
+                return
+            yield rows
+            last_id = rows[-1]["id"]
+
+    async def added_since(self, since: float) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(
+            self._query, "SELECT * FROM tracked_products WHERE created_at >= ? ORDER BY created_at", (since,)
+        )
+
+    async def removed_since(self, since: float) -> List[str]:
+        rows = await asyncio.to_thread(self._query, "SELECT id FROM untracked_products WHERE deleted_at >= ?", (since,))
+        return [row["id"] for row in rows]
+
+    async def prune_removed(self, before: float) -> None:
+        await asyncio.to_thread(self._execute, "DELETE FROM untracked_products WHERE deleted_at < ?", (before,))
+
+    async def record(
+        self,
+        history: List[Dict[str, Any]],
+        products: List[Dict[str, Any]],
+        alerts: List[Dict[str, Any]],
+    ) -> None:
+        await asyncio.to_thread(self._record, history, products, alerts)
+
+def create_price_store():
+    if settings.PRICE_STORE_BACKEND == "sqlite":
+        return SqlitePriceStore()
+    return SupabasePriceStore()
+
+price_store = create_price_store()
@@ -0,0 +1,89 @@
+-- Price tracking tables for Supabase. Times are Unix epoch seconds.
+
+create table if not exists tracked_products (
+    id uuid primary key,
+    user_id uuid not null references users (id) on delete cascade,
+    url text not null,
+    target_price double precision,
+    interval_s integer not null,
+    last_price double precision,
+    currency text,
+    etag text,
+    last_modified text,
+    last_checked_at double precision,
+    created_at double precision not null
+);
+create index if not exists tracked_products_user on tracked_products (user_id);
+
+create table if not exists price_history (
+    id bigint generated always as identity primary key,
+    product_id uuid not null references tracked_products (id) on delete cascade,
+    price double precision not null,
+    currency text,
+    checked_at double precision not null
+);
+create index if not exists price_history_product on price_history (product_id, checked_at desc);
+
+create table if not exists price_alerts (
+    id uuid primary key,
+    product_id uuid not null references tracked_products (id) on delete cascade,
+    user_id uuid not null references users (id) on delete cascade,
+    kind text not null,
+    price double precision not null,
+    previous_price double precision,
+    target_price double precision,
+    created_at double precision not null
+);
+create index if not exists price_alerts_user on price_alerts (user_id, created_at desc);
+
+-- Deleted products, kept for a day so the price scheduler (which may run in
+-- another process) can stop checking them
+create table if not exists untracked_products (
+    id uuid primary key,
+    deleted_at double precision not null
+);
+create index if not exists untracked_products_deleted on untracked_products (deleted_at);
+
+create or replace function record_untracked_product() returns trigger
+language plpgsql as $$
+begin
+    insert into untracked_products (id, deleted_at) values (old.id, extract(epoch from clock_timestamp()))
+    on conflict (id) do update set deleted_at = excluded.deleted_at;
+    return old;
+end;
+$$;
+
+drop trigger if exists tracked_products_untracked on tracked_products;
+create trigger tracked_products_untracked after delete on tracked_products
+    for each row execute function record_untracked_product();
+
+-- One scheduler flush. Only the scraped columns of existing products are
+-- updated; products deleted since their check are skipped along with their
+-- history and alerts instead of failing the batch. Updating first locks the
+-- products' rows, so they cannot be deleted before the inserts below.
+create or replace function record_price_checks(history jsonb, products jsonb, alerts jsonb) returns void
+language sql as $$
+    update tracked_products t
+    set last_price = p.last_price, currency = p.currency, etag = p.etag,
+        last_modified = p.last_modified, last_checked_at = p.last_checked_at
+    from jsonb_to_recordset(products) as p (
+        id uuid, last_price double precision, currency text, etag text,
+        last_modified text, last_checked_at double precision
+    )
+    where t.id = p.id;
+
+    insert into price_history (product_id, price, currency, checked_at)
+    select h.product_id, h.price, h.currency, h.checked_at
+    from jsonb_to_recordset(history) as h (
+        product_id uuid, price double precision, currency text, checked_at double precision
+    )
+    where exists (select 1 from tracked_products t where t.id = h.product_id);
+
+    insert into price_alerts (id, product_id, user_id, kind, price, previous_price, target_price, created_at)
+    select a.id, a.product_id, a.user_id, a.kind, a.price, a.previous_price, a.target_price, a.created_at
+    from jsonb_to_recordset(alerts) as a (
+        id uuid, product_id uuid, user_id uuid, kind text, price double precision,
+        previous_price double precision, target_price double precision, created_at double precision
+    )
+    where exists (select 1 from tracked_products t where t.id = a.product_id);
+$$;
@@ -1,4 +1,15 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
 from supabase import create_client
 from app.core.config import settings
+import asyncio
+import functools
 
-supabase = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY) 
\ No newline at end of file
+supabase = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
+
+# The client is synchronous; its calls run on a bounded pool so they never block the event loop
+supabase_executor = ThreadPoolExecutor(max_workers=settings.SUPABASE_POOL_SIZE, thread_name_prefix="supabase")
+
+async def run_supabase(func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(supabase_executor, functools.partial(func, *args, **kwargs))
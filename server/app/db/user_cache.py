@@ -0,0 +1,125 @@
+from collections import OrderedDict
+from typing import Optional, Tuple
+from app.core.config import settings
+from app.schemas.user import User
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+
+class UserCache:
+    """Short-lived cache of authenticated user profiles keyed by user id, in this process only."""
+
+    def __init__(
+        self,
+        ttl_s: int = settings.USER_CACHE_TTL_S,
+        max_entries: int = settings.USER_CACHE_MAX_ENTRIES,
+    ):
+        self.ttl_s = ttl_s
+        self.max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[str, Tuple[float, User]]" = OrderedDict()
+
+    async def get(self, user_id: str) -> Optional[User]:
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        expires_at, user = entry
+        if expires_at < time.monotonic():
+            del self._entries[user_id]
+            return None
+        self._entries.move_to_end(user_id)
+        return user.copy()
+
+    async def set(self, user: User) -> None:
+        if self.ttl_s <= 0:
+            return
+        self._entries[user.id] = (time.monotonic() + self.ttl_s, user.copy())
+        self._entries.move_to_end(user.id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def invalidate(self, user_id: str) -> None:
+        self._entries.pop(user_id, None)
+
+class SqliteUserCache:
+    """User profile cache shared by every worker on the node.
+
+    Invalidating a user in one worker drops the profile for all of them,
+    so a deleted or updated account is not served from another worker's copy.
+    """
+
+    def __init__(
+        self,
+        path: str = settings.USER_CACHE_PATH,
+        ttl_s: int = settings.USER_CACHE_TTL_S,
+        max_entries: int = settings.USER_CACHE_MAX_ENTRIES,
+    ):
+        self.path = path
+        self.ttl_s = ttl_s
+        self.max_entries = max(1, max_entries)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        os.register_at_fork(after_in_child=self._reconnect)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS user_cache ("
+                "user_id TEXT PRIMARY KEY, profile TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS user_cache_expires_at ON user_cache (expires_at)")
+            self._conn.commit()
+
+    def _reconnect(self) -> None:
+        # Forked workers open their own connection and leave the inherited one alone
+        self._inherited = self._conn
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._lock = threading.Lock()
+
+    def _get(self, user_id: str) -> Optional[User]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT profile FROM user_cache WHERE user_id = ? AND expires_at >= ?", (user_id, time.time())
+            ).fetchone()
+        return User.parse_raw(row[0]) if row is not None else None
+
+    def _set(self, user: User) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO user_cache (user_id, profile, expires_at) VALUES (?, ?, ?)",
+                (user.id, user.json(), now + self.ttl_s),
+            )
+            self._conn.execute("DELETE FROM user_cache WHERE expires_at < ?", (now,))
+            overflow = self._conn.execute("SELECT COUNT(*) FROM user_cache").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM user_cache WHERE user_id IN ("
+                    "SELECT user_id FROM user_cache ORDER BY expires_at LIMIT ?)",
+                    (overflow,),
+                )
+            self._conn.commit()
+
+    def _invalidate(self, user_id: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM user_cache WHERE user_id = ?", (user_id,))
+            self._conn.commit()
+
+    async def get(self, user_id: str) -> Optional[User]:
+        return await asyncio.to_thread(self._get, user_id)
+
+    async def set(self, user: User) -> None:
+        if self.ttl_s <= 0:
+            return
+        await asyncio.to_thread(self._set, user)
+
+    async def invalidate(self, user_id: str) -> None:
+        await asyncio.to_thread(self._invalidate, user_id)
+
+def create_user_cache():
+    if settings.USER_CACHE_BACKEND == "sqlite":
+        return SqliteUserCache()
+    # A per-process cache cannot be invalidated in the other workers, so it is only used with one
+    return UserCache(ttl_s=settings.USER_CACHE_TTL_S if settings.WEB_CONCURRENCY <= 1 else 0)
+
+user_cache = create_user_cache()
@@ -0,0 +1,42 @@
+from typing import List, Optional
+from pydantic import BaseModel, HttpUrl, validator
+from app.core.config import settings
+
+class TrackProductRequest(BaseModel):
+    url: HttpUrl
+    target_price: Optional[float] = None
+    interval_s: int = settings.PRICE_DEFAULT_INTERVAL_S
+
+    @validator("interval_s")
+    def check_interval(cls, interval_s):
+        if interval_s < settings.PRICE_MIN_INTERVAL_S:
+            raise ValueError(f"Prices can be checked at most every {settings.PRICE_MIN_INTERVAL_S} seconds")
+        return interval_s
+
+class TrackedProduct(BaseModel):
+    id: str
+    url: str
+    target_price: Optional[float] = None
+    interval_s: int
+    last_price: Optional[float] = None
+    currency: Optional[str] = None
+    last_checked_at: Optional[float] = None
+    created_at: float
+
+class PricePoint(BaseModel):
+    price: float
+    currency: Optional[str] = None
+    checked_at: float
+
+class PriceHistory(BaseModel):
+    product_id: str
+    history: List[PricePoint]
+
+class PriceAlert(BaseModel):
+    id: str
+    product_id: str
+    kind: str
+    price: float
+    previous_price: Optional[float] = None
+    target_price: Optional[float] = None
+    created_at: float
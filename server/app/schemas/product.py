@@ -0,0 +1,57 @@
+from typing import List, Dict, Any, Optional
+from pydantic import BaseModel, HttpUrl, validator
+from app.core.config import settings
+
+class ProductAnalysisRequest(BaseModel):
+    url: HttpUrl
+    pages: int = 1
+    model: str = settings.SENTIMENT_MODEL
+
+class ProductAnalysisResponse(BaseModel):
+    product_id: Optional[str] = None
+    product_reviews: List[Dict[str, Any]]
+    sentiment_analysis: Optional[List[Dict[str, Any]]] = []
+    aspect_analysis: Optional[List[Dict[str, Any]]] = []
+    credibility_scores: Optional[List[Dict[str, Any]]] = []
+
+class BatchAnalysisRequest(BaseModel):
+    urls: List[HttpUrl]
+    pages: int = 1
+    model: str = settings.SENTIMENT_MODEL
+
+    @validator("urls")
+    def check_url_count(cls, urls):
+        if not urls:
+            raise ValueError("At least one URL is required")
+        if len(urls) > settings.BATCH_MAX_URLS:
+            raise ValueError(f"At most {settings.BATCH_MAX_URLS} URLs can be analyzed at once")
+        return urls
+
+class BatchAnalysisItem(BaseModel):
+    url: str
+    status: str
+    result: Optional[ProductAnalysisResponse] = None
+    error: Optional[str] = None
+
+class BatchAnalysisResponse(BaseModel):
+    results: List[BatchAnalysisItem]
+
+class ReviewSearchHit(BaseModel):
+    product_review: str
+    rating: Optional[float] = None
+    sentiment: Optional[Dict[str, Any]] = None
+    bias_scores: Dict[str, float] = {}
+    credibility_score: Optional[float] = None
+    similarity: float
+
+class ReviewSearchResponse(BaseModel):
+    product_id: str
+    query: str
+    results: List[ReviewSearchHit]
+
+class AnalysisJob(BaseModel):
+    job_id: str
+    status: str
+    stages: Dict[str, str]
+    result: Optional[ProductAnalysisResponse] = None
+    error: Optional[str] = None
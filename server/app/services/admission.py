@@ -0,0 +1,222 @@
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.services.metrics import timed, count_rejection, track_queue
+import asyncio
+import math
+import time
+
+class AdmissionRejected(Exception):
+    """The request cannot be served now; retry after ``retry_after`` seconds."""
+
+    status_code = 503
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = max(1, math.ceil(retry_after))
+
+class Saturated(AdmissionRejected):
+    status_code = 503
+
+class QuotaExceeded(AdmissionRejected):
+    status_code = 429
+
+class Limiter:
+    """Caps how many holders run at once, with a bounded FIFO wait queue.
+
+    A caller that finds ``max_waiting`` others already queued, or that waits
+    longer than ``timeout_s``, is rejected with Saturated. Unbounded waits
+    (``bounded=False``) are for internal callers that are capped elsewhere;
+    they are served in the same order but never rejected.
+    """
+
+    def __init__(self, name: str, capacity: int, max_waiting: int, timeout_s: float):
+        self.name = name
+        self.capacity = max(1, capacity)
+        self.max_waiting = max(0, max_waiting)
+        self.timeout_s = timeout_s
+        self.active = 0
+        self._waiters: Deque[Tuple[asyncio.Future, int]] = deque()
+        # Moving average of how long a slot is held, for Retry-After
+        self._hold_s = 1.0
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def retry_after(self) -> float:
+        return self._hold_s * (self.waiting + 1) / self.capacity
+
+    def check(self) -> None:
+        """Reject now if a new caller would find the wait queue full."""
+        if settings.ADMISSION_ENABLED and self.waiting >= self.max_waiting:
+            count_rejection(self.name, "queue_full")
+            raise Saturated(f"Too many {self.name} requests in progress", self.retry_after())
+
+    async def acquire(self, units: int = 1, bounded: bool = True) -> int:
+        """Take ``units`` slots (at most ``capacity``) and return how many were taken."""
+        units = min(max(1, units), self.capacity)
+        if not self._waiters and self.active + units <= self.capacity:
+            self.active += units
+            return units
+        if bounded and self.waiting >= self.max_waiting:
+            count_rejection(self.name, "queue_full")
+            raise Saturated(f"Too many {self.name} requests in progress", self.retry_after())
+
+        waiter = asyncio.get_running_loop().create_future()
+        entry = (waiter, units)
+        self._waiters.append(entry)
+        try:
+            with timed(f"{self.name}_wait"):
+                if bounded:
+                    await asyncio.wait_for(asyncio.shield(waiter), self.timeout_s)
+                else:
+                    await waiter
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # Granted just as the wait ended: hand the slots back
+                self.release(units)
+            else:
+                waiter.cancel()
+                try:
+                    self._waiters.remove(entry)
+                except ValueError:
+                    pass
+                self._wake()
+            if isinstance(e, asyncio.TimeoutError):
+                count_rejection(self.name, "timeout")
+                raise Saturated(f"Timed out waiting for a {self.name} slot", self.retry_after())
+            raise
+        return units
+
+    def release(self, units: int = 1, held_s: Optional[float] = None) -> None:
+        self.active -= units
+        if held_s is not None:
+            self._hold_s = 0.8 * self._hold_s + 0.2 * held_s
+        self._wake()
+
+    def _wake(self) -> None:
+        # Strict FIFO: a large request at the head is not overtaken by smaller ones
+        while self._waiters:
+            waiter, units = self._waiters[0]
+            if waiter.done():
+                # Cancelled while queued
+                self._waiters.popleft()
+                continue
+            if self.active + units > self.capacity:
+                break
+            self._waiters.popleft()
+            self.active += units
+            waiter.set_result(None)
+
+    @asynccontextmanager
+    async def slot(self, units: int = 1, bounded: bool = True) -> AsyncIterator[int]:
+        if not settings.ADMISSION_ENABLED:
+            yield units
+            return
+        taken = await self.acquire(units, bounded)
+        start = time.monotonic()
+        try:
+            yield taken
+        finally:
+            self.release(taken, time.monotonic() - start)
+
+class UserQuotas:
+    """Per-user limits: concurrent analyses and a token bucket of analyses per minute."""
+
+    def __init__(self, max_concurrent: int, per_minute: int, max_users: int = settings.USER_CACHE_MAX_ENTRIES):
+        self.max_concurrent = max(1, max_concurrent)
+        self.per_minute = max(1, per_minute)
+        self.max_users = max_users
+        # user id -> [tokens, last refill, active]
+        self._users: Dict[str, List[float]] = {}
+
+    def _state(self, user_id: str) -> List[float]:
+        now = time.monotonic()
+        state = self._users.get(user_id)
+        if state is None:
+            if len(self._users) >= self.max_users:
+                self._prune(now)
+            state = self._users[user_id] = [float(self.per_minute), now, 0]
+        else:
+            state[0] = min(self.per_minute, state[0] + (now - state[1]) * self.per_minute / 60)
+            state[1] = now
+        return state
+
+    def _prune(self, now: float) -> None:
+        # Idle users whose bucket has refilled carry no state worth keeping
+        for user_id, (tokens, updated, active) in list(self._users.items()):
+            if not active and tokens + (now - updated) * self.per_minute / 60 >= self.per_minute:
+                del self._users[user_id]
+
+    def take(self, user_id: str, cost: int = 1) -> None:
+        """Spend ``cost`` analyses from the user's per-minute budget."""
+        if not settings.ADMISSION_ENABLED:
+            return
+        state = self._state(user_id)
+        # A request larger than the whole budget can still run once the bucket is full
+        cost = min(cost, self.per_minute)
+        if state[0] < cost:
+            count_rejection("user", "rate")
+            raise QuotaExceeded(
+                f"Analysis quota of {self.per_minute} per minute exceeded",
+                (cost - state[0]) * 60 / self.per_minute,
+            )
+        state[0] -= cost
+
+    def acquire(self, user_id: str, cost: int = 1) -> None:
+        """Start one of the user's concurrent analyses and spend ``cost`` from the budget; pair with ``release``."""
+        if not settings.ADMISSION_ENABLED:
+            return
+        state = self._state(user_id)
+        if state[2] >= self.max_concurrent:
+            count_rejection("user", "concurrency")
+            raise QuotaExceeded(f"At most {self.max_concurrent} analyses can run at once per user", 1)
+        self.take(user_id, cost)
+        state[2] += 1
+
+    def release(self, user_id: str, refund: int = 0) -> None:
+        """End an analysis started with ``acquire``, giving ``refund`` of its cost back to the budget."""
+        if not settings.ADMISSION_ENABLED:
+            return
+        state = self._users.get(user_id)
+        if state is None:
+            return
+        state[2] = max(0, state[2] - 1)
+        state[0] = min(self.per_minute, state[0] + min(refund, self.per_minute))
+
+    @asynccontextmanager
+    async def hold(self, user_id: str, cost: int = 1) -> AsyncIterator[None]:
+        """Count the block as one of the user's concurrent analyses and spend ``cost`` from the budget."""
+        self.acquire(user_id, cost)
+        refund = 0
+        try:
+            yield
+        except Saturated:
+            # The server turned it away, so it does not count against the user
+            refund = cost
+            raise
+        finally:
+            self.release(user_id, refund)
+
+def per_worker(limit: int) -> int:
+    """Each gunicorn worker's share of a limit that is set for the whole node."""
+    return max(1, limit // max(1, settings.WEB_CONCURRENCY))
+
+scrape_limiter = Limiter(
+    "scrape",
+    per_worker(settings.ADMISSION_MAX_SCRAPES),
+    per_worker(settings.ADMISSION_MAX_WAITING),
+    settings.ADMISSION_QUEUE_TIMEOUT_S,
+)
+inference_limiter = Limiter(
+    "inference",
+    per_worker(settings.ADMISSION_MAX_INFERENCE),
+    per_worker(settings.ADMISSION_MAX_WAITING),
+    settings.ADMISSION_QUEUE_TIMEOUT_S,
+)
+user_quotas = UserQuotas(per_worker(settings.ADMISSION_USER_CONCURRENCY), per_worker(settings.ADMISSION_USER_PER_MINUTE))
+
+track_queue("scrape_admission", lambda: scrape_limiter.waiting)
+track_queue("inference_admission", lambda: inference_limiter.waiting)
@@ -0,0 +1,238 @@
+from collections import Counter
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+from app.services.product_analyzer import ProductAnalyzer, detect_bias_task, assess_credibility_task
+from app.services.executor import inference_executor
+from app.services.metrics import timed, observe_reviews
+from app.services.scrape_cache import normalize_url
+from app.services.admission import scrape_limiter, inference_limiter
+from app.services.review_index import review_index, product_id
+import asyncio
+
+STAGES = ("scrape", "sentiment", "bias", "credibility")
+
+class NoReviewsError(Exception):
+    pass
+
+def _report(on_stage: Optional[Callable[[str, str], None]], stage: str, state: str) -> None:
+    if on_stage is not None:
+        on_stage(stage, state)
+
+async def run_analysis(
+    url: str,
+    pages: int,
+    model: str,
+    on_stage: Optional[Callable[[str, str], None]] = None,
+    bounded_wait: bool = True,
+) -> Dict[str, Any]:
+    """Scrape and score a product's reviews, returning the ProductAnalysisResponse fields.
+
+    ``on_stage(stage, state)`` is called as each stage starts ("running") and finishes ("done").
+    Scraping and scoring each take an admission slot; with ``bounded_wait`` a
+    caller that cannot get one in time is rejected with Saturated.
+    """
+    # Cheap: pipelines are shared through the model registry
+    analyzer = ProductAnalyzer(model_name=model)
+
+    _report(on_stage, "scrape", "running")
+    async with scrape_limiter.slot(bounded=bounded_wait):
+        with timed("scrape"):
+            product_reviews = await analyzer.extract_reviews(url, pages)
+    if not product_reviews:
+        raise NoReviewsError("No reviews found for analysis.")
+    observe_reviews(len(product_reviews))
+    _report(on_stage, "scrape", "done")
+
+    async with inference_limiter.slot(bounded=bounded_wait):
+        _report(on_stage, "sentiment", "running")
+        with timed("sentiment"):
+            sentiment_analysis = await analyzer.analyze_sentiment(product_reviews)
+        _report(on_stage, "sentiment", "done")
+
+        _report(on_stage, "bias", "running")
+        # Blocking model and regex work runs on the inference executor, not the event loop
+        with timed("bias"):
+            aspect_analysis = await inference_executor.run(detect_bias_task, analyzer.bias_model_name, product_reviews)
+        _report(on_stage, "bias", "done")
+
+        _report(on_stage, "credibility", "running")
+        with timed("credibility"):
+            credibility_scores = await inference_executor.run(assess_credibility_task, product_reviews)
+        _report(on_stage, "credibility", "done")
+
+    result = _assemble(product_reviews, sentiment_analysis, aspect_analysis, credibility_scores)
+    result["product_id"] = product_id(url)
+    review_index.schedule(url, result["product_reviews"])
+    return result
+
+def _assemble(
+    product_reviews: List[Dict[str, Any]],
+    sentiment_analysis: List[Dict[str, Any]],
+    aspect_analysis: List[Dict[str, Any]],
+    credibility_scores: List[Dict[str, Any]],
+) -> Dict[str, Any]:
+    processed_reviews = []
+    for i, review in enumerate(product_reviews):
+        processed_reviews.append({
+            "product_review": review.get("product_review", ""),
+            "rating": review.get("rating", 0),
+            "sentiment": sentiment_analysis[i] if i < len(sentiment_analysis) else None,
+            "bias_scores": aspect_analysis[i]["bias_scores"] if i < len(aspect_analysis) else {},
+            "credibility_score": credibility_scores[i]["credibility_score"] if i < len(credibility_scores) else 0
+        })
+
+    return {
+        "product_reviews": processed_reviews,
+        "sentiment_analysis": sentiment_analysis,
+        "aspect_analysis": aspect_analysis,
+        "credibility_scores": credibility_scores,
+    }
+
+async def _score_pooled(analyzer: ProductAnalyzer, groups: List[List[Dict[str, Any]]]) -> List[Any]:
+    """Sentiment and bias for several products' reviews in shared batches, split back per product."""
+    pooled = [review for reviews in groups for review in reviews]
+    with timed("sentiment"):
+        sentiment_analysis = await analyzer.analyze_sentiment(pooled)
+    with timed("bias"):
+        aspect_analysis = await inference_executor.run(detect_bias_task, analyzer.bias_model_name, pooled)
+
+    scored = []
+    start = 0
+    for reviews in groups:
+        end = start + len(reviews)
+        scored.append((sentiment_analysis[start:end], aspect_analysis[start:end]))
+        start = end
+    return scored
+
+async def run_batch_analysis(urls: List[str], pages: int, model: str) -> List[Dict[str, Any]]:
+    """Analyze several products at once, returning one {url, status, result, error} entry per URL.
+
+    Products are scraped concurrently (still capped per domain) on up to
+    ADMISSION_MAX_SCRAPES slots, and their reviews share sentiment and bias
+    batches. A product that fails to scrape or score is reported as failed
+    without affecting the others; Saturated from admission fails the whole batch.
+    """
+    analyzer = ProductAnalyzer(model_name=model)
+    # Equivalent URLs are analyzed once, using the first spelling given
+    unique_urls: Dict[str, str] = {}
+    for url in urls:
+        unique_urls.setdefault(normalize_url(str(url)), str(url))
+
+    async with scrape_limiter.slot(len(unique_urls)) as slots:
+        # The batch scrapes on as many slots as it was given
+        semaphore = asyncio.Semaphore(slots)
+
+        async def scrape(url: str) -> List[Dict[str, Any]]:
+            async with semaphore:
+                return await analyzer.extract_reviews(url, pages)
+
+        with timed("scrape"):
+            scraped = await asyncio.gather(*(scrape(url) for url in unique_urls.values()), return_exceptions=True)
+
+    outcomes: Dict[str, Dict[str, Any]] = {}
+    products: Dict[str, List[Dict[str, Any]]] = {}
+    for url, reviews in zip(unique_urls, scraped):
+        if isinstance(reviews, Exception):
+            outcomes[url] = {"status": "failed", "result": None, "error": f"Failed to scrape reviews: {str(reviews)}"}
+        else:
+            # Blank reviews would shift the pooled results out of line
+            reviews = [r for r in reviews if isinstance(r.get("product_review"), str) and r["product_review"].strip()]
+            if not reviews:
+                outcomes[url] = {"status": "failed", "result": None, "error": "No reviews found for analysis."}
+            else:
+                observe_reviews(len(reviews))
+                products[url] = reviews
+
+    if products:
+        async with inference_limiter.slot():
+            try:
+                scored = await _score_pooled(analyzer, list(products.values()))
+            except Exception as e:
+                # Score products one at a time so a single bad product fails alone
+                print(f"Pooled scoring failed, retrying per product: {str(e)}")
+                scored = []
+                for reviews in products.values():
+                    try:
+                        scored.extend(await _score_pooled(analyzer, [reviews]))
+                    except Exception as product_error:
+                        scored.append(product_error)
+
+            for (url, reviews), product_scores in zip(products.items(), scored):
+                if isinstance(product_scores, Exception):
+                    outcomes[url] = {"status": "failed", "result": None, "error": f"Failed to analyze product reviews: {str(product_scores)}"}
+                    continue
+                sentiment_analysis, aspect_analysis = product_scores
+                try:
+                    # Duplicates are judged within each product
+                    with timed("credibility"):
+                        credibility_scores = await inference_executor.run(assess_credibility_task, reviews)
+                    result = _assemble(reviews, sentiment_analysis, aspect_analysis, credibility_scores)
+                    result["product_id"] = product_id(url)
+                    review_index.schedule(url, result["product_reviews"])
+                    outcomes[url] = {"status": "completed", "result": result, "error": None}
+                except Exception as e:
+                    outcomes[url] = {"status": "failed", "result": None, "error": f"Failed to analyze product reviews: {str(e)}"}
+
+    return [{"url": str(url), **outcomes[normalize_url(str(url))]} for url in urls]
+
+async def stream_analysis(url: str, pages: int, model: str) -> AsyncIterator[Dict[str, Any]]:
+    """Yield one record per review as soon as it is scored, then a summary record.
+
+    Reviews are scored page by page. Duplicate counts only cover the reviews seen
+    so far, so the summary lists any credibility scores that later duplicates lowered.
+    """
+    analyzer = ProductAnalyzer(model_name=model)
+    review_counts: Counter = Counter()
+    scored = []
+
+    # Scrape time is not timed here: it overlaps with scoring the previous page.
+    # The scrape slot is held for the whole stream, an inference slot per page.
+    async with scrape_limiter.slot():
+        async for batch in analyzer.iter_reviews(url, pages):
+            review_counts.update(r.get("product_review", "").strip().lower() for r in batch)
+
+            async with inference_limiter.slot():
+                with timed("sentiment"):
+                    sentiment_analysis = await analyzer.analyze_sentiment(batch)
+                with timed("bias"):
+                    aspect_analysis = await inference_executor.run(detect_bias_task, analyzer.bias_model_name, batch)
+                with timed("credibility"):
+                    credibility_scores = await inference_executor.run(assess_credibility_task, batch, review_counts)
+
+            for i, review in enumerate(batch):
+                record = {
+                    "type": "review",
+                    "index": len(scored),
+                    "product_review": review.get("product_review", ""),
+                    "rating": review.get("rating", 0),
+                    "sentiment": sentiment_analysis[i]["sentiment"] if i < len(sentiment_analysis) else None,
+                    "bias_scores": aspect_analysis[i]["bias_scores"] if i < len(aspect_analysis) else {},
+                    "credibility_score": credibility_scores[i]["credibility_score"] if i < len(credibility_scores) else 0
+                }
+                scored.append(record)
+                yield record
+
+    if not scored:
+        raise NoReviewsError("No reviews found for analysis.")
+    observe_reviews(len(scored))
+
+    # Rescore now that duplicates across the whole set are known
+    async with inference_limiter.slot():
+        with timed("credibility"):
+            final_scores = await inference_executor.run(
+                assess_credibility_task, [{"product_review": record["product_review"]} for record in scored], review_counts
+            )
+    credibility_updates = []
+    for record, final in zip(scored, final_scores):
+        if final["credibility_score"] != record["credibility_score"]:
+            record["credibility_score"] = final["credibility_score"]
+            credibility_updates.append({"index": record["index"], "credibility_score": final["credibility_score"]})
+
+    review_index.schedule(url, scored)
+    yield {
+        "type": "summary",
+        "product_id": product_id(url),
+        "review_count": len(scored),
+        "average_rating": sum(record["rating"] for record in scored) / len(scored),
+        "average_credibility": sum(record["credibility_score"] for record in scored) / len(scored),
+        "credibility_updates": credibility_updates,
+    }
@@ -0,0 +1,385 @@
+from typing import Any, Dict, List, Optional
+from app.core.config import settings
+from app.services.analysis import STAGES, run_analysis
+from app.services.scrape_cache import normalize_url
+from app.services.metrics import track_queue
+import asyncio
+import orjson
+import os
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+
+# Workers refresh their unfinished jobs this often; a job not refreshed for
+# ABANDONED_AFTER_S belonged to a worker that exited and is marked failed
+HEARTBEAT_S = 10
+ABANDONED_AFTER_S = 3 * HEARTBEAT_S
+
+def _public(job: Dict[str, Any]) -> Dict[str, Any]:
+    return {field: job[field] for field in ("job_id", "status", "stages", "result", "error")}
+
+def _abandon(job: Dict[str, Any], now: float) -> None:
+    job["status"] = "failed"
+    job["error"] = "The worker running this job exited"
+    job["finished_at"] = now
+    for stage, state in job["stages"].items():
+        if state == "running":
+            job["stages"][stage] = "failed"
+
+class MemoryJobStore:
+    """Jobs in this process only; for running a single worker."""
+
+    def __init__(self):
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._in_flight: Dict[str, str] = {}
+
+    async def create(self, job: Dict[str, Any], user_id: str) -> Dict[str, Any]:
+        job_id = self._in_flight.get(job["key"])
+        if job_id is None:
+            job_id = job["job_id"]
+            self._jobs[job_id] = {**job, "stages": dict(job["stages"]), "owners": set()}
+            self._in_flight[job["key"]] = job_id
+        stored = self._jobs[job_id]
+        stored["owners"].add(user_id)
+        return _public(stored)
+
+    async def update(self, job_id: str, fields: Dict[str, Any]) -> None:
+        job = self._jobs.get(job_id)
+        if job is None:
+            return
+        job.update(fields)
+        if job["finished_at"] is not None and self._in_flight.get(job["key"]) == job_id:
+            del self._in_flight[job["key"]]
+
+    async def heartbeat(self, job_ids: List[str]) -> None:
+        pass
+
+    async def get(self, job_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+        job = self._jobs.get(job_id)
+        if job is None or user_id not in job["owners"]:
+            return None
+        return _public(job)
+
+    async def prune(self, before: float) -> None:
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job["finished_at"] is not None and job["finished_at"] < before
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+class SqliteJobStore:
+    """Jobs in an on-disk table shared by every worker on the node.
+
+    Any worker can answer for a job, and a job in flight for the same
+    (URL, pages, model) in any worker is shared rather than duplicated.
+    """
+
+    def __init__(self, path: str = settings.ANALYSIS_JOB_PATH):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        os.register_at_fork(after_in_child=self._reconnect)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS analysis_jobs ("
+                "job_id TEXT PRIMARY KEY, key TEXT NOT NULL, status TEXT NOT NULL, stages TEXT NOT NULL, "
+                "result BLOB, error TEXT, heartbeat_at REAL NOT NULL, finished_at REAL)"
+            )
+            # At most one unfinished job per key, even when two workers submit at once
+            self._conn.execute(
+                "CREATE UNIQUE INDEX IF NOT EXISTS analysis_jobs_in_flight ON analysis_jobs (key) "
+                "WHERE finished_at IS NULL"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS analysis_jobs_finished_at ON analysis_jobs (finished_at)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS analysis_job_owners ("
+                "job_id TEXT NOT NULL, user_id TEXT NOT NULL, PRIMARY KEY (job_id, user_id))"
+            )
+
+    def _reconnect(self) -> None:
+        # Forked workers open their own connection and leave the inherited one alone
+        self._inherited = self._conn
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+
+    def _row(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn.execute(
+            "SELECT job_id, key, status, stages, result, error, heartbeat_at, finished_at "
+            "FROM analysis_jobs WHERE job_id = ?",
+            (job_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        job_id, key, status, stages, result, error, heartbeat_at, finished_at = row
+        return {
+            "job_id": job_id, "key": key, "status": status, "stages": orjson.loads(stages),
+            "result": orjson.loads(result) if result is not None else None, "error": error,
+            "heartbeat_at": heartbeat_at, "finished_at": finished_at,
+        }
+
+    def _write(self, job: Dict[str, Any]) -> None:
+        self._conn.execute(
+            "UPDATE analysis_jobs SET status = ?, stages = ?, error = ?, finished_at = ? WHERE job_id = ?",
+            (job["status"], orjson.dumps(job["stages"]), job["error"], job["finished_at"], job["job_id"]),
+        )
+
+    def _create(self, job: Dict[str, Any], user_id: str) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            # IMMEDIATE takes SQLite's write lock, so the in-flight check and insert are atomic across workers
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT job_id FROM analysis_jobs WHERE key = ? AND finished_at IS NULL", (job["key"],)
+                ).fetchone()
+                current = self._row(row[0]) if row is not None else None
+                if current is not None and current["heartbeat_at"] < now - ABANDONED_AFTER_S:
+                    _abandon(current, now)
+                    self._write(current)
+                    current = None
+                if current is None:
+                    self._conn.execute(
+                        "INSERT INTO analysis_jobs (job_id, key, status, stages, heartbeat_at) VALUES (?, ?, ?, ?, ?)",
+                        (job["job_id"], job["key"], job["status"], orjson.dumps(job["stages"]), now),
+                    )
+                    current = job
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO analysis_job_owners (job_id, user_id) VALUES (?, ?)",
+                    (current["job_id"], user_id),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return _public(current)
+
+    def _update(self, job_id: str, fields: Dict[str, Any]) -> None:
+        result = orjson.dumps(fields["result"], option=orjson.OPT_SERIALIZE_NUMPY) if fields.get("result") is not None else None
+        with self._lock:
+            self._conn.execute(
+                "UPDATE analysis_jobs SET status = ?, stages = ?, result = ?, error = ?, heartbeat_at = ?, "
+                "finished_at = ? WHERE job_id = ?",
+                (
+                    fields["status"], orjson.dumps(fields["stages"]), result, fields["error"], time.time(),
+                    fields["finished_at"], job_id,
+                ),
+            )
+
+    def _heartbeat(self, job_ids: List[str]) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE analysis_jobs SET heartbeat_at = ? WHERE job_id = ?", [(now, job_id) for job_id in job_ids]
+            )
+
+    def _get(self, job_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            owned = self._conn.execute(
+                "SELECT 1 FROM analysis_job_owners WHERE job_id = ? AND user_id = ?", (job_id, user_id)
+            ).fetchone()
+            job = self._row(job_id) if owned is not None else None
+            if job is None:
+                return None
+            now = time.time()
+            if job["finished_at"] is None and job["heartbeat_at"] < now - ABANDONED_AFTER_S:
+                _abandon(job, now)
+                self._write(job)
+        return _public(job)
+
+    def _prune(self, before: float) -> None:
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM analysis_job_owners WHERE job_id IN "
+                "(SELECT job_id FROM analysis_jobs WHERE finished_at < ?)",
+                (before,),
+            )
+            self._conn.execute("DELETE FROM analysis_jobs WHERE finished_at < ?", (before,))
+
+    async def create(self, job: Dict[str, Any], user_id: str) -> Dict[str, Any]:
+        return await asyncio.to_thread(self._create, job, user_id)
+
+    async def update(self, job_id: str, fields: Dict[str, Any]) -> None:
+        await asyncio.to_thread(self._update, job_id, fields)
+
+    async def heartbeat(self, job_ids: List[str]) -> None:
+        await asyncio.to_thread(self._heartbeat, job_ids)
+
+    async def get(self, job_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self._get, job_id, user_id)
+
+    async def prune(self, before: float) -> None:
+        await asyncio.to_thread(self._prune, before)
+
+def create_job_store():
+    if settings.ANALYSIS_JOB_BACKEND == "sqlite":
+        return SqliteJobStore()
+    return MemoryJobStore()
+
+class AnalysisJobManager:
+    """Runs product analyses on a pool of background workers.
+
+    Submitting the same (URL, pages, model) while a job for it is queued or
+    running returns the existing job instead of starting another one.
+    Finished jobs are kept for ``job_ttl_s`` seconds.
+
+    Each job runs in the process that queued it. Its progress is written
+    to the job store, so with the SQLite store any worker can report it.
+    """
+
+    def __init__(
+        self,
+        workers: int = settings.ANALYSIS_WORKERS,
+        job_ttl_s: int = settings.ANALYSIS_JOB_TTL_S,
+        store=None,
+    ):
+        self.workers = max(1, workers)
+        self.job_ttl_s = job_ttl_s
+        self.store = store if store is not None else create_job_store()
+        # Jobs queued or running in this process, until their final state is stored
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        # Jobs whose latest state has not been stored yet, in the order they changed
+        self._dirty: Dict[str, None] = {}
+        self._changed: Optional[asyncio.Event] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._writer: Optional[asyncio.Task] = None
+
+    @property
+    def started(self) -> bool:
+        return bool(self._tasks)
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def start(self) -> None:
+        if self.started:
+            return
+        self._queue = asyncio.Queue()
+        self._changed = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._writer = asyncio.create_task(self._write_loop())
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._writer is not None:
+            self._writer.cancel()
+            await asyncio.gather(self._writer, return_exceptions=True)
+            self._writer = None
+        # Cancelled jobs were marked failed; store that before exiting
+        await self._flush()
+
+    async def submit(self, url: str, pages: int, model: str, user_id: str) -> Dict[str, Any]:
+        if not self.started:
+            await self.start()
+        await self.store.prune(time.time() - self.job_ttl_s)
+
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "status": "queued",
+            "stages": {stage: "pending" for stage in STAGES},
+            "result": None,
+            "error": None,
+            "key": f"{normalize_url(url)}|{pages}|{model}",
+            "url": str(url),
+            "pages": pages,
+            "model": model,
+            "finished_at": None,
+        }
+        current = await self.store.create(job, user_id)
+        if current["job_id"] == job["job_id"]:
+            self._jobs[job["job_id"]] = job
+            self._queue.put_nowait(job["job_id"])
+        return current
+
+    async def get(self, job_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+        """Return the job if it exists and ``user_id`` submitted it."""
+        return await self.store.get(job_id, user_id)
+
+    def _mark(self, job_id: str) -> None:
+        self._dirty[job_id] = None
+        self._changed.set()
+
+    async def _flush(self) -> None:
+        while self._dirty:
+            job_id = next(iter(self._dirty))
+            del self._dirty[job_id]
+            job = self._jobs.get(job_id)
+            if job is None:
+                continue
+            fields = {
+                "status": job["status"], "stages": dict(job["stages"]), "result": job["result"],
+                "error": job["error"], "finished_at": job["finished_at"],
+            }
+            try:
+                await self.store.update(job_id, fields)
+            except Exception as e:
+                print(f"Failed to store analysis job {job_id}: {str(e)}")
+                traceback.print_exc()
+                # Retried with the next change or heartbeat
+                self._dirty[job_id] = None
+                return
+            if fields["finished_at"] is not None:
+                del self._jobs[job_id]
+
+    async def _write_loop(self) -> None:
+        # One writer per process stores changes in order, coalescing those made while a write is in progress
+        beat_at = time.monotonic()
+        while True:
+            try:
+                await asyncio.wait_for(self._changed.wait(), HEARTBEAT_S)
+            except asyncio.TimeoutError:
+                pass
+            self._changed.clear()
+            await self._flush()
+            if self._jobs and time.monotonic() - beat_at >= HEARTBEAT_S:
+                beat_at = time.monotonic()
+                try:
+                    await self.store.heartbeat(list(self._jobs))
+                except Exception as e:
+                    print(f"Failed to refresh analysis jobs: {str(e)}")
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            job = self._jobs.get(job_id)
+            if job is None:
+                continue
+
+            def on_stage(stage: str, state: str) -> None:
+                job["stages"][stage] = state
+                self._mark(job_id)
+
+            job["status"] = "running"
+            self._mark(job_id)
+            try:
+                # The worker pool already bounds jobs, so they queue for admission instead of being rejected
+                job["result"] = await run_analysis(
+                    job["url"], job["pages"], job["model"], on_stage=on_stage, bounded_wait=False
+                )
+                job["status"] = "completed"
+            except asyncio.CancelledError:
+                job["status"] = "failed"
+                job["error"] = "Job cancelled"
+                raise
+            except Exception as e:
+                print(f"Analysis job {job_id} failed: {str(e)}")
+                traceback.print_exc()
+                job["status"] = "failed"
+                job["error"] = str(e)
+                for stage, state in job["stages"].items():
+                    if state == "running":
+                        job["stages"][stage] = "failed"
+            finally:
+                job["finished_at"] = time.time()
+                self._mark(job_id)
+
+analysis_jobs = AnalysisJobManager()
+track_queue("analysis_jobs", lambda: analysis_jobs.queue_depth)
@@ -0,0 +1,78 @@
+from typing import Any, Dict, List
+from app.core.config import settings
+from app.services.model_registry import model_registry, available_backend
+from app.services.bias_detector import BiasDetector
+import argparse
+import json
+import sys
+
+SAMPLE_REVIEWS = [
+    "Works exactly as described and the battery easily lasts a full day of heavy use.",
+    "Stopped charging after two weeks. Support never answered my emails. Do not buy.",
+    "BEST PURCHASE EVER!!! Life-changing, everyone needs one of these right now!!!",
+    "It's fine. Nothing special, but it does the job for the price.",
+    "The fabric feels cheap and the stitching came apart on the first wash.",
+    "Honestly I expected more given the reviews, though delivery was quick.",
+    "Perfect fit, great colour, and it arrived a day early. Would order again.",
+    "Complete garbage, a total scam. Waste of money.",
+]
+
+def _sentiment_scores(model_name: str, backend: str, texts: List[str]) -> List[Dict[str, float]]:
+    classifier = model_registry.get("sentiment-analysis", model_name, backend)
+    outputs = classifier(texts, truncation=True, top_k=None)
+    return [{item["label"]: item["score"] for item in output} for output in outputs]
+
+def _bias_scores(model_name: str, backend: str, texts: List[str]) -> List[Dict[str, float]]:
+    return BiasDetector(model_name=model_name, backend=backend).score(texts)
+
+def check_parity(task: str, model_name: str, backend: str, texts: List[str] = SAMPLE_REVIEWS) -> Dict[str, Any]:
+    """Compare a backend's scores with fp32 on the same texts.
+
+    ``task`` is "sentiment" or "bias". Passes when the top label agrees on at
+    least PARITY_MIN_AGREEMENT of the texts and no label score moves by more
+    than PARITY_MAX_SCORE_DIFF.
+    """
+    score = _sentiment_scores if task == "sentiment" else _bias_scores
+    reference = score(model_name, "fp32", texts)
+    candidate = score(model_name, backend, texts)
+
+    agreements = 0
+    diffs = []
+    for expected, actual in zip(reference, candidate):
+        agreements += max(expected, key=expected.get) == max(actual, key=actual.get)
+        diffs.extend(abs(expected[label] - actual.get(label, 0.0)) for label in expected)
+
+    agreement = agreements / len(texts) if texts else 1.0
+    max_diff = max(diffs, default=0.0)
+    return {
+        "task": task,
+        "model": model_name,
+        # The backend that actually ran, which is fp32 when the requested one is unavailable
+        "backend": available_backend(backend),
+        "texts": len(texts),
+        "top_label_agreement": agreement,
+        "max_score_diff": max_diff,
+        "mean_score_diff": sum(diffs) / len(diffs) if diffs else 0.0,
+        "passed": agreement >= settings.PARITY_MIN_AGREEMENT and max_diff <= settings.PARITY_MAX_SCORE_DIFF,
+    }
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Check a reduced-precision backend against fp32 outputs.")
+    parser.add_argument("task", choices=["sentiment", "bias"])
+    parser.add_argument("backend", choices=["int8", "onnx"])
+    parser.add_argument("--model", help="Model name (defaults to the configured model for the task)")
+    parser.add_argument("--texts", help="File with one review per line (defaults to built-in samples)")
+    args = parser.parse_args()
+
+    model_name = args.model or (settings.SENTIMENT_MODEL if args.task == "sentiment" else settings.BIAS_MODEL)
+    texts = SAMPLE_REVIEWS
+    if args.texts:
+        with open(args.texts, encoding="utf-8") as f:
+            texts = [line.strip() for line in f if line.strip()]
+
+    report = check_parity(args.task, model_name, args.backend, texts)
+    print(json.dumps(report, indent=2))
+    return 0 if report["passed"] else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+from typing import Dict, List, Optional
+from app.core.config import settings
+from app.services.model_registry import model_registry
+from app.services.text_prep import aggregate_windows, forward_logits, model_inputs, softmax, tokenize_windows
+
+BIAS_LABELS = ["exaggeration", "subjectivity", "overly emotional", "neutral"]
+HYPOTHESIS_TEMPLATE = "This example is {}."
+
+class BiasDetector:
+    """Batched zero-shot bias classification over a whole review set.
+
+    Produces the same scores as calling the zero-shot pipeline once per
+    review, but runs every (review, label) pair through the NLI model in
+    length-bucketed batches and encodes the label hypotheses only once.
+    """
+
+    def __init__(
+        self,
+        model_name: str = settings.BIAS_MODEL,
+        labels: List[str] = BIAS_LABELS,
+        batch_size: int = settings.BIAS_BATCH_SIZE,
+        backend: Optional[str] = None,
+    ):
+        self.model_name = model_name
+        self.backend = backend
+        self.labels = list(labels)
+        self.batch_size = max(1, batch_size)
+        self._hypothesis_cache: Dict[int, List[List[int]]] = {}
+
+    @property
+    def classifier(self):
+        return model_registry.get("zero-shot-classification", self.model_name, self.backend)
+
+    def _hypothesis_ids(self, tokenizer) -> List[List[int]]:
+        # Keyed by tokenizer identity so a reloaded model gets fresh encodings
+        key = id(tokenizer)
+        if key not in self._hypothesis_cache:
+            self._hypothesis_cache = {key: [
+                tokenizer.encode(HYPOTHESIS_TEMPLATE.format(label), add_special_tokens=False)
+                for label in self.labels
+            ]}
+        return self._hypothesis_cache[key]
+
+    @staticmethod
+    def _entailment_id(model) -> int:
+        for label, ind in model.config.label2id.items():
+            if label.lower().startswith("entail"):
+                return ind
+        return -1
+
+    def score(self, texts: List[str]) -> List[Dict[str, float]]:
+        """Return a label -> score dict per text, ordered by descending score."""
+        if not texts:
+            return []
+
+        classifier = self.classifier
+        tokenizer = classifier.tokenizer
+        entailment_id = self._entailment_id(classifier.model)
+
+        # Premises are tokenized once and windowed so that every hypothesis still fits
+        hypotheses = self._hypothesis_ids(tokenizer)
+        windows, owners = tokenize_windows(classifier, texts, reserved=max(map(len, hypotheses)))
+        sequences = [
+            model_inputs(tokenizer, window, hypothesis)
+            for window in windows
+            for hypothesis in hypotheses
+        ]
+        entail_logits = forward_logits(classifier, sequences, self.batch_size)[:, entailment_id]
+
+        # Softmax over labels per window, as the zero-shot pipeline does for single-label
+        # scoring, then average the windows of each review
+        window_scores = softmax(entail_logits.reshape(len(windows), len(self.labels)))
+        scores = aggregate_windows(window_scores, owners, [max(1, len(window)) for window in windows], len(texts))
+
+        results = []
+        for row in scores:
+            order = list(reversed(row.argsort()))
+            results.append({self.labels[k]: row[k].item() for k in order})
+        return results
+
+_detectors: Dict[str, BiasDetector] = {}
+
+def get_bias_detector(model_name: str = settings.BIAS_MODEL) -> BiasDetector:
+    """Return the shared detector for a model so hypothesis encodings are reused across requests."""
+    if model_name not in _detectors:
+        _detectors[model_name] = BiasDetector(model_name=model_name)
+    return _detectors[model_name]
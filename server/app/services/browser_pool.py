@@ -0,0 +1,108 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional
+from playwright.async_api import async_playwright, Browser, BrowserContext, Playwright
+from app.core.config import settings
+import asyncio
+
+class BrowserPool:
+    """Long-lived Chromium shared by all scrapes.
+
+    Hands out isolated browser contexts, caps how many are open at once and
+    relaunches the browser after ``max_uses`` contexts or when it disconnects.
+    A retired browser is closed once its last context has been released.
+    """
+
+    def __init__(
+        self,
+        max_contexts: int = settings.BROWSER_MAX_CONTEXTS,
+        max_uses: int = settings.BROWSER_MAX_USES,
+    ):
+        self.max_contexts = max(1, max_contexts)
+        self.max_uses = max(1, max_uses)
+        self._playwright: Optional[Playwright] = None
+        self._browser: Optional[Browser] = None
+        self._uses = 0
+        self._active: Dict[Browser, int] = {}
+        self._semaphore = asyncio.Semaphore(self.max_contexts)
+        self._lock = asyncio.Lock()
+
+    @property
+    def started(self) -> bool:
+        return self._playwright is not None
+
+    async def start(self) -> None:
+        async with self._lock:
+            if self.started:
+                return
+            self._playwright = await async_playwright().start()
+            await self._launch()
+
+    async def stop(self) -> None:
+        async with self._lock:
+            if not self.started:
+                return
+            browsers = set(self._active) | ({self._browser} if self._browser else set())
+            for browser in browsers:
+                try:
+                    await browser.close()
+                except Exception as e:
+                    print(f"Error closing browser: {str(e)}")
+            self._active.clear()
+            self._browser = None
+            await self._playwright.stop()
+            self._playwright = None
+
+    async def _launch(self) -> None:
+        """Launch a fresh browser. Caller holds the lock."""
+        self._browser = await self._playwright.chromium.launch(headless=True)
+        self._active[self._browser] = 0
+        self._uses = 0
+
+    async def _retire(self, browser: Browser) -> None:
+        """Close a browser that is no longer current once nothing uses it. Caller holds the lock."""
+        if browser is self._browser or self._active.get(browser, 0) > 0:
+            return
+        self._active.pop(browser, None)
+        try:
+            await browser.close()
+        except Exception as e:
+            print(f"Error closing retired browser: {str(e)}")
+
+    async def _checkout(self) -> Browser:
+        async with self._lock:
+            if self._browser is None or not self._browser.is_connected() or self._uses >= self.max_uses:
+                previous = self._browser
+                await self._launch()
+                if previous is not None:
+                    await self._retire(previous)
+            self._uses += 1
+            self._active[self._browser] += 1
+            return self._browser
+
+    async def _checkin(self, browser: Browser) -> None:
+        async with self._lock:
+            if browser in self._active:
+                self._active[browser] -= 1
+                await self._retire(browser)
+
+    @asynccontextmanager
+    async def context(self) -> AsyncIterator[BrowserContext]:
+        """Yield an isolated browser context, waiting if the pool is at capacity."""
+        if not self.started:
+            await self.start()
+
+        async with self._semaphore:
+            browser = await self._checkout()
+            context = None
+            try:
+                context = await browser.new_context()
+                yield context
+            finally:
+                if context is not None:
+                    try:
+                        await context.close()
+                    except Exception as e:
+                        print(f"Error closing browser context: {str(e)}")
+                await self._checkin(browser)
+
+browser_pool = BrowserPool()
@@ -0,0 +1,85 @@
+from typing import Any, Dict, List, Optional, Tuple
+from fastapi.responses import Response
+from app.core.config import settings
+from app.services.bias_detector import BIAS_LABELS
+import gzip
+import orjson
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPACT_MEDIA_TYPE = "application/vnd.surfmarc.columnar+json"
+COMPACT_FORMAT = "columnar/v1"
+
+def wants_compact(format: Optional[str], accept: Optional[str]) -> bool:
+    """Compact output is opt-in through ``?format=compact`` or the columnar media type in Accept."""
+    return format == "compact" or (accept is not None and COMPACT_MEDIA_TYPE in accept)
+
+def to_columnar(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Columnar view of a run_analysis result with each review text stored once.
+
+    Row ``i`` of every column belongs to ``reviews[i]``; bias scores are listed
+    in the order of ``bias.labels``.
+    """
+    rows = result["product_reviews"]
+    bias_labels = list(BIAS_LABELS)
+    for row in rows:
+        for label in row.get("bias_scores") or {}:
+            if label not in bias_labels:
+                bias_labels.append(label)
+
+    sentiment_labels: List[Optional[str]] = []
+    sentiment_scores: List[Optional[float]] = []
+    for row in rows:
+        sentiment = (row.get("sentiment") or {}).get("sentiment") or {}
+        sentiment_labels.append(sentiment.get("label"))
+        sentiment_scores.append(sentiment.get("score"))
+
+    return {
+        "format": COMPACT_FORMAT,
+        "product_id": result.get("product_id"),
+        "count": len(rows),
+        "reviews": [row.get("product_review", "") for row in rows],
+        "ratings": [row.get("rating", 0) for row in rows],
+        "sentiment": {"labels": sentiment_labels, "scores": sentiment_scores},
+        "bias": {
+            "labels": bias_labels,
+            "scores": [
+                [(row.get("bias_scores") or {}).get(label) for label in bias_labels]
+                for row in rows
+            ],
+        },
+        "credibility": [row.get("credibility_score", 0) for row in rows],
+    }
+
+def _accepted_encodings(accept_encoding: str) -> set:
+    accepted = set()
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        quality = params.strip().lower()
+        if quality.startswith("q=") and quality[2:].strip() in ("0", "0.0", "0.00", "0.000"):
+            continue
+        accepted.add(name.strip().lower())
+    return accepted
+
+def encode(payload: Dict[str, Any], accept_encoding: str = "") -> Tuple[bytes, Optional[str]]:
+    """Serialize with orjson and compress with brotli or gzip when the client accepts it."""
+    body = orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+    if len(body) < settings.COMPACT_MIN_COMPRESS_BYTES:
+        return body, None
+
+    encodings = _accepted_encodings(accept_encoding)
+    if brotli is not None and "br" in encodings:
+        return brotli.compress(body, quality=settings.COMPACT_BROTLI_QUALITY), "br"
+    if "gzip" in encodings:
+        return gzip.compress(body, compresslevel=settings.COMPACT_GZIP_LEVEL), "gzip"
+    return body, None
+
+def compact_response(result: Dict[str, Any], accept_encoding: str = "") -> Response:
+    body, encoding = encode(to_columnar(result), accept_encoding)
+    headers = {"Vary": "Accept, Accept-Encoding"}
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type=COMPACT_MEDIA_TYPE, headers=headers)
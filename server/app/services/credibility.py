@@ -0,0 +1,213 @@
+from collections import Counter
+from typing import List, Optional, Tuple
+import numpy as np
+import re
+
+TERMS = r'BUY|SCAM|FAKE|BEST|AMAZING|PERFECT|MUST-HAVE|LIFE-CHANGING|WASTE OF MONEY|DO NOT BUY|GARBAGE'
+MARKETING_TERMS = re.compile(rf'\b({TERMS})\b', re.IGNORECASE)
+SHOUTING = re.compile(r'!{3,}|\?{3,}|\b[A-Z]{5,}\b')
+
+SHORT_REVIEW_WORDS = 20
+SHORT_REVIEW_PENALTY = 30
+MARKETING_PENALTY = 25
+SHOUTING_PENALTY = 20
+REPETITION_LIMIT = 3
+REPETITION_PENALTY = 20
+DUPLICATE_PENALTY = 40
+NEAR_DUPLICATE_PENALTY = 30
+SHOUTING_WORD_LENGTH = 5
+
+# ASCII reviews are scanned this many at a time, keeping the working arrays small enough to stay in cache
+ASCII_CHUNK_SIZE = 4096
+
+# Up to 8 ASCII bytes of a word packed into one integer, masked to the word's length
+WORD_MASKS = np.array([(1 << (8 * length)) - 1 for length in range(8)] + [2 ** 64 - 1], dtype=np.uint64)
+# ASCII never sets the top bit of a byte, so packed words stay below this and longer words can be numbered above it
+LONG_WORD = 1 << 63
+
+def _pack(word: str) -> int:
+    return int.from_bytes(word.encode("ascii"), "little")
+
+# Every marketing term as its words and the single character between each pair.
+# No term word is longer than 8 letters, so each one fits in a packed word.
+MARKETING_PHRASES = [
+    ([_pack(word) for word in re.findall(r'\w+', term.lower())], [ord(sep) for sep in re.findall(r'\W', term)])
+    for term in TERMS.split('|')
+]
+MARKETING_FIRST_WORDS = np.array(sorted({phrase[0] for phrase, _ in MARKETING_PHRASES}), dtype=np.uint64)
+
+def _runs(mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Start and end offsets of every run of True in ``mask``."""
+    edges = np.flatnonzero(np.diff(mask, prepend=False, append=False))
+    return edges[0::2], edges[1::2]
+
+def _packed(buffer: np.ndarray, starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """The first (at most 8) bytes of each word as one integer. ``buffer`` has 8 bytes of padding."""
+    # Overlapping unaligned view: element i is the 8 bytes starting at offset i
+    words = np.ndarray(shape=(buffer.size - 7,), dtype="<u8", buffer=buffer, strides=(1,))
+    return words[starts] & WORD_MASKS[np.minimum(lengths, 8)]
+
+def _number_words(buffer: np.ndarray, starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """Number words too long to pack so that equal words get equal numbers. ``buffer`` has 16 bytes of padding."""
+    numbers = np.empty(starts.size, dtype=np.uint64)
+    # Up to 16 bytes fit in a pair of packed words, numbered in sorted order
+    pairs = np.flatnonzero(lengths <= 16)
+    if pairs.size:
+        head = _packed(buffer, starts[pairs], lengths[pairs])
+        tail = _packed(buffer, starts[pairs] + 8, lengths[pairs] - 8)
+        order = np.lexsort((tail, head))
+        head, tail = head[order], tail[order]
+        new = np.ones(pairs.size, dtype=bool)
+        new[1:] = (head[1:] != head[:-1]) | (tail[1:] != tail[:-1])
+        numbers[pairs[order]] = np.cumsum(new)
+    # Anything longer is rare enough to number through a dict
+    rest = np.flatnonzero(lengths > 16)
+    if rest.size:
+        data = buffer.tobytes()
+        seen: dict = {}
+        numbers[rest] = pairs.size + 1 + np.fromiter(
+            (
+                seen.setdefault(data[start:start + length], len(seen))
+                for start, length in zip(starts[rest].tolist(), lengths[rest].tolist())
+            ),
+            dtype=np.uint64,
+            count=rest.size,
+        )
+    return numbers
+
+def _ascii_features(texts: List[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Word counts and marketing, shouting and repetition flags of ASCII reviews.
+
+    The reviews are joined into one byte buffer and every feature is found
+    with array operations over it. Matches exactly what the regular
+    expressions and ``str.split`` find on each review.
+    """
+    n = len(texts)
+    joined = "\n".join(texts)
+    lengths = np.fromiter(map(len, texts), dtype=np.int64, count=n)
+    starts = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(lengths + 1, out=starts[1:])
+
+    buffer = np.frombuffer(joined.encode("ascii") + bytes(16), dtype=np.uint8)
+    text = buffer[:-16]
+    upper = (buffer - ord("A")) <= 25
+    lower = buffer | (upper.view(np.uint8) << 5)
+    space = (text == ord(" ")) | ((text - ord("\t")) <= 4) | ((text - 0x1c) <= 3)
+    word = ((lower[:-16] - ord("a")) <= 25) | ((text - ord("0")) <= 9) | (text == ord("_"))
+
+    def reviews_at(positions: np.ndarray) -> np.ndarray:
+        return np.searchsorted(starts, positions, side="right") - 1
+
+    # Whitespace-separated words, as str.split sees them
+    token_starts, token_ends = _runs(~space)
+    first_token = np.searchsorted(token_starts, starts)
+    word_counts = np.diff(first_token)
+
+    token_lengths = token_ends - token_starts
+    keys = _packed(lower, token_starts, token_lengths)
+    long_tokens = np.flatnonzero(token_lengths > 8)
+    if long_tokens.size:
+        keys[long_tokens] = LONG_WORD + _number_words(lower, token_starts[long_tokens], token_lengths[long_tokens])
+
+    repeated = np.zeros(n, dtype=bool)
+    # Each review's words go in a row of a grid, one grid per power-of-two row width so padding stays under half
+    candidates = np.flatnonzero(word_counts > REPETITION_LIMIT)
+    widths = np.ceil(np.log2(word_counts[candidates])).astype(np.int64)
+    for width in np.unique(widths):
+        rows = candidates[widths == width]
+        counts = word_counts[rows]
+        offsets = np.cumsum(counts) - counts
+        positions = np.arange(offsets[-1] + counts[-1])
+        grid = np.zeros((rows.size, 1 << width), dtype=np.uint64)
+        grid.ravel()[positions + np.repeat((np.arange(rows.size) << width) - offsets, counts)] = (
+            keys[positions + np.repeat(first_token[rows] - offsets, counts)]
+        )
+        grid.sort(axis=1)
+        # In a sorted row, a word used more than REPETITION_LIMIT times equals the one REPETITION_LIMIT places on.
+        # Packed words are never 0, so the padding does not count.
+        repeated[rows] = ((grid[:, REPETITION_LIMIT:] == grid[:, :-REPETITION_LIMIT]) & (grid[:, :-REPETITION_LIMIT] != 0)).any(axis=1)
+
+    # Runs of word characters, as \b sees them
+    word_starts, word_ends = _runs(word)
+    word_lengths = word_ends - word_starts
+    word_keys = _packed(lower, word_starts, word_lengths)
+    word_keys[word_lengths > 8] = 0
+
+    marketing = np.zeros(n, dtype=bool)
+    candidates = np.flatnonzero(np.isin(word_keys, MARKETING_FIRST_WORDS))
+    for phrase, separators in MARKETING_PHRASES:
+        at = candidates[word_keys[candidates] == phrase[0]]
+        at = at[at + len(phrase) <= word_keys.size]
+        for i, separator in enumerate(separators):
+            ends = word_ends[at + i]
+            at = at[
+                (word_starts[at + i + 1] == ends + 1) & (buffer[ends] == separator) & (word_keys[at + i + 1] == phrase[i + 1])
+            ]
+        marketing[reviews_at(word_starts[at])] = True
+
+    shouting = np.zeros(n, dtype=bool)
+    marks = np.flatnonzero((text == ord("!")) | (text == ord("?")))
+    runs_of_three = (buffer[marks + 1] == buffer[marks]) & (buffer[marks + 2] == buffer[marks])
+    shouting[reviews_at(marks[runs_of_three])] = True
+    # Narrow the long words down one letter at a time to those in capitals throughout
+    candidates = np.flatnonzero(word_lengths >= SHOUTING_WORD_LENGTH)
+    offset = 0
+    while candidates.size:
+        complete = word_lengths[candidates] <= offset
+        shouting[reviews_at(word_starts[candidates[complete]])] = True
+        candidates = candidates[~complete]
+        candidates = candidates[upper[word_starts[candidates] + offset]]
+        offset += 1
+
+    return word_counts, marketing, shouting, repeated
+
+def score_credibility(
+    texts: List[str],
+    review_counts: Optional[Counter] = None,
+    near_duplicates: Optional[List[bool]] = None,
+) -> np.ndarray:
+    """Credibility score (0-100) for each stripped, non-empty review text.
+
+    Each feature (word count, marketing terms, shouting, repetition,
+    duplicates) is gathered into an array, then the penalties are applied
+    to whole arrays at once. ASCII reviews are scanned together as one
+    buffer; any others fall back to the regular expressions, one by one.
+    """
+    n = len(texts)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    lowered = [text.lower() for text in texts]
+    if review_counts is None:
+        review_counts = Counter(lowered)
+    duplicate_counts = np.fromiter((review_counts[lower] for lower in lowered), dtype=np.int64, count=n)
+
+    word_counts = np.zeros(n, dtype=np.int64)
+    marketing = np.zeros(n, dtype=bool)
+    shouting = np.zeros(n, dtype=bool)
+    repeated = np.zeros(n, dtype=bool)
+
+    # NUL would read as padding in the packed words
+    simple = np.fromiter((text.isascii() and "\0" not in text for text in texts), dtype=bool, count=n)
+    ascii_rows = np.flatnonzero(simple)
+    for start in range(0, ascii_rows.size, ASCII_CHUNK_SIZE):
+        rows = ascii_rows[start:start + ASCII_CHUNK_SIZE]
+        word_counts[rows], marketing[rows], shouting[rows], repeated[rows] = _ascii_features([texts[i] for i in rows])
+    for i in np.flatnonzero(~simple):
+        words = lowered[i].split()
+        word_counts[i] = len(words)
+        marketing[i] = MARKETING_TERMS.search(texts[i]) is not None
+        shouting[i] = SHOUTING.search(texts[i]) is not None
+        repeated[i] = bool(words) and max(Counter(words).values()) > REPETITION_LIMIT
+
+    duplicate = duplicate_counts > 1
+    near_duplicate = np.asarray(near_duplicates, dtype=bool) if near_duplicates is not None else np.zeros(n, dtype=bool)
+
+    scores = np.full(n, 100, dtype=np.int64)
+    scores -= SHORT_REVIEW_PENALTY * (word_counts < SHORT_REVIEW_WORDS)
+    scores -= MARKETING_PENALTY * marketing
+    scores -= SHOUTING_PENALTY * shouting
+    scores -= REPETITION_PENALTY * repeated
+    scores -= DUPLICATE_PENALTY * duplicate
+    scores -= NEAR_DUPLICATE_PENALTY * (near_duplicate & ~duplicate)
+    return np.maximum(scores, 0)
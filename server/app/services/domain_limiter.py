@@ -0,0 +1,26 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict
+from urllib.parse import urlparse
+from app.core.config import settings
+import asyncio
+
+class DomainLimiter:
+    """Caps how many requests run against the same host at once."""
+
+    def __init__(self, max_concurrency: int = settings.SCRAPE_DOMAIN_CONCURRENCY):
+        self.max_concurrency = max(1, max_concurrency)
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    @staticmethod
+    def domain(url: str) -> str:
+        return urlparse(str(url)).netloc.lower()
+
+    @asynccontextmanager
+    async def limit(self, url: str) -> AsyncIterator[None]:
+        domain = self.domain(url)
+        if domain not in self._semaphores:
+            self._semaphores[domain] = asyncio.Semaphore(self.max_concurrency)
+        async with self._semaphores[domain]:
+            yield
+
+domain_limiter = DomainLimiter()
@@ -0,0 +1,59 @@
+from typing import List
+from app.core.config import settings
+from app.services.embedder import embed_texts
+import numpy as np
+
+def build_index(embeddings: np.ndarray, flat_max: int = settings.NEAR_DUPLICATE_FLAT_MAX):
+    """Exact inner-product index for small sets, HNSW graph for large ones."""
+    import faiss
+    dim = embeddings.shape[1]
+    if len(embeddings) <= flat_max:
+        index = faiss.IndexFlatIP(dim)
+    else:
+        index = faiss.IndexHNSWFlat(dim, 32, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = 80
+        index.hnsw.efSearch = 64
+    index.add(embeddings)
+    return index
+
+def _find(parents: np.ndarray, i: int) -> int:
+    while parents[i] != i:
+        parents[i] = parents[parents[i]]
+        i = parents[i]
+    return int(i)
+
+def near_duplicate_clusters(
+    texts: List[str],
+    threshold: float = settings.NEAR_DUPLICATE_THRESHOLD,
+    neighbors: int = settings.NEAR_DUPLICATE_NEIGHBORS,
+) -> List[int]:
+    """Cluster id per text; texts whose embeddings are at least ``threshold`` cosine-similar share a cluster.
+
+    Each text is only compared with its nearest ``neighbors``, so the cost grows
+    with n log n rather than n^2.
+    """
+    if not texts:
+        return []
+
+    embeddings = embed_texts(texts)
+    index = build_index(embeddings)
+    k = min(neighbors + 1, len(texts))
+    similarities, indices = index.search(embeddings, k)
+
+    parents = np.arange(len(texts))
+    for i in range(len(texts)):
+        for similarity, j in zip(similarities[i], indices[i]):
+            if j < 0 or j == i or similarity < threshold:
+                continue
+            root_i, root_j = _find(parents, i), _find(parents, int(j))
+            if root_i != root_j:
+                parents[root_j] = root_i
+    return [_find(parents, i) for i in range(len(texts))]
+
+def near_duplicate_flags(texts: List[str]) -> List[bool]:
+    """Whether each text is near-identical to some other, different text in the set."""
+    unique_texts = list(dict.fromkeys(text.strip().lower() for text in texts))
+    clusters = near_duplicate_clusters(unique_texts)
+    cluster_sizes = np.bincount(clusters, minlength=len(unique_texts)) if clusters else []
+    flagged = {text for text, cluster in zip(unique_texts, clusters) if cluster_sizes[cluster] > 1}
+    return [text.strip().lower() in flagged for text in texts]
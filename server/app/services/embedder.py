@@ -0,0 +1,41 @@
+from typing import List
+from app.core.config import settings
+from app.services.model_registry import model_registry
+import numpy as np
+
+def embed_texts(
+    texts: List[str],
+    model_name: str = settings.EMBEDDING_MODEL,
+    batch_size: int = settings.EMBEDDING_BATCH_SIZE,
+    max_length: int = 256,
+) -> np.ndarray:
+    """Mean-pooled, L2-normalized sentence embeddings as a float32 (n, dim) array.
+
+    Inner products between rows are cosine similarities.
+    """
+    import torch
+    extractor = model_registry.get("feature-extraction", model_name)
+    model, tokenizer = extractor.model, extractor.tokenizer
+    dim = model.config.hidden_size
+    if not texts:
+        return np.zeros((0, dim), dtype=np.float32)
+
+    # Sort by length so each batch pads to a similar size, then restore the order
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+    embeddings = np.zeros((len(texts), dim), dtype=np.float32)
+    with torch.inference_mode():
+        for start in range(0, len(order), batch_size):
+            indices = order[start:start + batch_size]
+            inputs = tokenizer(
+                [texts[i] for i in indices],
+                padding=True,
+                truncation=True,
+                max_length=max_length,
+                return_tensors="pt",
+            ).to(extractor.device)
+            hidden = model(**inputs).last_hidden_state
+            mask = inputs["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+            pooled = (hidden * mask).sum(1) / mask.sum(1).clamp(min=1e-9)
+            pooled = torch.nn.functional.normalize(pooled, p=2, dim=1)
+            embeddings[indices] = pooled.float().cpu().numpy()
+    return embeddings
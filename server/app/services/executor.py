@@ -0,0 +1,64 @@
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+from app.core.config import settings
+import asyncio
+import functools
+import os
+
+def torch_threads(workers: int) -> int:
+    """Intra-op threads per worker so that all workers, in every server process, together use each core once."""
+    if settings.TORCH_THREADS > 0:
+        return settings.TORCH_THREADS
+    return max(1, (os.cpu_count() or 1) // (max(1, workers) * max(1, settings.WEB_CONCURRENCY)))
+
+def configure_torch(threads: int) -> None:
+    import torch
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # Can only be set once, before any parallel work has started
+        pass
+
+class InferenceExecutor:
+    """Dedicated pool for blocking model inference, kept off the event loop.
+
+    ``INFERENCE_EXECUTOR=thread`` shares the process's models between worker
+    threads; ``process`` gives each worker its own interpreter and model copies.
+    """
+
+    def __init__(
+        self,
+        kind: str = settings.INFERENCE_EXECUTOR,
+        workers: int = settings.INFERENCE_WORKERS,
+    ):
+        self.kind = kind
+        self.workers = max(1, workers)
+        self._executor: Optional[Executor] = None
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            threads = torch_threads(self.workers)
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, initializer=configure_torch, initargs=(threads,)
+                )
+            else:
+                configure_torch(threads)
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="inference"
+                )
+        return self._executor
+
+    async def run(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run ``func`` on the pool. In process mode it must be a picklable module-level function."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+inference_executor = InferenceExecutor()
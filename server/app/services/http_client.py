@@ -0,0 +1,41 @@
+from typing import Optional
+from app.core.config import settings
+import aiohttp
+
+DEFAULT_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36"
+    ),
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+class HttpClient:
+    """Process-wide aiohttp session with a pooled connector."""
+
+    def __init__(
+        self,
+        pool_size: int = settings.HTTP_POOL_SIZE,
+        timeout_s: int = settings.HTTP_TIMEOUT_S,
+    ):
+        self.pool_size = pool_size
+        self.timeout_s = timeout_s
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size, ttl_dns_cache=300),
+                timeout=aiohttp.ClientTimeout(total=self.timeout_s),
+                headers=DEFAULT_HEADERS,
+            )
+        return self._session
+
+    async def stop(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+http_client = HttpClient()
@@ -0,0 +1,178 @@
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List
+from app.core.config import settings
+from app.services.metrics import count_cache
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# SQLite caps the number of bound parameters per statement
+SQLITE_CHUNK_SIZE = 500
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def result_key(stage: str, model_name: str, revision: str, text: str) -> str:
+    return f"{stage}|{model_name}@{revision}|{text_hash(text)}"
+
+class MemoryInferenceCache:
+    """In-process LRU of per-review results."""
+
+    def __init__(self, max_entries: int = settings.INFERENCE_CACHE_MAX_ENTRIES):
+        self.max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        hits = {}
+        with self._lock:
+            for key in keys:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    hits[key] = self._entries[key]
+        return hits
+
+    def set_many(self, values: Dict[str, Any]) -> None:
+        with self._lock:
+            for key, value in values.items():
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+class SqliteInferenceCache:
+    """Persistent per-review results with least-recently-used eviction."""
+
+    def __init__(
+        self,
+        path: str = settings.INFERENCE_CACHE_PATH,
+        max_entries: int = settings.INFERENCE_CACHE_MAX_ENTRIES,
+    ):
+        self.max_entries = max(1, max_entries)
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        os.register_at_fork(after_in_child=self._reconnect)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS inference_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS inference_cache_last_used ON inference_cache (last_used)"
+            )
+            self._conn.commit()
+            self._count = self._conn.execute("SELECT COUNT(*) FROM inference_cache").fetchone()[0]
+
+    def _reconnect(self) -> None:
+        """Give a forked worker its own connection; SQLite connections must not cross a fork.
+
+        The inherited connection is kept referenced rather than closed, since
+        closing it in the child could checkpoint or unlock on the parent's behalf.
+        """
+        self._inherited = self._conn
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """Resolve all cached keys in one query per chunk and mark them as recently used."""
+        hits = {}
+        now = time.time()
+        with self._lock:
+            for start in range(0, len(keys), SQLITE_CHUNK_SIZE):
+                chunk = keys[start:start + SQLITE_CHUNK_SIZE]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, value FROM inference_cache WHERE key IN ({placeholders})", chunk
+                ).fetchall()
+                hits.update((key, json.loads(value)) for key, value in rows)
+                if rows:
+                    self._conn.execute(
+                        f"UPDATE inference_cache SET last_used = ? WHERE key IN ({placeholders})",
+                        [now, *chunk],
+                    )
+            self._conn.commit()
+        return hits
+
+    def set_many(self, values: Dict[str, Any]) -> None:
+        if not values:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO inference_cache (key, value, last_used) VALUES (?, ?, ?)",
+                [(key, json.dumps(value), now) for key, value in values.items()],
+            )
+            # Replacements overcount; the exact count is re-read before evicting
+            self._count += len(values)
+            if self._count > self.max_entries:
+                self._count = self._conn.execute("SELECT COUNT(*) FROM inference_cache").fetchone()[0]
+                overflow = self._count - self.max_entries
+                if overflow > 0:
+                    self._conn.execute(
+                        "DELETE FROM inference_cache WHERE key IN ("
+                        "SELECT key FROM inference_cache ORDER BY last_used LIMIT ?)",
+                        (overflow,),
+                    )
+                    self._count -= overflow
+            self._conn.commit()
+
+class StageCache:
+    """View of the inference cache for one (stage, model, revision)."""
+
+    def __init__(self, backend, stage: str, model_name: str, revision: str = settings.MODEL_REVISION):
+        self.backend = backend
+        self.stage = stage
+        self.model_name = model_name
+        self.revision = revision
+
+    def lookup(self, texts: List[str]) -> Dict[int, Any]:
+        """Cached results by position in ``texts``."""
+        if self.backend is None or not texts:
+            return {}
+        keys = [result_key(self.stage, self.model_name, self.revision, text) for text in texts]
+        hits = self.backend.get_many(list(set(keys)))
+        found = {i: hits[key] for i, key in enumerate(keys) if key in hits}
+        count_cache(f"inference:{self.stage}", len(found), len(texts) - len(found))
+        return found
+
+    def store(self, texts: List[str], results: List[Any]) -> None:
+        if self.backend is None or not texts:
+            return
+        self.backend.set_many({
+            result_key(self.stage, self.model_name, self.revision, text): result
+            for text, result in zip(texts, results)
+        })
+
+    def resolve(self, texts: List[str], compute: Callable[[List[str]], List[Any]]) -> List[Any]:
+        """Results for every text, computing only the distinct cache misses."""
+        hits = self.lookup(texts)
+        misses = list(dict.fromkeys(text for i, text in enumerate(texts) if i not in hits))
+        computed = dict(zip(misses, compute(misses))) if misses else {}
+        self.store(misses, [computed[text] for text in misses])
+        return [hits[i] if i in hits else computed[text] for i, text in enumerate(texts)]
+
+    async def aresolve(self, texts: List[str], compute: Callable[[List[str]], Awaitable[List[Any]]]) -> List[Any]:
+        """Async ``resolve``; cache I/O runs off the event loop."""
+        hits = await asyncio.to_thread(self.lookup, texts)
+        misses = list(dict.fromkeys(text for i, text in enumerate(texts) if i not in hits))
+        computed = dict(zip(misses, await compute(misses))) if misses else {}
+        await asyncio.to_thread(self.store, misses, [computed[text] for text in misses])
+        return [hits[i] if i in hits else computed[text] for i, text in enumerate(texts)]
+
+def create_inference_cache():
+    if settings.INFERENCE_CACHE_BACKEND == "sqlite":
+        return SqliteInferenceCache()
+    if settings.INFERENCE_CACHE_BACKEND == "memory":
+        return MemoryInferenceCache()
+    return None
+
+inference_cache = create_inference_cache()
+
+def stage_cache(stage: str, model_name: str, revision: str = settings.MODEL_REVISION) -> StageCache:
+    return StageCache(inference_cache, stage, model_name, revision)
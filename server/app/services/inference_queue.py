@@ -0,0 +1,143 @@
+from typing import Any, Dict, List, Tuple
+from app.core.config import settings
+from app.services.model_registry import model_registry
+from app.services.executor import inference_executor
+from app.services.text_prep import classify
+from app.services.metrics import observe_batch, track_queue
+import asyncio
+import time
+
+CLASSIFICATION_TASKS = ("sentiment-analysis", "text-classification")
+
+class InferenceBatcher:
+    """Collects texts from concurrent callers and runs them through a pipeline in batches.
+
+    A batch is flushed when it reaches ``max_batch_size`` items or when the
+    oldest queued item has waited ``max_wait_ms``. Each caller gets back the
+    results for its own texts, in order.
+    """
+
+    def __init__(
+        self,
+        task: str,
+        model_name: str,
+        max_batch_size: int = settings.INFERENCE_MAX_BATCH_SIZE,
+        max_wait_ms: int = settings.INFERENCE_MAX_WAIT_MS,
+    ):
+        self.task = task
+        self.model_name = model_name
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000
+        self._queue: "asyncio.Queue[Tuple[str, asyncio.Future]]" = None
+        self._worker: asyncio.Task = None
+        self._loop: asyncio.AbstractEventLoop = None
+        # Set once a batch has run, i.e. the model loads; until then the batcher is provisional
+        self.confirmed = False
+        self.closed = False
+
+    def _ensure_worker(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+    async def submit(self, texts: List[str]) -> List[Any]:
+        """Queue texts for inference and wait for their results."""
+        if not texts:
+            return []
+        self._ensure_worker()
+        futures = []
+        for text in texts:
+            future = self._loop.create_future()
+            self._queue.put_nowait((text, future))
+            futures.append(future)
+        return list(await asyncio.gather(*futures))
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def _collect(self) -> List[Tuple[str, asyncio.Future]]:
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        # Keep up to one batch per executor worker in flight
+        slots = asyncio.Semaphore(inference_executor.workers)
+        while not (self.closed and self._queue.empty()):
+            batch = await self._collect()
+            # Drop items whose caller has already gone away, and the wake-up left by _discard
+            batch = [item for item in batch if item is not None and not item[1].done()]
+            if not batch:
+                continue
+            await slots.acquire()
+            task = self._loop.create_task(self._dispatch(batch))
+            task.add_done_callback(lambda _: slots.release())
+
+    async def _dispatch(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        texts = [text for text, _ in batch]
+        observe_batch(self.task, len(texts))
+        try:
+            results = await inference_executor.run(run_pipeline, self.task, self.model_name, texts)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            if not self.confirmed:
+                _discard(self)
+            return
+
+        if not self.confirmed:
+            _confirm(self)
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+def run_pipeline(task: str, model_name: str, texts: List[str]) -> List[Any]:
+    """Run one batch through the registry's pipeline. Module-level so process pools can pickle it."""
+    model_pipeline = model_registry.get(task, model_name)
+    if task in CLASSIFICATION_TASKS:
+        # Token-aware truncation or windowing, with length-bucketed forward passes
+        return classify(model_pipeline, texts)
+    results = model_pipeline(texts, batch_size=len(texts))
+    # Pipelines return a bare result rather than a list for single inputs
+    if len(texts) == 1 and not isinstance(results, list):
+        results = [results]
+    return results
+
+_batchers: Dict[Tuple[str, str], InferenceBatcher] = {}
+
+def get_batcher(task: str, model_name: str) -> InferenceBatcher:
+    """Return the shared batcher for a (task, model name) pair.
+
+    The model name comes from the request, so a batcher is only kept (and
+    its queue reported in /metrics) once a batch has run through it. One
+    whose first batch fails, such as for a model that does not exist, is
+    dropped after draining what is already queued.
+    """
+    key = (task, model_name)
+    if key not in _batchers:
+        _batchers[key] = InferenceBatcher(task, model_name)
+    return _batchers[key]
+
+def _confirm(batcher: InferenceBatcher) -> None:
+    batcher.confirmed = True
+    track_queue(f"inference:{batcher.task}:{batcher.model_name}", lambda: batcher.queue_depth)
+
+def _discard(batcher: InferenceBatcher) -> None:
+    batcher.closed = True
+    # Wakes the worker so it exits once the queue is drained
+    batcher._queue.put_nowait(None)
+    key = (batcher.task, batcher.model_name)
+    if _batchers.get(key) is batcher:
+        del _batchers[key]
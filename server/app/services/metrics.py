@@ -0,0 +1,172 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess, CONTENT_TYPE_LATEST
+from prometheus_client.core import GaugeMetricFamily
+from app.core.config import settings
+import asyncio
+import os
+import time
+
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+COUNT_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 4096, 16384)
+
+# How often each worker publishes its queue depths in multiprocess mode
+QUEUE_DEPTH_INTERVAL_S = 5
+
+# prometheus_client reads PROMETHEUS_MULTIPROC_DIR itself and writes every
+# metric created below to a file there, one per process
+if settings.PROMETHEUS_MULTIPROC_DIR:
+    os.makedirs(settings.PROMETHEUS_MULTIPROC_DIR, exist_ok=True)
+
+registry = CollectorRegistry()
+
+stage_duration = Histogram(
+    "surfmarc_stage_duration_seconds", "Time spent in each analysis stage",
+    ["stage"], buckets=STAGE_BUCKETS, registry=registry,
+)
+reviews_per_request = Histogram(
+    "surfmarc_reviews_per_analysis", "Reviews scraped per analysis",
+    buckets=COUNT_BUCKETS, registry=registry,
+)
+inference_batch_size = Histogram(
+    "surfmarc_inference_batch_size", "Texts per inference batch",
+    ["task"], buckets=COUNT_BUCKETS, registry=registry,
+)
+cache_requests = Counter(
+    "surfmarc_cache_requests_total", "Cache lookups by cache and result",
+    ["cache", "result"], registry=registry,
+)
+admission_rejections = Counter(
+    "surfmarc_admission_rejections_total", "Requests turned away by admission control",
+    ["limiter", "reason"], registry=registry,
+)
+
+# Per-request (stage, seconds) pairs for the Server-Timing header
+_request_timings: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("request_timings", default=None)
+
+# Queue depths summed over the live workers, for multiprocess mode
+published_queue_depth = Gauge(
+    "surfmarc_queue_depth", "Items waiting in each queue", ["queue"], registry=None, multiprocess_mode="livesum",
+)
+
+class QueueDepthCollector:
+    """Reports queue depths by calling the registered sources at scrape time.
+
+    In multiprocess mode the worker answering /metrics cannot see the other
+    workers' queues, so each one publishes its own depths periodically instead.
+    """
+
+    def __init__(self):
+        self.sources: Dict[str, Callable[[], int]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def collect(self):
+        family = GaugeMetricFamily("surfmarc_queue_depth", "Items waiting in each queue", labels=["queue"])
+        for name, source in list(self.sources.items()):
+            try:
+                family.add_metric([name], source())
+            except Exception:
+                continue
+        yield family
+
+    def start(self) -> None:
+        if settings.PROMETHEUS_MULTIPROC_DIR and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._publish())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _publish(self) -> None:
+        while True:
+            for name, source in list(self.sources.items()):
+                try:
+                    published_queue_depth.labels(name).set(source())
+                except Exception:
+                    continue
+            await asyncio.sleep(QUEUE_DEPTH_INTERVAL_S)
+
+queue_depths = QueueDepthCollector()
+registry.register(queue_depths)
+
+def track_queue(name: str, source: Callable[[], int]) -> None:
+    queue_depths.sources[name] = source
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    """Record how long the block takes as ``stage``, for /metrics and the request's Server-Timing."""
+    if not settings.METRICS_ENABLED:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        stage_duration.labels(stage).observe(elapsed)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.append((stage, elapsed))
+
+def observe_reviews(count: int) -> None:
+    if settings.METRICS_ENABLED:
+        reviews_per_request.observe(count)
+
+def observe_batch(task: str, size: int) -> None:
+    if settings.METRICS_ENABLED:
+        inference_batch_size.labels(task).observe(size)
+
+def count_cache(cache: str, hits: int, misses: int) -> None:
+    if settings.METRICS_ENABLED:
+        if hits:
+            cache_requests.labels(cache, "hit").inc(hits)
+        if misses:
+            cache_requests.labels(cache, "miss").inc(misses)
+
+def count_rejection(limiter: str, reason: str) -> None:
+    if settings.METRICS_ENABLED:
+        admission_rejections.labels(limiter, reason).inc()
+
+def server_timing(timings: List[Tuple[str, float]]) -> str:
+    return ", ".join(f"{stage};dur={elapsed * 1000:.1f}" for stage, elapsed in timings)
+
+class ServerTimingMiddleware:
+    """Adds a Server-Timing header with the stages timed while handling the request.
+
+    Plain ASGI rather than BaseHTTPMiddleware so streaming responses are not buffered.
+    Streamed stages finish after the headers are sent and only reach /metrics.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        timings: List[Tuple[str, float]] = []
+        token = _request_timings.set(timings)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start" and timings:
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", server_timing(timings).encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_timings.reset(token)
+
+def render_metrics() -> Tuple[bytes, str]:
+    if settings.PROMETHEUS_MULTIPROC_DIR:
+        # Every worker's files, merged; gauges of exited workers are dropped by gunicorn's child_exit hook
+        merged = CollectorRegistry()
+        multiprocess.MultiProcessCollector(merged)
+        return generate_latest(merged), CONTENT_TYPE_LATEST
+    return generate_latest(registry), CONTENT_TYPE_LATEST
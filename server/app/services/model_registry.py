@@ -0,0 +1,205 @@
+from collections import OrderedDict
+from functools import lru_cache
+from importlib.util import find_spec
+from typing import Any, Dict, Optional, Tuple
+from app.core.config import settings
+import os
+import threading
+import traceback
+
+# torch and transformers are imported on first model load, not at import time,
+# so the API can start serving before the heavy libraries are in memory
+
+BACKENDS = ("fp32", "int8", "onnx")
+
+@lru_cache(maxsize=None)
+def available_backend(backend: str) -> str:
+    """The backend a model actually loads with when ``backend`` is asked for.
+
+    ONNX falls back to fp32 when ONNX Runtime is not installed, and int8 when
+    running on GPU. Revisions and registry keys use the result, so results
+    computed in fp32 are never cached under a reduced-precision revision.
+    """
+    if backend not in BACKENDS:
+        print(f"Unknown inference backend {backend!r}, using fp32")
+        return "fp32"
+    if backend == "onnx" and (find_spec("optimum") is None or find_spec("onnxruntime") is None):
+        print("ONNX backend needs optimum[onnxruntime]; using fp32")
+        return "fp32"
+    if backend == "int8" and ModelRegistry._device() != -1:
+        print("int8 backend is CPU-only; using fp32 on GPU")
+        return "fp32"
+    return backend
+
+def backend_for(model_name: str) -> str:
+    """Inference backend a model runs with; models without a setting run in fp32."""
+    backends = {
+        settings.SENTIMENT_MODEL: settings.SENTIMENT_BACKEND,
+        settings.BIAS_MODEL: settings.BIAS_BACKEND,
+    }
+    return available_backend(backends.get(model_name, "fp32"))
+
+def model_revision(model_name: str, backend: Optional[str] = None) -> str:
+    """Revision tag for cached results; reduced-precision backends get their own so outputs never mix."""
+    backend = available_backend(backend) if backend else backend_for(model_name)
+    if backend == "fp32":
+        return settings.MODEL_REVISION
+    return f"{settings.MODEL_REVISION}+{backend}"
+
+def _quantize(model_pipeline: Any) -> Any:
+    """Dynamic int8 quantization of the Linear layers; weights are int8, activations stay float."""
+    import torch
+    model_pipeline.model = torch.ao.quantization.quantize_dynamic(
+        model_pipeline.model, {torch.nn.Linear}, dtype=torch.qint8
+    )
+    return model_pipeline
+
+def _onnx_pipeline(task: str, model_name: str) -> Any:
+    """Pipeline over an ONNX Runtime session, exporting the model on first use."""
+    from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTModelForSequenceClassification
+    from transformers import AutoTokenizer, pipeline
+
+    model_class = ORTModelForFeatureExtraction if task == "feature-extraction" else ORTModelForSequenceClassification
+    export_dir = os.path.join(
+        settings.ONNX_EXPORT_DIR, f"{model_name.replace('/', '--')}@{settings.MODEL_REVISION}"
+    )
+    if os.path.isdir(export_dir):
+        model = model_class.from_pretrained(export_dir)
+        tokenizer = AutoTokenizer.from_pretrained(export_dir)
+    else:
+        model = model_class.from_pretrained(model_name, revision=settings.MODEL_REVISION, export=True)
+        tokenizer = AutoTokenizer.from_pretrained(model_name, revision=settings.MODEL_REVISION)
+        model.save_pretrained(export_dir)
+        tokenizer.save_pretrained(export_dir)
+    return pipeline(task, model=model, tokenizer=tokenizer)
+
+def _freeze(model_pipeline: Any) -> Any:
+    """Inference only: eval mode and no gradients, so weights are never written after loading.
+
+    Untouched weights stay shared between workers forked after a preload.
+    """
+    model = model_pipeline.model
+    model.eval()
+    for parameter in model.parameters():
+        parameter.requires_grad_(False)
+    return model_pipeline
+
+class ModelRegistry:
+    """Process-wide cache of transformers pipelines keyed by (task, model name).
+
+    Pipelines are loaded once and shared across requests. When the estimated
+    size of the loaded models exceeds the memory budget, the least recently
+    used pipelines are dropped.
+    """
+
+    def __init__(self, max_mb: int = settings.MODEL_CACHE_MAX_MB):
+        self.max_bytes = max_mb * 1024 * 1024
+        self._models: "OrderedDict[Tuple[str, str, str], Any]" = OrderedDict()
+        self._sizes: Dict[Tuple[str, str, str], int] = {}
+        self._lock = threading.Lock()
+        self._load_locks: Dict[Tuple[str, str, str], threading.Lock] = {}
+
+    @staticmethod
+    def _device() -> int:
+        import torch
+        return 0 if torch.cuda.is_available() else -1
+
+    @staticmethod
+    def _estimate_size(model_pipeline: Any) -> int:
+        import torch
+        model = getattr(model_pipeline, "model", None)
+        if model is None:
+            return 0
+        if not isinstance(model, torch.nn.Module):
+            # ONNX Runtime session: the exported graph is roughly what it holds in memory
+            export_dir = getattr(model, "model_save_dir", None)
+            if export_dir is None or not os.path.isdir(export_dir):
+                return 0
+            return sum(
+                os.path.getsize(os.path.join(export_dir, name))
+                for name in os.listdir(export_dir) if name.endswith((".onnx", ".onnx_data"))
+            )
+        size = sum(p.numel() * p.element_size() for p in model.parameters())
+        # Dynamically quantized Linear layers keep packed int8 weights outside parameters()
+        for module in model.modules():
+            if isinstance(module, torch.ao.nn.quantized.dynamic.Linear):
+                weight = module.weight()
+                size += weight.numel() * weight.element_size()
+        return size
+
+    def _load(self, task: str, model_name: str, backend: str) -> Any:
+        if backend == "onnx":
+            return _onnx_pipeline(task, model_name)
+
+        from transformers import pipeline
+        model_pipeline = pipeline(
+            task,
+            model=model_name,
+            revision=settings.MODEL_REVISION,
+            device=self._device(),
+        )
+        if backend == "int8":
+            return _freeze(_quantize(model_pipeline))
+        return _freeze(model_pipeline)
+
+    def get(self, task: str, model_name: str, backend: Optional[str] = None) -> Any:
+        """Return the pipeline for (task, model_name), loading it on first use.
+
+        ``backend`` defaults to the model's configured backend (see ``backend_for``).
+        A backend that cannot run here is replaced by fp32 (see ``available_backend``).
+        """
+        backend = available_backend(backend) if backend else backend_for(model_name)
+        key = (task, model_name, backend)
+        with self._lock:
+            if key in self._models:
+                self._models.move_to_end(key)
+                return self._models[key]
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        # Load outside the registry lock so other models stay available,
+        # but only once per key even if several requests race for it.
+        with load_lock:
+            with self._lock:
+                if key in self._models:
+                    self._models.move_to_end(key)
+                    return self._models[key]
+            try:
+                model_pipeline = self._load(task, model_name, backend)
+            except Exception as e:
+                # Model names come from requests, so failed names must not accumulate locks
+                with self._lock:
+                    self._load_locks.pop(key, None)
+                raise Exception(f"Failed to load {task} model {model_name} ({backend}): {str(e)}\n{traceback.format_exc()}")
+
+            with self._lock:
+                self._models[key] = model_pipeline
+                self._sizes[key] = self._estimate_size(model_pipeline)
+                self._evict(keep=key)
+                self._load_locks.pop(key, None)
+            return model_pipeline
+
+    def _evict(self, keep: Tuple[str, str, str]) -> None:
+        """Drop least recently used pipelines until the budget is met. Caller holds the lock."""
+        while sum(self._sizes.values()) > self.max_bytes and len(self._models) > 1:
+            oldest = next(iter(self._models))
+            if oldest == keep:
+                break
+            self._models.pop(oldest)
+            self._sizes.pop(oldest, None)
+            print(f"Evicted model {oldest[1]} ({oldest[0]}, {oldest[2]}) from registry")
+
+    def evict(self, task: str, model_name: str, backend: Optional[str] = None) -> None:
+        key = (task, model_name, available_backend(backend) if backend else backend_for(model_name))
+        with self._lock:
+            self._models.pop(key, None)
+            self._sizes.pop(key, None)
+
+    def loaded(self) -> Dict[str, int]:
+        """Loaded models and their estimated sizes in bytes, oldest first."""
+        with self._lock:
+            return {
+                f"{task}:{name}:{backend}": self._sizes.get((task, name, backend), 0)
+                for task, name, backend in self._models
+            }
+
+model_registry = ModelRegistry()
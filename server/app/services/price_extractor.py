@@ -0,0 +1,71 @@
+from typing import Optional, Tuple
+from bs4 import BeautifulSoup
+import json
+import re
+
+# Tried in order; the first that yields a price wins
+PRICE_SELECTORS = (
+    "#corePrice_feature_div .a-price .a-offscreen",
+    "#corePriceDisplay_desktop_feature_div .a-price .a-offscreen",
+    "#priceblock_dealprice",
+    "#priceblock_ourprice",
+    ".a-price .a-offscreen",
+    "[itemprop=price]",
+    ".price",
+)
+CURRENCY_SYMBOLS = {"$": "USD", "£": "GBP", "€": "EUR", "¥": "JPY", "₹": "INR", "C$": "CAD", "A$": "AUD"}
+PRICE_PATTERN = re.compile(r"(\d+(?:[,.\s]\d{3})*(?:[.,]\d{1,2})?)(?!\d)")
+
+def parse_amount(text: str) -> Optional[float]:
+    """Parse "$1,299.99", "1.299,99 €" or "1299" into a float."""
+    match = PRICE_PATTERN.search(text.replace("\xa0", " "))
+    if not match:
+        return None
+    number = match.group(1).replace(" ", "")
+    # The last separator followed by one or two digits is the decimal point
+    decimal = re.search(r"[.,](\d{1,2})$", number)
+    if decimal:
+        whole = re.sub(r"[.,]", "", number[:decimal.start()])
+        number = f"{whole}.{decimal.group(1)}"
+    else:
+        number = re.sub(r"[.,]", "", number)
+    try:
+        return float(number)
+    except ValueError:
+        return None
+
+def parse_currency(text: str) -> Optional[str]:
+    for symbol in sorted(CURRENCY_SYMBOLS, key=len, reverse=True):
+        if symbol in text:
+            return CURRENCY_SYMBOLS[symbol]
+    code = re.search(r"\b([A-Z]{3})\b", text)
+    return code.group(1) if code else None
+
+def _json_ld_price(soup: BeautifulSoup) -> Optional[Tuple[float, Optional[str]]]:
+    for script in soup.select('script[type="application/ld+json"]'):
+        try:
+            data = json.loads(script.string or "")
+        except ValueError:
+            continue
+        for item in data if isinstance(data, list) else [data]:
+            offers = item.get("offers") if isinstance(item, dict) else None
+            if isinstance(offers, list):
+                offers = offers[0] if offers else None
+            if isinstance(offers, dict) and offers.get("price") is not None:
+                price = parse_amount(str(offers["price"]))
+                if price is not None:
+                    return price, offers.get("priceCurrency")
+    return None
+
+def parse_price(html: str) -> Optional[Tuple[float, Optional[str]]]:
+    """Current (price, currency) of a product page, or None when no price is found."""
+    soup = BeautifulSoup(html, "lxml")
+    for selector in PRICE_SELECTORS:
+        node = soup.select_one(selector)
+        if node is None:
+            continue
+        text = node.get("content") or node.get_text(" ", strip=True)
+        price = parse_amount(text)
+        if price is not None:
+            return price, parse_currency(text)
+    return _json_ld_price(soup)
@@ -0,0 +1,362 @@
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+from app.core.config import settings
+from app.db.price_store import price_store, REMOVED_RETENTION_S
+from app.services.static_scraper import fetch_conditional
+from app.services.price_extractor import parse_price
+from app.services.metrics import track_queue
+import asyncio
+import heapq
+import numpy as np
+import random
+import time
+import traceback
+import uuid
+
+class TrackedEntry:
+    """Scheduler state for one tracked product; kept small since there can be 100k of them."""
+
+    __slots__ = (
+        "id", "user_id", "url", "domain", "target_price", "interval_s", "last_price",
+        "currency", "etag", "last_modified", "last_checked_at", "created_at", "version",
+    )
+
+    def __init__(self, row: Dict[str, Any]):
+        self.id = row["id"]
+        self.user_id = row["user_id"]
+        self.url = row["url"]
+        self.domain = urlparse(row["url"]).netloc.lower()
+        self.target_price = row.get("target_price")
+        self.interval_s = max(settings.PRICE_MIN_INTERVAL_S, int(row.get("interval_s") or settings.PRICE_DEFAULT_INTERVAL_S))
+        self.last_price = row.get("last_price")
+        self.currency = row.get("currency")
+        self.etag = row.get("etag")
+        self.last_modified = row.get("last_modified")
+        self.last_checked_at = row.get("last_checked_at")
+        self.created_at = row.get("created_at") or time.time()
+        self.version = 0
+
+    def row(self) -> Dict[str, Any]:
+        return {
+            "id": self.id, "user_id": self.user_id, "url": self.url, "target_price": self.target_price,
+            "interval_s": self.interval_s, "last_price": self.last_price, "currency": self.currency,
+            "etag": self.etag, "last_modified": self.last_modified,
+            "last_checked_at": self.last_checked_at, "created_at": self.created_at,
+        }
+
+def find_alerts(
+    prices: np.ndarray,
+    previous: np.ndarray,
+    targets: np.ndarray,
+    drop_pct: float = settings.PRICE_DROP_ALERT_PCT,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Masks of observations that reached their target and that dropped by at least ``drop_pct`` percent.
+
+    Missing previous prices and targets are NaN. A target alert fires only when
+    the price crosses the target, not on every check below it.
+    """
+    with np.errstate(invalid="ignore"):
+        reached = ~np.isnan(targets) & (prices <= targets) & (np.isnan(previous) | (previous > targets))
+        dropped = ~np.isnan(previous) & (prices <= previous * (1 - drop_pct / 100)) & ~reached
+    return reached, dropped
+
+class PriceTracker:
+    """Refreshes every tracked product's price on its own schedule.
+
+    Products sit in a heap ordered by their next check. Each check is a
+    conditional GET, so an unchanged page costs a 304. Every interval is
+    jittered so products added together drift apart, and each domain is
+    held to PRICE_DOMAIN_RATE requests per second. Observations are
+    buffered and written in batches, and their threshold checks run
+    together on the whole batch.
+
+    Only one process runs the scheduler. Products tracked or untracked
+    through other workers reach it from the store every
+    PRICE_SYNC_INTERVAL_S seconds.
+    """
+
+    def __init__(
+        self,
+        workers: int = settings.PRICE_WORKERS,
+        domain_rate: float = settings.PRICE_DOMAIN_RATE,
+        flush_interval_s: float = settings.PRICE_FLUSH_INTERVAL_S,
+        flush_batch: int = settings.PRICE_FLUSH_BATCH,
+        sync_interval_s: float = settings.PRICE_SYNC_INTERVAL_S,
+    ):
+        self.workers = max(1, workers)
+        self.domain_interval = 1 / domain_rate if domain_rate > 0 else 0
+        self.flush_interval_s = flush_interval_s
+        self.flush_batch = max(1, flush_batch)
+        self.sync_interval_s = sync_interval_s
+        self._synced_at = 0.0
+        self._entries: Dict[str, TrackedEntry] = {}
+        self._heap: List[Tuple[float, int, str, int, bool]] = []
+        self._sequence = 0
+        self._domain_next: Dict[str, float] = {}
+        self._observations: List[Tuple[TrackedEntry, float, Optional[str], Optional[float], float]] = []
+        self._state_changes: Dict[str, TrackedEntry] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flush_now: Optional[asyncio.Event] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._tasks: List[asyncio.Task] = []
+        self._checks: set = set()
+
+    @property
+    def queue_depth(self) -> int:
+        """Scheduled checks, including superseded ones that are skipped when they come up."""
+        return len(self._heap)
+
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        self._wakeup = asyncio.Event()
+        self._flush_now = asyncio.Event()
+        self._slots = asyncio.Semaphore(self.workers)
+        loop = asyncio.get_running_loop()
+        self._tasks = [loop.create_task(self._load_and_run()), loop.create_task(self._flush_loop())]
+
+    async def stop(self) -> None:
+        for task in self._tasks + list(self._checks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, *self._checks, return_exceptions=True)
+        self._tasks = []
+        self._checks = set()
+        try:
+            await self._flush()
+        except Exception as e:
+            print(f"Final price flush failed: {str(e)}")
+
+    def track(self, row: Dict[str, Any], due: Optional[float] = None) -> None:
+        """Start (or restart) tracking a product; it is checked at ``due``, or now.
+
+        Does nothing unless the scheduler runs in this process; otherwise it
+        picks the product up from the store at its next sync.
+        """
+        if not self._tasks:
+            return
+        entry = TrackedEntry(row)
+        previous = self._entries.get(entry.id)
+        if previous is not None:
+            entry.version = previous.version + 1
+        self._entries[entry.id] = entry
+        self._schedule(entry, time.time() if due is None else due)
+
+    def untrack(self, product_id: str) -> None:
+        if not self._tasks:
+            return
+        # Its heap item is skipped when it comes up
+        self._entries.pop(product_id, None)
+        self._state_changes.pop(product_id, None)
+
+    def _schedule(self, entry: TrackedEntry, due: float) -> None:
+        self._sequence += 1
+        heapq.heappush(self._heap, (due, self._sequence, entry.id, entry.version, False))
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _next_due(self, entry: TrackedEntry, now: float) -> float:
+        jitter = random.uniform(-settings.PRICE_JITTER, settings.PRICE_JITTER)
+        return now + entry.interval_s * (1 + jitter)
+
+    def _first_due(self, entry: TrackedEntry, now: float) -> float:
+        # Spread overdue products over one interval instead of checking them all at once
+        if entry.last_checked_at is None:
+            return now + random.uniform(0, min(entry.interval_s, 60))
+        return max(entry.last_checked_at + entry.interval_s, now + random.uniform(0, entry.interval_s * settings.PRICE_JITTER))
+
+    async def _load_and_run(self) -> None:
+        try:
+            now = self._synced_at = time.time()
+            count = 0
+            async for rows in price_store.iter_all():
+                for row in rows:
+                    entry = TrackedEntry(row)
+                    self._entries[entry.id] = entry
+                    self._sequence += 1
+                    self._heap.append((self._first_due(entry, now), self._sequence, entry.id, entry.version, False))
+                count += len(rows)
+            heapq.heapify(self._heap)
+            print(f"Price tracker loaded {count} tracked products")
+        except Exception as e:
+            # Usually the tables do not exist; syncing every interval would only repeat the error
+            print(
+                f"Price tracking disabled: could not load tracked products ({str(e)}). "
+                "Create the tables in app/db/price_tracking.sql and restart."
+            )
+            current = asyncio.current_task()
+            for task in self._tasks:
+                if task is not current:
+                    task.cancel()
+            self._tasks = []
+            return
+        self._tasks.append(asyncio.get_running_loop().create_task(self._sync_loop()))
+        await self._run()
+
+    async def _sync_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.sync_interval_s)
+            try:
+                await self._sync()
+            except Exception as e:
+                print(f"Price tracker sync failed: {str(e)}")
+                traceback.print_exc()
+
+    async def _sync(self) -> None:
+        """Pick up products added and deleted through other processes since the last sync."""
+        now = time.time()
+        # One interval of overlap covers commits that land late and clock differences between processes
+        since = self._synced_at - self.sync_interval_s
+        # Deletions are read after additions, so a product deleted in between is not left behind
+        added = await price_store.added_since(since)
+        removed = await price_store.removed_since(since)
+        for row in added:
+            if row["id"] not in self._entries:
+                entry = TrackedEntry(row)
+                self._entries[entry.id] = entry
+                self._schedule(entry, self._first_due(entry, now))
+        for product_id in removed:
+            self.untrack(product_id)
+        self._synced_at = now
+        await price_store.prune_removed(now - REMOVED_RETENTION_S)
+
+    async def _run(self) -> None:
+        while True:
+            if not self._heap:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            due, _, product_id, version, reserved = self._heap[0]
+            now = time.time()
+            if due > now:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), due - now)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            heapq.heappop(self._heap)
+            entry = self._entries.get(product_id)
+            if entry is None or entry.version != version:
+                continue
+
+            # Per-domain rate limit: reserve the domain's next free slot and, if it is
+            # in the future, move the check there. Each check moves at most once.
+            if not reserved:
+                slot = self._domain_next.get(entry.domain, 0.0)
+                self._domain_next[entry.domain] = max(slot, now) + self.domain_interval
+                if slot > now:
+                    self._sequence += 1
+                    heapq.heappush(self._heap, (slot, self._sequence, entry.id, entry.version, True))
+                    continue
+
+            await self._slots.acquire()
+            task = asyncio.get_running_loop().create_task(self._check(entry))
+            self._checks.add(task)
+            task.add_done_callback(self._check_done)
+
+    def _check_done(self, task: asyncio.Task) -> None:
+        self._checks.discard(task)
+        self._slots.release()
+
+    async def _check(self, entry: TrackedEntry) -> None:
+        now = time.time()
+        try:
+            status, html, etag, last_modified = await fetch_conditional(entry.url, entry.etag, entry.last_modified)
+            if status == 200 and html:
+                parsed = await asyncio.to_thread(parse_price, html)
+                entry.etag, entry.last_modified = etag, last_modified
+                if parsed is not None:
+                    price, currency = parsed
+                    self._observations.append((entry, price, currency or entry.currency, entry.last_price, now))
+                    entry.last_price, entry.currency = price, currency or entry.currency
+                else:
+                    print(f"No price found on {entry.url}")
+            elif status != 304:
+                print(f"Price check for {entry.url} returned HTTP {status}")
+            entry.last_checked_at = now
+            self._state_changes[entry.id] = entry
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Price check failed for {entry.url}: {str(e)}")
+        finally:
+            if self._entries.get(entry.id) is entry:
+                self._schedule(entry, self._next_due(entry, now))
+
+        if len(self._observations) >= self.flush_batch:
+            self._flush_now.set()
+
+    async def _flush_loop(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_now.wait(), self.flush_interval_s)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_now.clear()
+            try:
+                await self._flush()
+            except Exception as e:
+                print(f"Price flush failed: {str(e)}")
+                traceback.print_exc()
+
+    async def _flush(self) -> None:
+        """Write buffered observations, product state and alerts in one batch per table."""
+        observations, self._observations = self._observations, []
+        changes, self._state_changes = self._state_changes, {}
+        # Products untracked since their check must not be written back
+        observations = [item for item in observations if item[0].id in self._entries]
+        if not observations and not changes:
+            return
+
+        history = [
+            {"product_id": entry.id, "price": price, "currency": currency, "checked_at": checked_at}
+            for entry, price, currency, _, checked_at in observations
+        ]
+        alerts = self._alerts(observations)
+        products = [entry.row() for entry in changes.values() if entry.id in self._entries]
+        try:
+            await price_store.record(history, products, alerts)
+        except Exception:
+            # Keep the product state for the next flush; the observations are dropped rather than retried forever
+            for entry in changes.values():
+                self._state_changes.setdefault(entry.id, entry)
+            raise
+        for alert in alerts:
+            print(f"Price alert ({alert['kind']}) for product {alert['product_id']}: {alert['price']}")
+
+    @staticmethod
+    def _alerts(observations: List[Tuple[TrackedEntry, float, Optional[str], Optional[float], float]]) -> List[Dict[str, Any]]:
+        if not observations:
+            return []
+        nan = float("nan")
+        prices = np.fromiter((item[1] for item in observations), dtype=np.float64, count=len(observations))
+        previous = np.fromiter(
+            (nan if item[3] is None else item[3] for item in observations), dtype=np.float64, count=len(observations)
+        )
+        targets = np.fromiter(
+            (nan if item[0].target_price is None else item[0].target_price for item in observations),
+            dtype=np.float64, count=len(observations),
+        )
+        reached, dropped = find_alerts(prices, previous, targets)
+
+        now = time.time()
+        alerts = []
+        for kind, mask in (("target_reached", reached), ("price_drop", dropped)):
+            for i in np.flatnonzero(mask):
+                entry, price, _, last, _ = observations[i]
+                alerts.append({
+                    "id": str(uuid.uuid4()),
+                    "product_id": entry.id,
+                    "user_id": entry.user_id,
+                    "kind": kind,
+                    "price": price,
+                    "previous_price": last,
+                    "target_price": entry.target_price,
+                    "created_at": now,
+                })
+        return alerts
+
+price_tracker = PriceTracker()
+track_queue("price_checks", lambda: price_tracker.queue_depth)
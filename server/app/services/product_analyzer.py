@@ -1,152 +1,352 @@
-from typing import List, Dict, Any
-from bs4 import BeautifulSoup
-from playwright.async_api import async_playwright
-from transformers import pipeline
+from typing import List, Dict, Any, AsyncIterator, Optional, Set, Union
+from urllib.parse import urljoin, urlparse, parse_qs, urlencode, urlunparse
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
 from collections import Counter
+from contextlib import aclosing
+from app.core.config import settings
+from app.services.model_registry import model_registry, model_revision
+from app.services.inference_queue import get_batcher
+from app.services.bias_detector import get_bias_detector
+from app.services.text_prep import prep_revision
+from app.services.browser_pool import browser_pool
+from app.services.domain_limiter import domain_limiter
+from app.services.static_scraper import REVIEW_SELECTOR, NEXT_PAGE_SELECTOR
+from app.services import static_scraper
+from app.services.scrape_cache import scrape_cache, cache_key, is_fresh, merge_reviews
+from app.services.inference_cache import stage_cache
+from app.services.duplicate_detector import near_duplicate_flags
+from app.services.credibility import score_credibility
+from app.services.metrics import count_cache
+import asyncio
 import traceback
-import re
-import torch
+
+# Query parameters that carry the page number in review page URLs
+PAGE_PARAMS = ("pageNumber", "page", "p")
+
+REVIEWS_SCRIPT = """() => {
+    return Array.from(document.querySelectorAll('.review')).map(review => ({
+        text: review.querySelector('.review-text, .a-size-base.review-text-content')?.innerText.trim() || '',
+        rating: review.querySelector('.review-rating')?.innerText.trim().charAt(0) || '0'
+    })).filter(review => review.text.length > 10);
+}"""
+FIRST_REVIEW_SCRIPT = "() => document.querySelector('.review')?.innerText || ''"
+REVIEWS_CHANGED_SCRIPT = """(previous) => {
+    const review = document.querySelector('.review');
+    return review !== null && review.innerText !== previous;
+}"""
 
 class ProductAnalyzer:
-    def __init__(self, model_name: str = "distilbert-base-uncased-finetuned-sst-2-english"):
+    def __init__(self, model_name: str = settings.SENTIMENT_MODEL, bias_model_name: str = settings.BIAS_MODEL):
+        # Pipelines are owned by the shared model registry, so constructing an
+        # analyzer per request is cheap and never reloads weights.
+        self.model_name = model_name
+        self.bias_model_name = bias_model_name
+        self.bias_detector = get_bias_detector(bias_model_name)
+
+    @property
+    def sentiment_analyzer(self):
+        return model_registry.get("sentiment-analysis", self.model_name)
+
+    @property
+    def bias_classifier(self):
+        return model_registry.get("zero-shot-classification", self.bias_model_name)
+
+    async def extract_reviews(self, url: str, pages: int = 1, use_cache: bool = True) -> List[Dict[str, Any]]:
+        """Return cached reviews while fresh; otherwise scrape, only paging until known reviews reappear."""
+        reviews = []
+        async for batch in self.iter_reviews(url, pages, use_cache):
+            reviews.extend(batch)
+        return reviews
+
+    async def iter_reviews(self, url: str, pages: int = 1, use_cache: bool = True) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yield reviews in batches as they become available, roughly one batch per scraped page.
+
+        Fresh cache entries are yielded as a single batch. On an incremental refresh the
+        newly scraped reviews come first, followed by the previously cached ones. A stale
+        entry is still served when the refresh scrapes nothing, and is not re-stamped.
+        """
+        if not use_cache or scrape_cache is None:
+            async for batch in self.iter_scraped_reviews(url, pages):
+                yield batch
+            return
+
+        key = cache_key(url, pages)
+        entry = await scrape_cache.get(key)
+        if entry is not None and is_fresh(entry):
+            count_cache("scrape", 1, 0)
+            yield entry["reviews"]
+            return
+        count_cache("scrape", 0, 1)
+
+        cached_reviews = entry["reviews"] if entry is not None and settings.SCRAPE_CACHE_INCREMENTAL else []
+        seen = {r["product_review"] for r in cached_reviews}
+        scraped = []
+        async for batch in self.iter_scraped_reviews(url, pages, seen=seen):
+            scraped.extend(batch)
+            new_reviews = [r for r in batch if r["product_review"] not in seen]
+            if new_reviews:
+                yield new_reviews
+        if cached_reviews:
+            yield cached_reviews
+        elif not scraped and entry is not None:
+            # The refresh found nothing (blocked, timed out, changed markup): fall back to the stale copy
+            yield entry["reviews"]
+
+        # Only a refresh that scraped something restarts the entry's TTL; otherwise it stays stale
+        if scraped:
+            await scrape_cache.set(key, merge_reviews(scraped, cached_reviews))
+
+    async def scrape_reviews(self, url: str, pages: int = 1, seen: Optional[Set[str]] = None) -> List[Dict[str, Any]]:
+        """Scrape reviews over plain HTTP, escalating to the browser when the static HTML has none.
+
+        When ``seen`` is given, paging stops after the first page containing an already-known review.
+        """
+        reviews = []
+        async for batch in self.iter_scraped_reviews(url, pages, seen):
+            reviews.extend(batch)
+        return reviews
+
+    async def iter_scraped_reviews(self, url: str, pages: int = 1, seen: Optional[Set[str]] = None) -> AsyncIterator[List[Dict[str, Any]]]:
+        """``scrape_reviews`` yielding one batch per page, in page order."""
+        if settings.SCRAPE_STATIC_FIRST:
+            found = False
+            async for page_reviews in self._iter_pages_static(url, pages, seen):
+                reviews = self._to_reviews([page_reviews])
+                if reviews:
+                    found = True
+                    yield reviews
+            if found:
+                return
+
+        async for page_reviews in self._iter_pages_browser(url, pages, seen):
+            reviews = self._to_reviews([page_reviews])
+            if reviews:
+                yield reviews
+
+    @staticmethod
+    def _has_seen(page_reviews: List[Dict[str, Any]], seen: Optional[Set[str]]) -> bool:
+        return bool(seen) and any(r["text"] in seen for r in page_reviews)
+
+    async def _iter_pages_static(self, url: str, pages: int = 1, seen: Optional[Set[str]] = None) -> AsyncIterator[List[Dict[str, Any]]]:
         try:
-            device = 0 if torch.cuda.is_available() else -1
-
-            self.sentiment_analyzer = pipeline(
-                "sentiment-analysis",
-                model=model_name,
-                device=device
-            )
-            self.bias_classifier = pipeline(
-                "zero-shot-classification",
-                model="facebook/bart-large-mnli",
-                device=device
-            )
+            first_reviews, next_url = await static_scraper.fetch_reviews(url)
+            if not first_reviews:
+                return
+            yield first_reviews
+
+            remaining = 0 if self._has_seen(first_reviews, seen) else pages - 1
+            # Incremental refreshes page sequentially so they can stop early
+            page_urls = self._page_urls(next_url, remaining) if remaining > 0 and not seen else None
+            if page_urls:
+                async with aclosing(self._in_order(static_scraper.fetch_reviews(page_url) for page_url in page_urls)) as results:
+                    async for page_reviews, _ in results:
+                        if not page_reviews:
+                            break
+                        yield page_reviews
+            else:
+                while remaining > 0 and next_url:
+                    page_reviews, next_url = await static_scraper.fetch_reviews(next_url)
+                    if not page_reviews:
+                        break
+                    yield page_reviews
+                    if self._has_seen(page_reviews, seen):
+                        break
+                    remaining -= 1
         except Exception as e:
-            raise Exception(f"Failed to initialize ProductAnalyzer: {str(e)}\n{traceback.format_exc()}")
+            print(f"Error extracting reviews over HTTP: {str(e)}")
 
-    async def extract_reviews(self, url: str, pages: int = 1) -> List[Dict[str, Any]]:
+    async def _iter_pages_browser(self, url: str, pages: int = 1, seen: Optional[Set[str]] = None) -> AsyncIterator[List[Dict[str, Any]]]:
         try:
-            async with async_playwright() as p:
-                browser = await p.chromium.launch(headless=True)
-                context = await browser.new_context()
+            async with browser_pool.context() as context:
                 page = await context.new_page()
-                await page.goto(url, timeout=15000)
-                await page.wait_for_load_state("domcontentloaded")
-
-                all_reviews = []
-                for _ in range(pages):
-                    # Scrape reviews on current page
-                    reviews = await page.evaluate("""() => {
-                        return Array.from(document.querySelectorAll('.review')).map(review => ({
-                            text: review.querySelector('.review-text, .a-size-base.review-text-content')?.innerText.trim() || '',
-                            rating: review.querySelector('.review-rating')?.innerText.trim().charAt(0) || '0'
-                        })).filter(review => review.text.length > 10);
-                    }""")
-                    all_reviews.extend(reviews)
-
-                    # Try to go to the next page
-                    next_button = await page.query_selector("li.a-last a")
-                    if next_button:
-                        await next_button.click()
-                        await page.wait_for_timeout(1500)  # slight wait for content to load
+                async with domain_limiter.limit(url):
+                    await page.goto(url, timeout=15000)
+                    await page.wait_for_load_state("domcontentloaded")
+                    await self._wait_for_reviews(page)
+                    first_reviews = await page.evaluate(REVIEWS_SCRIPT)
+                yield first_reviews
+
+                if pages > 1 and not self._has_seen(first_reviews, seen):
+                    # Fetch the remaining pages concurrently when their URLs can be
+                    # derived from the next-page link, otherwise click through them.
+                    page_urls = None if seen else self._page_urls(await self._next_page_url(page), pages - 1)
+                    if page_urls:
+                        async for page_reviews in self._fetch_pages(context, page_urls):
+                            yield page_reviews
                     else:
-                        break
+                        async for page_reviews in self._click_through(page, pages - 1, seen):
+                            yield page_reviews
+        except Exception as e:
+            print(f"Error extracting reviews: {str(e)}")
+
+    @staticmethod
+    async def _in_order(coroutines) -> AsyncIterator[Any]:
+        """Run coroutines concurrently and yield their results in submission order.
+
+        Stops at the first failure and cancels whatever is still running.
+        """
+        tasks = [asyncio.ensure_future(coroutine) for coroutine in coroutines]
+        try:
+            for task in tasks:
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
 
-                await browser.close()
+    @staticmethod
+    def _to_reviews(pages_reviews: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        all_reviews = [r for page_reviews in pages_reviews for r in page_reviews]
+        return [
+            {"product_review": r["text"], "rating": int(r["rating"]) if r["rating"].isdigit() else 0}
+            for r in all_reviews if r["text"]
+        ]
 
-                return [
-                    {"product_review": r["text"], "rating": int(r["rating"])}
-                    for r in all_reviews if r["text"]
-                ]
+    async def _wait_for_reviews(self, page) -> None:
+        """Wait until review nodes are rendered; pages without reviews just time out."""
+        try:
+            await page.wait_for_selector(REVIEW_SELECTOR, timeout=settings.SCRAPE_WAIT_TIMEOUT_MS)
+        except PlaywrightTimeoutError:
+            pass
+
+    async def _next_page_url(self, page) -> Optional[str]:
+        next_link = await page.query_selector(NEXT_PAGE_SELECTOR)
+        if not next_link:
+            return None
+        href = await next_link.get_attribute("href")
+        return urljoin(page.url, href) if href else None
+
+    @staticmethod
+    def _page_urls(next_url: Optional[str], count: int) -> Optional[List[str]]:
+        """Derive the URLs of the next ``count`` pages from the next-page link, if it is numbered."""
+        if not next_url:
+            return None
+        parsed = urlparse(next_url)
+        query = parse_qs(parsed.query, keep_blank_values=True)
+        for param in PAGE_PARAMS:
+            values = query.get(param)
+            if values and values[0].isdigit():
+                first = int(values[0])
+                urls = []
+                for number in range(first, first + count):
+                    query[param] = [str(number)]
+                    urls.append(urlunparse(parsed._replace(query=urlencode(query, doseq=True))))
+                return urls
+        return None
+
+    async def _fetch_pages(self, context, page_urls: List[str]) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Scrape review pages in parallel tabs, capped per domain, yielding them in page order."""
+        async def fetch(page_url: str) -> List[Dict[str, Any]]:
+            async with domain_limiter.limit(page_url):
+                page = await context.new_page()
+                try:
+                    await page.goto(page_url, timeout=15000, wait_until="domcontentloaded")
+                    await self._wait_for_reviews(page)
+                    return await page.evaluate(REVIEWS_SCRIPT)
+                finally:
+                    await page.close()
+
+        # Like clicking through, stop at the first page that fails or has no reviews
+        try:
+            async with aclosing(self._in_order(fetch(page_url) for page_url in page_urls)) as results:
+                async for page_reviews in results:
+                    if not page_reviews:
+                        break
+                    yield page_reviews
         except Exception as e:
-            print(f"Error extracting reviews: {str(e)}")
-            return []
+            print(f"Error extracting review page: {str(e)}")
+
+    async def _click_through(self, page, count: int, seen: Optional[Set[str]] = None) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Follow the next-page button, waiting for the review list to change rather than sleeping."""
+        for _ in range(count):
+            next_button = await page.query_selector(NEXT_PAGE_SELECTOR)
+            if not next_button:
+                break
 
-    async def analyze_sentiment(self, reviews: List[str]) -> List[Dict[str, Any]]:
+            first_review = await page.evaluate(FIRST_REVIEW_SCRIPT)
+            await next_button.click()
+            try:
+                await page.wait_for_function(
+                    REVIEWS_CHANGED_SCRIPT, arg=first_review, timeout=settings.SCRAPE_WAIT_TIMEOUT_MS
+                )
+            except Exception:
+                # The click may have triggered a full navigation; wait for it to settle instead
+                try:
+                    await page.wait_for_load_state("networkidle", timeout=settings.SCRAPE_WAIT_TIMEOUT_MS)
+                except PlaywrightTimeoutError:
+                    pass
+                await self._wait_for_reviews(page)
+
+            page_reviews = await page.evaluate(REVIEWS_SCRIPT)
+            yield page_reviews
+            if self._has_seen(page_reviews, seen):
+                break
+
+    async def analyze_sentiment(self, reviews: List[Union[str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
         """Analyze sentiment of product reviews, ensuring text truncation and correct output format"""
         try:
-            sentiments = []
-            for review in reviews:
-                if not isinstance(review, str):  # Ensure review is a string
-                    continue
-                
-                # Truncate long reviews to prevent exceeding model limits
-                truncated_review = review[:450]  
-
-                result = self.sentiment_analyzer(truncated_review)
-                sentiments.append({
-                    "review": review, 
-                    "sentiment": result[0]  # Ensure this is properly formatted
-                })
-            
-            return sentiments  # Must return a list, not a dict
+            # Accept scraped review dicts as well as plain strings
+            texts = [review.get("product_review", "") if isinstance(review, dict) else review for review in reviews]
+            texts = [review for review in texts if isinstance(review, str)]  # Ensure review is a string
+
+            # Long reviews are truncated by tokens (or windowed) when scored. Cache misses
+            # are batched with those of other in-flight requests by the shared batcher.
+            batcher = get_batcher("sentiment-analysis", self.model_name)
+            cache = stage_cache("sentiment", self.model_name, prep_revision(model_revision(self.model_name)))
+            results = await cache.aresolve(texts, batcher.submit)
+
+            return [
+                {"review": review, "sentiment": result}
+                for review, result in zip(texts, results)
+            ]  # Must return a list, not a dict
         except Exception as e:
             raise Exception(f"Failed to analyze sentiment: {str(e)}\n{traceback.format_exc()}")
 
     def detect_bias(self, reviews: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Detect bias in reviews using zero-shot classification."""
-        bias_labels = ["exaggeration", "subjectivity", "overly emotional", "neutral"]
-        results = []
-
-        for review_data in reviews:
-            review = review_data.get("product_review", "")
-
-            if not isinstance(review, str) or not review.strip():  # Ensure it's a non-empty string
-                continue
-            
-            classification = self.bias_classifier(review, bias_labels)
-            
-            results.append({
-                "review": review,
-                "bias_scores": dict(zip(classification["labels"], classification["scores"]))
-            })
-        
-        return results
+        """Detect bias in reviews using batched zero-shot classification."""
+        texts = [
+            review_data.get("product_review", "") for review_data in reviews
+        ]
+        texts = [review for review in texts if isinstance(review, str) and review.strip()]  # Ensure it's a non-empty string
+
+        cache = stage_cache("bias", self.bias_model_name, prep_revision(model_revision(self.bias_model_name)))
+        bias_scores = cache.resolve(texts, self.bias_detector.score)
+
+        return [
+            {"review": review, "bias_scores": scores}
+            for review, scores in zip(texts, bias_scores)
+        ]
     
-    def assess_credibility(self, reviews: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Assess credibility of reviews based on various linguistic factors."""
-        results = []
-        review_texts = [r.get("product_review", "").strip().lower() for r in reviews]
-
-        # Count duplicate reviews
-        review_counts = Counter(review_texts)
-
-        for review_data in reviews:
-            review = review_data.get("product_review", "").strip()
-            
-            if not isinstance(review, str) or not review:
-                continue
-            
-            credibility_score = 100  # Start with a perfect score
-
-            # 1️⃣ Short reviews (less than 20 words) are suspicious
-            if len(review.split()) < 20:
-                credibility_score -= 30
-            
-            # 2️⃣ Fake-sounding words (exaggeration, marketing words)
-            if re.search(r'\b(BUY|SCAM|FAKE|BEST|AMAZING|PERFECT|MUST-HAVE|LIFE-CHANGING|WASTE OF MONEY|DO NOT BUY|GARBAGE)\b', review, re.IGNORECASE):
-                credibility_score -= 25
-
-            # 3️⃣ Excessive punctuation or capitalization
-            if re.search(r'!{3,}|\?{3,}|\b[A-Z]{5,}\b', review):
-                credibility_score -= 20
-            
-            # 4️⃣ Repetitive words (e.g., "best best best")
-            words = review.lower().split()
-            most_common_word, count = Counter(words).most_common(1)[0]
-            if count > 3:
-                credibility_score -= 20  # Overuse of a word looks fake
-
-            # 5️⃣ Duplicate reviews are penalized
-            if review_counts[review.lower()] > 1:
-                credibility_score -= 40  # Identical reviews = likely spam
-            
-            credibility_score = max(0, credibility_score)  # Ensure score isn't negative
-
-            results.append({
-                "review": review,
-                "credibility_score": credibility_score
-            })
-        
-        return results
+    def assess_credibility(self, reviews: List[Dict[str, Any]], review_counts: Optional[Counter] = None) -> List[Dict[str, Any]]:
+        """Assess credibility of reviews based on various linguistic factors.
+
+        ``review_counts`` overrides the duplicate counts, e.g. with counts over every review seen so far when scoring in batches.
+        """
+        texts = [review_data.get("product_review", "").strip() for review_data in reviews]
+        texts = [review for review in texts if isinstance(review, str) and review]
+
+        # Short reviews, marketing words, shouting, repeated words, duplicates and
+        # near-duplicates are scored for the whole set at once
+        scores = score_credibility(texts, review_counts, self._near_duplicate_flags(texts))
+
+        return [
+            {"review": review, "credibility_score": int(credibility_score)}
+            for review, credibility_score in zip(texts, scores)
+        ]
+
+    @staticmethod
+    def _near_duplicate_flags(texts: List[str]) -> List[bool]:
+        if not settings.NEAR_DUPLICATE_DETECTION or len(texts) < 2:
+            return [False] * len(texts)
+        try:
+            return near_duplicate_flags(texts)
+        except Exception as e:
+            print(f"Near-duplicate detection failed: {str(e)}")
+            return [False] * len(texts)
+
+# Module-level entry points for the inference executor, which may be a process pool
+
+def detect_bias_task(bias_model_name: str, reviews: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return ProductAnalyzer(bias_model_name=bias_model_name).detect_bias(reviews)
+
+def assess_credibility_task(reviews: List[Dict[str, Any]], review_counts: Optional[Counter] = None) -> List[Dict[str, Any]]:
+    return ProductAnalyzer().assess_credibility(reviews, review_counts=review_counts)
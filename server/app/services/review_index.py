@@ -0,0 +1,284 @@
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Set, Tuple
+from app.core.config import settings
+from app.services.embedder import embed_texts
+from app.services.executor import inference_executor
+from app.services.inference_cache import text_hash, SQLITE_CHUNK_SIZE
+from app.services.scrape_cache import normalize_url
+import asyncio
+import hashlib
+import json
+import numpy as np
+import os
+import sqlite3
+import threading
+import time
+import traceback
+
+def product_id(url: str) -> str:
+    """Stable id of a product, shared by every spelling of its URL."""
+    return hashlib.sha256(normalize_url(url).encode("utf-8")).hexdigest()[:16]
+
+def _sentiment(review: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    # Analysis rows wrap the label as {"review", "sentiment"}; stream records do not
+    sentiment = review.get("sentiment")
+    if isinstance(sentiment, dict) and isinstance(sentiment.get("sentiment"), dict):
+        return sentiment["sentiment"]
+    return sentiment
+
+class ReviewIndex:
+    """Per-product FAISS indexes of review embeddings, with the reviews' scores in SQLite.
+
+    Each product has one ``<product_id>.faiss`` file (inner product over
+    normalized embeddings, keyed by review row id). Re-analyzing a product
+    only embeds reviews that are not indexed yet and refreshes the stored
+    scores of the rest. Embeddings are also kept in SQLite so a missing or
+    stale index file can be rebuilt without the model. Loaded indexes are
+    kept in an LRU and reloaded when their file changes, so every worker
+    sees updates made by the others.
+    """
+
+    def __init__(
+        self,
+        directory: str = settings.REVIEW_INDEX_DIR,
+        model_name: str = settings.EMBEDDING_MODEL,
+        cache_size: int = settings.REVIEW_INDEX_CACHE_SIZE,
+    ):
+        self.directory = directory
+        self.model_name = model_name
+        self.cache_size = max(1, cache_size)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        # product id -> (file mtime, index)
+        self._loaded: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._tasks: Set[asyncio.Task] = set()
+        os.register_at_fork(after_in_child=self._reconnect)
+
+    def _reconnect(self) -> None:
+        # Forked processes reopen on first use and leave the inherited connection alone
+        self._inherited = self._conn
+        self._conn = None
+        self._lock = threading.Lock()
+        self._tasks = set()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Opened on first use so importing the module does not touch the disk. Caller holds the lock."""
+        if self._conn is None:
+            os.makedirs(self.directory, exist_ok=True)
+            conn = sqlite3.connect(os.path.join(self.directory, "reviews.db"), check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS reviews ("
+                "id INTEGER PRIMARY KEY, product_id TEXT NOT NULL, text_hash TEXT NOT NULL, "
+                "product_review TEXT NOT NULL, rating REAL, sentiment TEXT, bias_scores TEXT, "
+                "credibility_score REAL, embedding BLOB NOT NULL, updated_at REAL NOT NULL, "
+                "UNIQUE (product_id, text_hash))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS products ("
+                "product_id TEXT PRIMARY KEY, url TEXT NOT NULL, model TEXT NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self._conn = conn
+        return self._conn
+
+    def _path(self, product: str) -> str:
+        return os.path.join(self.directory, f"{product}.faiss")
+
+    def _write_index(self, product: str, index) -> None:
+        import faiss
+        # Written aside and renamed so readers never see a partial file
+        path = self._path(product)
+        faiss.write_index(index, f"{path}.tmp")
+        os.replace(f"{path}.tmp", path)
+        self._loaded[product] = (os.stat(path).st_mtime, index)
+        self._loaded.move_to_end(product)
+
+    def _build(self, conn: sqlite3.Connection, product: str):
+        import faiss
+        rows = conn.execute("SELECT id, embedding FROM reviews WHERE product_id = ?", (product,)).fetchall()
+        embeddings = np.stack([np.frombuffer(blob, dtype=np.float32) for _, blob in rows])
+        index = faiss.IndexIDMap2(faiss.IndexFlatIP(embeddings.shape[1]))
+        index.add_with_ids(embeddings, np.array([row_id for row_id, _ in rows], dtype=np.int64))
+        return index
+
+    def _read(self, product: str):
+        """The product's index, from the LRU unless its file changed since it was loaded."""
+        import faiss
+        path = self._path(product)
+        try:
+            mtime = os.stat(path).st_mtime
+        except FileNotFoundError:
+            return None
+        cached = self._loaded.get(product)
+        if cached is not None and cached[0] == mtime:
+            self._loaded.move_to_end(product)
+            return cached[1]
+        index = faiss.read_index(path)
+        self._loaded[product] = (mtime, index)
+        self._loaded.move_to_end(product)
+        while len(self._loaded) > self.cache_size:
+            self._loaded.popitem(last=False)
+        return index
+
+    def update(self, url: str, reviews: List[Dict[str, Any]]) -> int:
+        """Index a product's analyzed reviews and return how many were new.
+
+        Blocking: embeds the new reviews, so it runs on the inference executor.
+        """
+        product = product_id(url)
+        rows: Dict[str, Dict[str, Any]] = {}
+        for review in reviews:
+            text = review.get("product_review")
+            if isinstance(text, str) and text.strip():
+                rows.setdefault(text_hash(text), review)
+        if not rows:
+            return 0
+
+        hashes = list(rows)
+        known = set()
+        with self._lock:
+            conn = self._connection()
+            stored = conn.execute("SELECT model FROM products WHERE product_id = ?", (product,)).fetchone()
+            # Embeddings from another model are not comparable, so the product is re-embedded
+            stale = stored is not None and stored[0] != self.model_name
+            chunks = [] if stale else [hashes[i:i + SQLITE_CHUNK_SIZE] for i in range(0, len(hashes), SQLITE_CHUNK_SIZE)]
+            for chunk in chunks:
+                known.update(
+                    h for (h,) in conn.execute(
+                        f"SELECT text_hash FROM reviews WHERE product_id = ? AND text_hash IN ({', '.join('?' * len(chunk))})",
+                        (product, *chunk),
+                    )
+                )
+        new_hashes = [h for h in hashes if h not in known]
+        # Embedding is the slow part, so it happens before the write lock is taken
+        embeddings = embed_texts([rows[h]["product_review"] for h in new_hashes], self.model_name) if new_hashes else None
+
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            # IMMEDIATE takes SQLite's write lock, serializing updates across processes too
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(
+                    "INSERT INTO products (product_id, url, model, updated_at) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (product_id) DO UPDATE SET url = excluded.url, model = excluded.model, "
+                    "updated_at = excluded.updated_at",
+                    (product, normalize_url(url), self.model_name, now),
+                )
+                if stale:
+                    conn.execute("DELETE FROM reviews WHERE product_id = ?", (product,))
+                values = [
+                    (
+                        json.dumps(_sentiment(rows[h])), json.dumps(rows[h].get("bias_scores") or {}),
+                        rows[h].get("credibility_score"), rows[h].get("rating"), now, product, h,
+                    )
+                    for h in hashes if h in known
+                ]
+                conn.executemany(
+                    "UPDATE reviews SET sentiment = ?, bias_scores = ?, credibility_score = ?, rating = ?, updated_at = ? "
+                    "WHERE product_id = ? AND text_hash = ?",
+                    values,
+                )
+
+                added_ids, added_vectors = [], []
+                for h, embedding in zip(new_hashes, embeddings if embeddings is not None else []):
+                    review = rows[h]
+                    cursor = conn.execute(
+                        "INSERT OR IGNORE INTO reviews (product_id, text_hash, product_review, rating, sentiment, "
+                        "bias_scores, credibility_score, embedding, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (
+                            product, h, review["product_review"], review.get("rating"),
+                            json.dumps(_sentiment(review)), json.dumps(review.get("bias_scores") or {}),
+                            review.get("credibility_score"), embedding.astype(np.float32).tobytes(), now,
+                        ),
+                    )
+                    # Another process may have indexed it since the lookup above
+                    if cursor.rowcount:
+                        added_ids.append(cursor.lastrowid)
+                        added_vectors.append(embedding)
+
+                index = self._read(product)
+                count = conn.execute("SELECT COUNT(*) FROM reviews WHERE product_id = ?", (product,)).fetchone()[0]
+                if not stale and index is not None and index.ntotal + len(added_ids) == count:
+                    if added_ids:
+                        index.add_with_ids(np.stack(added_vectors).astype(np.float32), np.array(added_ids, dtype=np.int64))
+                        self._write_index(product, index)
+                else:
+                    # Missing, out of step with the table, or from another model
+                    self._write_index(product, self._build(conn, product))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                # The cached index may hold vectors whose rows were just rolled back
+                self._loaded.pop(product, None)
+                raise
+        return len(added_ids)
+
+    def search(self, product: str, query: str, k: int) -> Optional[List[Dict[str, Any]]]:
+        """Top ``k`` reviews of the product for ``query``, or None when it has not been indexed.
+
+        Blocking: embeds the query and reads the index, so it runs in a thread.
+        """
+        if not os.path.exists(self._path(product)):
+            return None
+        vector = embed_query(query, self.model_name)[None, :]
+        # Held through the search as well: updates add to the cached index in place
+        with self._lock:
+            index = self._read(product)
+            if index is None or index.ntotal == 0:
+                return None if index is None else []
+            similarities, ids = index.search(vector, min(k, index.ntotal))
+            hits = [(int(row_id), float(similarity)) for row_id, similarity in zip(ids[0], similarities[0]) if row_id >= 0]
+            if not hits:
+                return []
+            rows = self._connection().execute(
+                "SELECT id, product_review, rating, sentiment, bias_scores, credibility_score FROM reviews "
+                f"WHERE product_id = ? AND id IN ({', '.join('?' * len(hits))})",
+                (product, *(row_id for row_id, _ in hits)),
+            ).fetchall()
+        by_id = {row[0]: row for row in rows}
+        results = []
+        for row_id, similarity in hits:
+            row = by_id.get(row_id)
+            if row is None:
+                continue
+            _, text, rating, sentiment, bias_scores, credibility = row
+            results.append({
+                "product_review": text,
+                "rating": rating,
+                "sentiment": json.loads(sentiment) if sentiment else None,
+                "bias_scores": json.loads(bias_scores) if bias_scores else {},
+                "credibility_score": credibility,
+                "similarity": similarity,
+            })
+        return results
+
+    def schedule(self, url: str, reviews: List[Dict[str, Any]]) -> None:
+        """Index reviews in the background so the analysis response is not held up."""
+        if not settings.REVIEW_INDEX_ENABLED or not reviews:
+            return
+        task = asyncio.get_running_loop().create_task(self._update(url, reviews))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _update(self, url: str, reviews: List[Dict[str, Any]]) -> None:
+        try:
+            await inference_executor.run(update_task, url, reviews)
+        except Exception as e:
+            print(f"Failed to index reviews for {url}: {str(e)}")
+            traceback.print_exc()
+
+    async def stop(self) -> None:
+        # Let in-flight updates finish; they run on the executor and cannot be interrupted
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+@lru_cache(maxsize=1024)
+def embed_query(query: str, model_name: str = settings.EMBEDDING_MODEL) -> np.ndarray:
+    return embed_texts([query], model_name)[0]
+
+review_index = ReviewIndex()
+
+# Module-level entry point so the process executor can pickle it
+def update_task(url: str, reviews: List[Dict[str, Any]]) -> int:
+    return review_index.update(url, reviews)
@@ -0,0 +1,151 @@
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse, parse_qsl, urlencode, urlunparse
+from app.core.config import settings
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Query parameters that only track where a click came from
+TRACKING_PARAMS = ("ref", "ref_", "tag", "psc", "th")
+
+def normalize_url(url: str) -> str:
+    """Canonical form of a product URL so equivalent links share a cache entry."""
+    parsed = urlparse(str(url).strip())
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+        if key not in TRACKING_PARAMS and not key.startswith("utm_")
+    )
+    return urlunparse((
+        parsed.scheme.lower(),
+        parsed.netloc.lower(),
+        parsed.path.rstrip("/") or "/",
+        "",
+        urlencode(query),
+        "",
+    ))
+
+def cache_key(url: str, pages: int) -> str:
+    return f"{normalize_url(url)}#pages={pages}"
+
+class MemoryScrapeCache:
+    """In-process scrape cache with LRU eviction. Expired entries are kept for incremental refresh."""
+
+    def __init__(self, max_entries: int = settings.SCRAPE_CACHE_MAX_ENTRIES):
+        self.max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        return {"reviews": [dict(r) for r in entry["reviews"]], "fetched_at": entry["fetched_at"]}
+
+    async def set(self, key: str, reviews: List[Dict[str, Any]]) -> None:
+        self._entries[key] = {"reviews": [dict(r) for r in reviews], "fetched_at": time.time()}
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+class SqliteScrapeCache:
+    """On-disk scrape cache shared by every worker on the node.
+
+    Entries older than ``max_age_s`` are dropped, as are the least recently
+    fetched ones once there are more than ``max_entries``.
+    """
+
+    def __init__(
+        self,
+        path: str = settings.SCRAPE_CACHE_PATH,
+        max_entries: int = settings.SCRAPE_CACHE_MAX_ENTRIES,
+        max_age_s: int = settings.SCRAPE_CACHE_MAX_AGE_S,
+    ):
+        self.path = path
+        self.max_entries = max(1, max_entries)
+        self.max_age_s = max_age_s
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        os.register_at_fork(after_in_child=self._reconnect)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS scrape_cache ("
+                "key TEXT PRIMARY KEY, reviews TEXT NOT NULL, fetched_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS scrape_cache_fetched_at ON scrape_cache (fetched_at)")
+            self._conn.commit()
+            self._count = self._conn.execute("SELECT COUNT(*) FROM scrape_cache").fetchone()[0]
+
+    def _reconnect(self) -> None:
+        # Forked workers open their own connection and leave the inherited one alone
+        self._inherited = self._conn
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._lock = threading.Lock()
+
+    def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT reviews, fetched_at FROM scrape_cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"reviews": json.loads(row[0]), "fetched_at": row[1]}
+
+    def _set(self, key: str, reviews: List[Dict[str, Any]]) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO scrape_cache (key, reviews, fetched_at) VALUES (?, ?, ?)",
+                (key, json.dumps(reviews), now),
+            )
+            # Indexed on fetched_at, so dropping aged entries on every write stays cheap
+            self._count -= self._conn.execute(
+                "DELETE FROM scrape_cache WHERE fetched_at < ?", (now - self.max_age_s,)
+            ).rowcount
+            # Replacements overcount; the exact count is re-read before evicting
+            self._count += 1
+            if self._count > self.max_entries:
+                self._count = self._conn.execute("SELECT COUNT(*) FROM scrape_cache").fetchone()[0]
+                overflow = self._count - self.max_entries
+                if overflow > 0:
+                    self._conn.execute(
+                        "DELETE FROM scrape_cache WHERE key IN ("
+                        "SELECT key FROM scrape_cache ORDER BY fetched_at LIMIT ?)",
+                        (overflow,),
+                    )
+                    self._count -= overflow
+            self._conn.commit()
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self._get, key)
+
+    async def set(self, key: str, reviews: List[Dict[str, Any]]) -> None:
+        await asyncio.to_thread(self._set, key, reviews)
+
+def is_fresh(entry: Dict[str, Any], ttl_s: int = settings.SCRAPE_CACHE_TTL_S) -> bool:
+    return time.time() - entry["fetched_at"] < ttl_s
+
+def merge_reviews(
+    new_reviews: List[Dict[str, Any]],
+    cached_reviews: List[Dict[str, Any]],
+    max_reviews: int = settings.SCRAPE_CACHE_MAX_REVIEWS,
+) -> List[Dict[str, Any]]:
+    """Put newly scraped reviews ahead of the cached ones, dropping any already cached.
+
+    Only the newest ``max_reviews`` are kept, so repeated refreshes do not grow an entry forever.
+    """
+    seen = {r["product_review"] for r in cached_reviews}
+    return ([r for r in new_reviews if r["product_review"] not in seen] + cached_reviews)[:max(1, max_reviews)]
+
+def create_scrape_cache():
+    if settings.SCRAPE_CACHE_BACKEND == "sqlite":
+        return SqliteScrapeCache()
+    if settings.SCRAPE_CACHE_BACKEND == "memory":
+        return MemoryScrapeCache()
+    return None
+
+scrape_cache = create_scrape_cache()
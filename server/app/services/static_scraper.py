@@ -0,0 +1,76 @@
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urljoin
+from bs4 import BeautifulSoup
+from app.services.http_client import http_client
+from app.services.domain_limiter import domain_limiter
+import asyncio
+
+REVIEW_SELECTOR = ".review"
+REVIEW_TEXT_SELECTOR = ".review-text, .a-size-base.review-text-content"
+REVIEW_RATING_SELECTOR = ".review-rating"
+NEXT_PAGE_SELECTOR = "li.a-last a"
+
+def parse_reviews(html: str, base_url: str) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Parse review nodes and the next-page URL from static HTML.
+
+    Uses the same selectors and filtering as the in-browser scraper so both
+    tiers return reviews in the same shape.
+    """
+    soup = BeautifulSoup(html, "lxml")
+
+    reviews = []
+    for review in soup.select(REVIEW_SELECTOR):
+        text_node = review.select_one(REVIEW_TEXT_SELECTOR)
+        rating_node = review.select_one(REVIEW_RATING_SELECTOR)
+        text = text_node.get_text(" ", strip=True) if text_node else ""
+        rating = rating_node.get_text(strip=True)[:1] if rating_node else ""
+        if len(text) > 10:
+            reviews.append({"text": text, "rating": rating or "0"})
+
+    next_link = soup.select_one(NEXT_PAGE_SELECTOR)
+    next_url = urljoin(base_url, next_link["href"]) if next_link and next_link.get("href") else None
+    return reviews, next_url
+
+async def fetch_html(url: str) -> Optional[str]:
+    """Fetch a page over the pooled session. Returns None on any non-200 or network error."""
+    try:
+        async with domain_limiter.limit(url):
+            async with http_client.session.get(str(url)) as response:
+                if response.status != 200:
+                    return None
+                return await response.text()
+    except Exception as e:
+        print(f"Static fetch failed for {url}: {str(e)}")
+        return None
+
+async def fetch_reviews(url: str) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Fetch and parse one review page without a browser."""
+    html = await fetch_html(url)
+    if not html:
+        return [], None
+    # Parsing is CPU-bound; keep it off the event loop
+    return await asyncio.to_thread(parse_reviews, html, str(url))
+
+async def fetch_conditional(
+    url: str,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
+) -> Tuple[int, Optional[str], Optional[str], Optional[str]]:
+    """Conditional GET returning (status, html, etag, last_modified).
+
+    A 304 returns no HTML and the validators that were sent. Network errors
+    propagate so callers can tell them apart from an unchanged page.
+    """
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    async with domain_limiter.limit(url):
+        async with http_client.session.get(str(url), headers=headers) as response:
+            if response.status == 304:
+                return 304, None, etag, last_modified
+            if response.status != 200:
+                return response.status, None, None, None
+            html = await response.text()
+            return 200, html, response.headers.get("ETag"), response.headers.get("Last-Modified")
@@ -0,0 +1,134 @@
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from app.core.config import settings
+import numpy as np
+
+def max_input_tokens(model_pipeline: Any) -> int:
+    """Longest input the model accepts, in tokens including special tokens."""
+    limit = model_pipeline.tokenizer.model_max_length
+    # Tokenizers without a recorded limit report a huge sentinel value
+    positions = getattr(model_pipeline.model.config, "max_position_embeddings", None)
+    if positions and (limit is None or limit > positions):
+        limit = positions
+    return limit
+
+def prep_revision(revision: str) -> str:
+    """Cache revision for results computed from prepared text; windowed scores differ from truncated ones."""
+    if settings.TEXT_MAX_WINDOWS <= 1:
+        return revision
+    return f"{revision}+w{settings.TEXT_MAX_WINDOWS}s{settings.TEXT_WINDOW_STRIDE}"
+
+def split_windows(
+    token_ids: List[List[int]],
+    budget: int,
+    max_windows: int = settings.TEXT_MAX_WINDOWS,
+    stride: int = settings.TEXT_WINDOW_STRIDE,
+) -> Tuple[List[List[int]], List[int]]:
+    """Cut each tokenized text into at most ``max_windows`` windows of ``budget`` tokens.
+
+    Consecutive windows overlap by ``stride`` tokens. With ``max_windows=1``
+    this is plain truncation. Returns the windows and, for each window, the
+    index of the text it came from.
+    """
+    budget = max(1, budget)
+    step = max(1, budget - stride)
+    windows, owners = [], []
+    for i, ids in enumerate(token_ids):
+        start = 0
+        for _ in range(max(1, max_windows)):
+            windows.append(ids[start:start + budget])
+            owners.append(i)
+            start += step
+            if start + stride >= len(ids):
+                break
+    return windows, owners
+
+def tokenize_windows(model_pipeline: Any, texts: List[str], reserved: int = 0) -> Tuple[List[List[int]], List[int]]:
+    """Tokenize texts once and window them to fit the model, leaving ``reserved`` tokens free.
+
+    ``reserved`` covers anything appended later, such as an NLI hypothesis;
+    special tokens are always accounted for.
+    """
+    tokenizer = model_pipeline.tokenizer
+    pair = reserved > 0
+    budget = max_input_tokens(model_pipeline) - reserved - tokenizer.num_special_tokens_to_add(pair=pair)
+    token_ids = tokenizer(texts, add_special_tokens=False, verbose=False)["input_ids"]
+    return split_windows(token_ids, budget)
+
+def length_buckets(
+    lengths: List[int],
+    max_batch_size: int,
+    max_batch_tokens: int = settings.BATCH_MAX_TOKENS,
+) -> Iterator[List[int]]:
+    """Group sequence indices into batches of similar length.
+
+    Indices are sorted by length and a batch is closed when it reaches
+    ``max_batch_size`` sequences or when padding every sequence to the
+    longest would exceed ``max_batch_tokens``.
+    """
+    batch: List[int] = []
+    for i in sorted(range(len(lengths)), key=lengths.__getitem__):
+        # Sorted ascending, so the newest sequence is always the longest in the batch
+        if batch and (len(batch) >= max_batch_size or (len(batch) + 1) * lengths[i] > max_batch_tokens):
+            yield batch
+            batch = []
+        batch.append(i)
+    if batch:
+        yield batch
+
+def model_inputs(tokenizer: Any, ids: List[int], pair_ids: Optional[List[int]] = None) -> Dict[str, List[int]]:
+    """Model inputs for already tokenized text (and an optional second segment), as the tokenizer builds them.
+
+    Includes every key the model takes, such as ``token_type_ids`` for BERT-style pairs.
+    """
+    return dict(tokenizer.prepare_for_model(ids, pair_ids, add_special_tokens=True, verbose=False))
+
+def forward_logits(model_pipeline: Any, sequences: List[Dict[str, List[int]]], max_batch_size: int) -> np.ndarray:
+    """Logits for each sequence of model inputs (from ``model_inputs``), in input order."""
+    import torch
+    model, tokenizer = model_pipeline.model, model_pipeline.tokenizer
+    logits = np.zeros((len(sequences), model.config.num_labels), dtype=np.float32)
+    with torch.inference_mode():
+        for indices in length_buckets([len(inputs["input_ids"]) for inputs in sequences], max_batch_size):
+            # Pads every key the tokenizer returned, not just the input ids
+            inputs = tokenizer.pad(
+                [sequences[i] for i in indices],
+                return_tensors="pt",
+            ).to(model_pipeline.device)
+            logits[indices] = model(**inputs).logits.float().cpu().numpy()
+    return logits
+
+def softmax(logits: np.ndarray) -> np.ndarray:
+    exp_logits = np.exp(logits - logits.max(-1, keepdims=True))
+    return exp_logits / exp_logits.sum(-1, keepdims=True)
+
+def aggregate_windows(scores: np.ndarray, owners: List[int], weights: List[int], count: int) -> np.ndarray:
+    """Average per-window scores into per-text scores, weighting each window by its token count."""
+    owners_arr = np.asarray(owners, dtype=np.int64)
+    weights_arr = np.asarray(weights, dtype=np.float64)[:, None]
+    totals = np.zeros((count, scores.shape[1]), dtype=np.float64)
+    np.add.at(totals, owners_arr, scores * weights_arr)
+    norm = np.bincount(owners_arr, weights=weights_arr[:, 0], minlength=count)[:, None]
+    return (totals / np.maximum(norm, 1e-9)).astype(np.float32)
+
+def classify(model_pipeline: Any, texts: List[str], max_batch_size: int = settings.INFERENCE_MAX_BATCH_SIZE) -> List[dict]:
+    """Top label and score per text, as the text-classification pipeline returns them.
+
+    Long texts are truncated by tokens, or scored window by window and
+    averaged when TEXT_MAX_WINDOWS > 1.
+    """
+    if not texts:
+        return []
+    tokenizer = model_pipeline.tokenizer
+    windows, owners = tokenize_windows(model_pipeline, texts)
+    sequences = [model_inputs(tokenizer, window) for window in windows]
+    logits = forward_logits(model_pipeline, sequences, max_batch_size)
+    config = model_pipeline.model.config
+    # Same activation the pipeline picks: sigmoid for single-logit or multi-label heads
+    if config.num_labels == 1 or config.problem_type == "multi_label_classification":
+        probabilities = 1 / (1 + np.exp(-logits))
+    else:
+        probabilities = softmax(logits)
+    scores = aggregate_windows(probabilities, owners, [max(1, len(window)) for window in windows], len(texts))
+
+    id2label = model_pipeline.model.config.id2label
+    return [{"label": id2label[int(row.argmax())], "score": row.max().item()} for row in scores]
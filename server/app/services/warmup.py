@@ -0,0 +1,132 @@
+from typing import Any, Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.services.browser_pool import browser_pool
+from app.services.executor import inference_executor
+from app.services.model_registry import model_registry, backend_for
+import asyncio
+import gc
+import traceback
+
+WARMUP_TEXT = "Arrived on time and works as described."
+
+def warm_model(task: str, model_name: str) -> None:
+    """Load a model into the registry and run one input through it.
+
+    Module-level so process-pool workers can run it; each worker warms its own copy.
+    """
+    if task == "sentiment-analysis":
+        from app.services.inference_queue import run_pipeline
+        run_pipeline(task, model_name, [WARMUP_TEXT])
+    elif task == "zero-shot-classification":
+        from app.services.bias_detector import get_bias_detector
+        get_bias_detector(model_name).score([WARMUP_TEXT])
+    else:
+        from app.services.embedder import embed_texts
+        embed_texts([WARMUP_TEXT], model_name)
+
+class Warmup:
+    """Loads models and starts the browser pool in the background after startup.
+
+    Each component is "pending", "warming", "ready" or "failed". The replica
+    is ready once every required component is ready; the browser is only
+    required when WARMUP_REQUIRE_BROWSER is set, since most pages are
+    scraped over plain HTTP.
+    """
+
+    def __init__(self):
+        self.components: Dict[str, str] = {}
+        self.errors: Dict[str, str] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def models(self) -> List[Tuple[str, str, str]]:
+        models = [
+            ("sentiment", "sentiment-analysis", settings.SENTIMENT_MODEL),
+            ("bias", "zero-shot-classification", settings.BIAS_MODEL),
+        ]
+        if settings.NEAR_DUPLICATE_DETECTION or settings.REVIEW_INDEX_ENABLED:
+            models.append(("embedding", "feature-extraction", settings.EMBEDDING_MODEL))
+        return models
+
+    def start(self) -> None:
+        self.components = {name: "pending" for name, _, _ in self.models()}
+        self.components["browser"] = "pending"
+        self.errors = {}
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    async def _run(self) -> None:
+        # The browser launches while the first model loads
+        await asyncio.gather(self._warm_browser(), self._warm_models())
+
+    async def _warm_browser(self) -> None:
+        self.components["browser"] = "warming"
+        try:
+            await browser_pool.start()
+            self.components["browser"] = "ready"
+        except Exception as e:
+            # The pool retries on the first browser scrape
+            self._fail("browser", e)
+
+    async def _warm_models(self) -> None:
+        # Sequential: loading several large models at once only competes for memory and disk
+        for name, task, model_name in self.models():
+            self.components[name] = "warming"
+            try:
+                # In process mode every worker holds its own models
+                runs = inference_executor.workers if inference_executor.kind == "process" else 1
+                await asyncio.gather(*(inference_executor.run(warm_model, task, model_name) for _ in range(runs)))
+                self.components[name] = "ready"
+            except Exception as e:
+                self._fail(name, e)
+
+    def _fail(self, name: str, error: Exception) -> None:
+        self.components[name] = "failed"
+        self.errors[name] = str(error)
+        print(f"Warmup of {name} failed: {str(error)}")
+        traceback.print_exc()
+
+    @property
+    def ready(self) -> bool:
+        if not settings.WARMUP_ENABLED:
+            return True
+        required = [name for name in self.components if name != "browser" or settings.WARMUP_REQUIRE_BROWSER]
+        return bool(required) and all(self.components[name] == "ready" for name in required)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "components": dict(self.components),
+            "errors": dict(self.errors),
+        }
+
+warmup = Warmup()
+
+def preload_models() -> None:
+    """Load the configured models in the parent process before workers are forked.
+
+    Forked workers then share the weights copy-on-write instead of each
+    loading its own copy. Nothing is run through the models here: torch's
+    thread pools are not fork-safe once used. ONNX Runtime sessions are not
+    fork-safe either, so ONNX models are left for each worker to load.
+    """
+    for name, task, model_name in warmup.models():
+        if backend_for(model_name) == "onnx":
+            print(f"Not preloading {model_name}: ONNX sessions are loaded per worker")
+            continue
+        try:
+            model_registry.get(task, model_name)
+            print(f"Preloaded {name} model {model_name}")
+        except Exception as e:
+            # The workers load it themselves on warmup
+            print(f"Preloading {model_name} failed: {str(e)}")
+    # Stop the garbage collector from writing to the headers of everything loaded
+    # so far, which would copy the pages holding them into each worker
+    gc.freeze()
@@ -0,0 +1,150 @@
+"""Offline benchmarks for scraping, inference, credibility and the analyze endpoint.
+
+    python -m benchmarks run [--suite scrape sentiment batch bias credibility e2e] [--models stub|real]
+    python -m benchmarks compare results/baseline.json results/current.json
+
+Run from the server directory. Nothing leaves the machine: review pages come
+from a local fixture server and, by default, the models are replaced by
+deterministic stubs. With ``--models real`` the configured models are used,
+so point SENTIMENT_MODEL/BIAS_MODEL at small local checkpoints and set
+HF_HUB_OFFLINE=1 to keep it offline.
+"""
+from typing import Any, Dict, List
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+
+SUITES = ("scrape", "sentiment", "batch", "bias", "credibility", "e2e")
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+def configure_environment(models: str) -> None:
+    """Settings are read at import time, so this must run before any app module is imported."""
+    # Caches would turn repeated runs into lookups; measure the work itself
+    os.environ.setdefault("SCRAPE_CACHE_BACKEND", "none")
+    os.environ.setdefault("INFERENCE_CACHE_BACKEND", "none")
+    # Quotas and admission limits would reject the benchmark's own load
+    os.environ.setdefault("ADMISSION_ENABLED", "false")
+    # Indexing runs after the response and would only compete for the inference executor
+    os.environ.setdefault("REVIEW_INDEX_ENABLED", "false")
+    # The Supabase client only needs well-formed values; the benchmarks never call it
+    os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:54321")
+    os.environ.setdefault("SUPABASE_KEY", "benchmark.benchmark.benchmark")
+    if models == "stub":
+        # Near-duplicate detection needs the embedding model
+        os.environ.setdefault("NEAR_DUPLICATE_DETECTION", "false")
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+def run(args: argparse.Namespace) -> int:
+    configure_environment(args.models)
+    from benchmarks.fixtures import FixtureServer
+    from benchmarks.stubs import StubModels
+    from benchmarks import suites
+
+    stubs = StubModels(item_cost_ms=args.stub_cost_ms).install() if args.models == "stub" else None
+    fixtures = FixtureServer(pages=max(args.pages), per_page=args.per_page).start()
+    results: List[Dict[str, Any]] = []
+    try:
+        async def run_async() -> None:
+            if "scrape" in args.suite:
+                results.extend(await suites.bench_scrape(fixtures, args.pages, args.repeat))
+            if "sentiment" in args.suite:
+                results.extend(await suites.bench_sentiment(args.inference_sizes, args.repeat))
+            if "batch" in args.suite:
+                results.extend(await suites.bench_batch(fixtures, args.batch_products, args.repeat))
+
+        asyncio.run(run_async())
+        suites.reset_loop_state()
+        if "bias" in args.suite:
+            results.extend(suites.bench_bias(args.inference_sizes, args.repeat))
+        if "credibility" in args.suite:
+            results.extend(suites.bench_credibility(args.credibility_sizes, args.repeat))
+        if "e2e" in args.suite:
+            results.extend(suites.bench_end_to_end(fixtures, args.pages, args.repeat))
+    finally:
+        fixtures.stop()
+        if stubs is not None:
+            stubs.uninstall()
+
+    for result in results:
+        latency = result["latency_ms"]
+        params = " ".join(f"{key}={value}" for key, value in result["params"].items())
+        print(
+            f"{result['name']:<12} {params:<28} p50 {latency['p50']:9.2f} ms  p90 {latency['p90']:9.2f} ms  "
+            f"p99 {latency['p99']:9.2f} ms  {result['throughput_items_s']:11.1f} items/s  "
+            f"rss {result['peak_rss_mb']:7.1f} MB"
+        )
+
+    report = {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "commit": git_commit(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "models": args.models,
+        "results": results,
+    }
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        output = os.path.join(RESULTS_DIR, f"{stamp}-{report['commit']}.json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+    return 0
+
+def compare(args: argparse.Namespace) -> int:
+    from benchmarks.harness import compare as compare_results
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.current, encoding="utf-8") as f:
+        current = json.load(f)
+
+    rows = compare_results(baseline, current, args.threshold)
+    for row in rows:
+        before, after = row["p50_ms"]
+        flag = "REGRESSED" if row["regressed"] else ""
+        print(
+            f"{row['benchmark']:<48} p50 {before:9.2f} -> {after:9.2f} ms ({row['p50_change']:+.1%})  "
+            f"throughput {row['throughput_change']:+.1%}  {flag}"
+        )
+    return 1 if any(row["regressed"] for row in rows) else 0
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run benchmarks and write a JSON report")
+    run_parser.add_argument("--suite", nargs="+", choices=SUITES, default=list(SUITES))
+    run_parser.add_argument("--models", choices=["stub", "real"], default="stub")
+    run_parser.add_argument("--stub-cost-ms", type=float, default=0.0, help="Simulated model time per review")
+    run_parser.add_argument("--repeat", type=int, default=5)
+    run_parser.add_argument("--pages", type=int, nargs="+", default=[1, 5])
+    run_parser.add_argument("--per-page", type=int, default=10)
+    run_parser.add_argument("--batch-products", type=int, nargs="+", default=[5, 20])
+    run_parser.add_argument("--inference-sizes", type=int, nargs="+", default=[10, 100, 1000])
+    run_parser.add_argument("--credibility-sizes", type=int, nargs="+", default=[10, 100, 1000, 10000, 100000])
+    run_parser.add_argument("--output", help="Report path (defaults to benchmarks/results/<time>-<commit>.json)")
+
+    compare_parser = commands.add_parser("compare", help="Compare two reports and flag regressions")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.10, help="Allowed fractional slowdown")
+
+    args = parser.parse_args()
+    return run(args) if args.command == "run" else compare(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
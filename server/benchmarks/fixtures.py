@@ -0,0 +1,111 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+import hashlib
+import html
+import random
+import threading
+
+OPENINGS = [
+    "I bought this for my kitchen", "Ordered this as a gift", "Got this after reading the reviews",
+    "Second one I have owned", "Picked this up on sale", "My partner recommended this",
+]
+BODIES = [
+    "and it works exactly as described", "but the build quality is disappointing",
+    "and the battery lasts a full day", "though setup took longer than expected",
+    "and it arrived two days early", "but it stopped working after a month",
+    "and the instructions were clear", "but customer support never replied",
+]
+CLOSINGS = [
+    "Would recommend to anyone.", "Not worth the money.", "Overall happy with it.",
+    "BEST PURCHASE EVER!!!", "Returned it the next week.", "Five stars, no complaints.",
+]
+FILLER = "honestly the size colour packaging price delivery fit finish sound screen grip strap lid handle".split()
+
+def synthetic_reviews(count: int, seed: int = 0, duplicate_rate: float = 0.05) -> List[Dict[str, Any]]:
+    """Deterministic review dicts shaped like scraped reviews, with a share of exact duplicates."""
+    rng = random.Random(seed)
+    reviews = []
+    for _ in range(count):
+        if reviews and rng.random() < duplicate_rate:
+            reviews.append(dict(rng.choice(reviews)))
+            continue
+        filler = " ".join(rng.choice(FILLER) for _ in range(rng.randint(0, 60)))
+        text = f"{rng.choice(OPENINGS)} {rng.choice(BODIES)}. {filler} {rng.choice(CLOSINGS)}"
+        reviews.append({"product_review": text.strip(), "rating": rng.randint(1, 5)})
+    return reviews
+
+def review_page(reviews: List[Dict[str, Any]], next_href: Optional[str]) -> str:
+    """Review page HTML matching the static and browser scrapers' selectors."""
+    items = "".join(
+        '<div class="review">'
+        f'<span class="review-rating">{review["rating"]}.0 out of 5 stars</span>'
+        f'<span class="review-text">{html.escape(review["product_review"])}</span>'
+        "</div>"
+        for review in reviews
+    )
+    pager = f'<ul><li class="a-last"><a href="{next_href}">Next page</a></li></ul>' if next_href else ""
+    return f"<html><body><div id=\"reviews\">{items}</div>{pager}</body></html>"
+
+class FixtureServer:
+    """Local HTTP server for review pages at /product/<id>?pageNumber=<n>.
+
+    Each product has ``pages`` pages of ``per_page`` synthetic reviews,
+    generated deterministically from the product id.
+    """
+
+    def __init__(self, pages: int = 10, per_page: int = 10, host: str = "127.0.0.1"):
+        self.pages = pages
+        self.per_page = per_page
+        self.host = host
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self._cache: Dict[Any, bytes] = {}
+
+    def url(self, product_id: str = "1") -> str:
+        return f"http://{self.host}:{self._server.server_address[1]}/product/{product_id}?pageNumber=1"
+
+    def render(self, product_id: str, page: int) -> Optional[bytes]:
+        if page < 1 or page > self.pages:
+            return None
+        key = (product_id, page)
+        if key not in self._cache:
+            seed = int(hashlib.sha1(f"{product_id}:{page}".encode()).hexdigest()[:8], 16)
+            reviews = synthetic_reviews(self.per_page, seed=seed, duplicate_rate=0)
+            next_href = f"/product/{product_id}?pageNumber={page + 1}" if page < self.pages else None
+            self._cache[key] = review_page(reviews, next_href).encode()
+        return self._cache[key]
+
+    def start(self) -> "FixtureServer":
+        fixtures = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                parts = parsed.path.strip("/").split("/")
+                page = parse_qs(parsed.query).get("pageNumber", ["1"])[0]
+                body = None
+                if len(parts) == 2 and parts[0] == "product" and page.isdigit():
+                    body = fixtures.render(parts[1], int(page))
+                if body is None:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, 0), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
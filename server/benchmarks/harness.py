@@ -0,0 +1,108 @@
+from typing import Any, Awaitable, Callable, Dict, List, Sequence
+import gc
+import resource
+import sys
+import time
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far, in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def percentile(samples: Sequence[float], q: float) -> float:
+    """Linearly interpolated percentile, ``q`` in [0, 100]."""
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+def summarize(name: str, params: Dict[str, Any], items: int, samples: List[float]) -> Dict[str, Any]:
+    """Benchmark record: latency percentiles in ms, items per second and peak RSS."""
+    latencies = [sample * 1000 for sample in samples]
+    total = sum(samples)
+    return {
+        "name": name,
+        "params": params,
+        "items": items,
+        "repeat": len(samples),
+        "latency_ms": {
+            "mean": total * 1000 / len(samples),
+            "min": min(latencies),
+            "p50": percentile(latencies, 50),
+            "p90": percentile(latencies, 90),
+            "p99": percentile(latencies, 99),
+            "max": max(latencies),
+        },
+        "throughput_items_s": items * len(samples) / total if total > 0 else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+def measure(
+    name: str,
+    func: Callable[[], Any],
+    items: int,
+    repeat: int = 5,
+    warmup: int = 1,
+    params: Dict[str, Any] = None,
+) -> Dict[str, Any]:
+    """Time ``func`` ``repeat`` times after ``warmup`` untimed calls."""
+    for _ in range(warmup):
+        func()
+    gc.collect()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return summarize(name, params or {}, items, samples)
+
+async def ameasure(
+    name: str,
+    func: Callable[[], Awaitable[Any]],
+    items: int,
+    repeat: int = 5,
+    warmup: int = 1,
+    params: Dict[str, Any] = None,
+) -> Dict[str, Any]:
+    """``measure`` for coroutines, run on the caller's event loop."""
+    for _ in range(warmup):
+        await func()
+    gc.collect()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await func()
+        samples.append(time.perf_counter() - start)
+    return summarize(name, params or {}, items, samples)
+
+def result_key(result: Dict[str, Any]) -> str:
+    params = ",".join(f"{key}={value}" for key, value in sorted(result["params"].items()))
+    return f"{result['name']}[{params}]"
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float = 0.10) -> List[Dict[str, Any]]:
+    """Per-benchmark change in p50 latency and throughput between two runs.
+
+    A benchmark regresses when its p50 latency grows, or its throughput
+    drops, by more than ``threshold`` (a fraction).
+    """
+    baseline_results = {result_key(result): result for result in baseline["results"]}
+    rows = []
+    for result in current["results"]:
+        key = result_key(result)
+        before = baseline_results.get(key)
+        if before is None:
+            continue
+        p50_change = result["latency_ms"]["p50"] / max(before["latency_ms"]["p50"], 1e-9) - 1
+        throughput_change = result["throughput_items_s"] / max(before["throughput_items_s"], 1e-9) - 1
+        rows.append({
+            "benchmark": key,
+            "p50_ms": (before["latency_ms"]["p50"], result["latency_ms"]["p50"]),
+            "p50_change": p50_change,
+            "throughput_change": throughput_change,
+            "regressed": p50_change > threshold or throughput_change < -threshold,
+        })
+    return rows
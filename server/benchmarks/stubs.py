@@ -0,0 +1,59 @@
+from typing import Any, Dict, List
+import hashlib
+import time
+
+def _unit(text: str, salt: str = "") -> float:
+    """Deterministic pseudo-score in [0, 1) for a text."""
+    digest = hashlib.blake2b(f"{salt}{text}".encode(), digest_size=4).digest()
+    return int.from_bytes(digest, "big") / 2 ** 32
+
+class StubModels:
+    """Replace model inference with cheap deterministic functions.
+
+    Everything around the models (batching, caching, executors, scraping,
+    credibility, serialization) still runs for real. ``item_cost_ms``
+    simulates per-review model time.
+    """
+
+    def __init__(self, item_cost_ms: float = 0.0):
+        self.item_cost_ms = item_cost_ms
+        self._originals: List[Any] = []
+
+    def _cost(self, count: int) -> None:
+        if self.item_cost_ms > 0:
+            time.sleep(self.item_cost_ms * count / 1000)
+
+    def run_pipeline(self, task: str, model_name: str, texts: List[str]) -> List[Dict[str, Any]]:
+        self._cost(len(texts))
+        results = []
+        for text in texts:
+            score = _unit(text, task)
+            results.append({"label": "POSITIVE" if score >= 0.5 else "NEGATIVE", "score": max(score, 1 - score)})
+        return results
+
+    def bias_score(self, detector: Any, texts: List[str]) -> List[Dict[str, float]]:
+        self._cost(len(texts))
+        results = []
+        for text in texts:
+            raw = {label: _unit(text, label) + 1e-6 for label in detector.labels}
+            total = sum(raw.values())
+            results.append(dict(sorted(((label, value / total) for label, value in raw.items()), key=lambda item: -item[1])))
+        return results
+
+    def install(self) -> "StubModels":
+        from app.services import inference_queue
+        from app.services.bias_detector import BiasDetector
+
+        stubs = self
+        self._originals = [
+            (inference_queue, "run_pipeline", inference_queue.run_pipeline),
+            (BiasDetector, "score", BiasDetector.score),
+        ]
+        inference_queue.run_pipeline = self.run_pipeline
+        BiasDetector.score = lambda detector, texts: stubs.bias_score(detector, texts)
+        return self
+
+    def uninstall(self) -> None:
+        for owner, name, original in self._originals:
+            setattr(owner, name, original)
+        self._originals = []
@@ -0,0 +1,128 @@
+from typing import Any, Dict, List
+from benchmarks.fixtures import FixtureServer, synthetic_reviews
+from benchmarks.harness import ameasure, measure
+import asyncio
+
+def reset_loop_state() -> None:
+    """Drop loop-bound singletons so the next event loop starts clean."""
+    from app.services.domain_limiter import domain_limiter
+    from app.services.http_client import http_client
+
+    domain_limiter._semaphores.clear()
+    if http_client._session is not None and not http_client._session.closed:
+        asyncio.run(http_client.stop())
+    http_client._session = None
+
+async def bench_scrape(fixtures: FixtureServer, pages: List[int], repeat: int) -> List[Dict[str, Any]]:
+    """Static-tier scraping of fixture pages through extract_reviews, without the scrape cache."""
+    from app.services.product_analyzer import ProductAnalyzer
+
+    analyzer = ProductAnalyzer()
+    results = []
+    for count in pages:
+        url = fixtures.url(f"scrape-{count}")
+        reviews = await analyzer.extract_reviews(url, count, use_cache=False)
+        results.append(await ameasure(
+            "scrape", lambda: analyzer.extract_reviews(url, count, use_cache=False),
+            items=len(reviews), repeat=repeat, params={"pages": count},
+        ))
+    return results
+
+async def bench_sentiment(sizes: List[int], repeat: int) -> List[Dict[str, Any]]:
+    """analyze_sentiment through the shared batcher and inference executor."""
+    from app.services.product_analyzer import ProductAnalyzer
+
+    analyzer = ProductAnalyzer()
+    results = []
+    for size in sizes:
+        reviews = synthetic_reviews(size, seed=size)
+        results.append(await ameasure(
+            "sentiment", lambda: analyzer.analyze_sentiment(reviews),
+            items=size, repeat=repeat, params={"reviews": size},
+        ))
+    return results
+
+async def bench_batch(fixtures: FixtureServer, products: List[int], repeat: int) -> List[Dict[str, Any]]:
+    """run_batch_analysis over several fixture products against analyzing them one by one."""
+    from app.core.config import settings
+    from app.services.analysis import run_analysis, run_batch_analysis
+
+    model_name = settings.SENTIMENT_MODEL
+    results = []
+    for count in products:
+        urls = [fixtures.url(f"batch-{count}-{i}") for i in range(count)]
+        items = count * fixtures.per_page
+
+        async def one_by_one():
+            for url in urls:
+                await run_analysis(url, 1, model_name)
+
+        results.append(await ameasure(
+            "batch", lambda: run_batch_analysis(urls, 1, model_name),
+            items=items, repeat=repeat, params={"products": count, "mode": "batch"},
+        ))
+        results.append(await ameasure(
+            "batch", one_by_one, items=items, repeat=repeat, params={"products": count, "mode": "sequential"},
+        ))
+    return results
+
+def bench_bias(sizes: List[int], repeat: int) -> List[Dict[str, Any]]:
+    from app.services.product_analyzer import ProductAnalyzer
+
+    analyzer = ProductAnalyzer()
+    results = []
+    for size in sizes:
+        reviews = synthetic_reviews(size, seed=size)
+        results.append(measure(
+            "bias", lambda: analyzer.detect_bias(reviews),
+            items=size, repeat=repeat, params={"reviews": size},
+        ))
+    return results
+
+def bench_credibility(sizes: List[int], repeat: int) -> List[Dict[str, Any]]:
+    from app.services.product_analyzer import ProductAnalyzer
+
+    analyzer = ProductAnalyzer()
+    results = []
+    for size in sizes:
+        reviews = synthetic_reviews(size, seed=size)
+        results.append(measure(
+            "credibility", lambda: analyzer.assess_credibility(reviews),
+            items=size, repeat=repeat, params={"reviews": size},
+        ))
+    return results
+
+def bench_end_to_end(fixtures: FixtureServer, pages: List[int], repeat: int) -> List[Dict[str, Any]]:
+    """POST /api/v1/products/analyze through the FastAPI test client, default and compact formats."""
+    from fastapi.testclient import TestClient
+    from main import app
+    from app.api.deps import get_current_user
+    from app.core.config import settings
+    from app.schemas.user import User
+
+    app.dependency_overrides[get_current_user] = lambda: User(id="benchmark", full_name="Benchmark")
+    endpoint = f"{settings.API_V1_STR}/products/analyze"
+    results = []
+    try:
+        with TestClient(app) as client:
+            for count in pages:
+                for format in ("default", "compact"):
+                    payload = {"url": fixtures.url(f"e2e-{count}"), "pages": count}
+                    params = {"format": "compact"} if format == "compact" else None
+                    headers = {"Accept-Encoding": "gzip, br"}
+
+                    def request():
+                        response = client.post(endpoint, json=payload, params=params, headers=headers)
+                        response.raise_for_status()
+                        return response
+
+                    items = count * fixtures.per_page
+                    result = measure(
+                        "end_to_end", request, items=items, repeat=repeat,
+                        params={"pages": count, "format": format},
+                    )
+                    result["response_bytes"] = int(request().headers.get("content-length", 0))
+                    results.append(result)
+    finally:
+        app.dependency_overrides.pop(get_current_user, None)
+    return results
@@ -0,0 +1,55 @@
+"""Gunicorn settings for serving with several Uvicorn workers.
+
+    gunicorn -c gunicorn.conf.py main:app
+
+The app is imported and its models loaded once in the master process, then
+the workers are forked from it. Model weights are shared copy-on-write, so
+each extra worker costs its own activations and Python heap rather than a
+full set of models.
+"""
+import fcntl
+import os
+import shutil
+import sys
+
+# gunicorn does not put the app directory on sys.path until after reading this file
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from app.core.config import settings
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+# Read from settings so the app's per-worker sizing sees the same count
+workers = settings.WEB_CONCURRENCY
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+accesslog = "-"
+
+# Metric files left by an earlier run would be added to this one's. Cleared
+# here, before the app is imported and its metrics created.
+if settings.PROMETHEUS_MULTIPROC_DIR:
+    shutil.rmtree(settings.PROMETHEUS_MULTIPROC_DIR, ignore_errors=True)
+    os.makedirs(settings.PROMETHEUS_MULTIPROC_DIR)
+
+def on_starting(server):
+    # preload_app has already imported main, so the registry exists here
+    if settings.PRELOAD_MODELS:
+        from app.services.warmup import preload_models
+        preload_models()
+
+def post_fork(server, worker):
+    # The price scheduler runs in one worker: whichever holds the lock. The
+    # lock is released when that worker exits, so its replacement takes over.
+    if not settings.PRICE_TRACKING_ENABLED:
+        return
+    worker.price_lock = open(settings.PRICE_LOCK_PATH, "w")
+    try:
+        fcntl.flock(worker.price_lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        worker.price_lock.close()
+        settings.PRICE_TRACKING_ENABLED = False
+
+def child_exit(server, worker):
+    # Drop the exited worker's queue depths from /metrics; its counters and histograms are kept
+    if settings.PROMETHEUS_MULTIPROC_DIR:
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
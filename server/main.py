@@ -1,13 +1,46 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response, status
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
 from app.api.v1.api import api_router
+from app.services.browser_pool import browser_pool
+from app.services.http_client import http_client
+from app.services.analysis_jobs import analysis_jobs
+from app.services.executor import inference_executor
+from app.services.metrics import ServerTimingMiddleware, queue_depths, render_metrics
+from app.services.warmup import warmup
+from app.services.price_tracker import price_tracker
+from app.services.review_index import review_index
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Models and the shared browser load in the background so the server binds
+    # immediately; /health/ready reports when they are warm. Without warmup they
+    # load on first use.
+    if settings.WARMUP_ENABLED:
+        warmup.start()
+    await analysis_jobs.start()
+    queue_depths.start()
+    # The price scheduler should run in one process only; disable it on the other workers
+    if settings.PRICE_TRACKING_ENABLED:
+        await price_tracker.start()
+    yield
+    await warmup.stop()
+    await queue_depths.stop()
+    await price_tracker.stop()
+    await analysis_jobs.stop()
+    await review_index.stop()
+    await browser_pool.stop()
+    await http_client.stop()
+    inference_executor.shutdown()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version=settings.VERSION,
     description=settings.DESCRIPTION,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan
 )
 
 # Set up CORS middleware
@@ -19,9 +52,29 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-request stage timings as a Server-Timing header
+app.add_middleware(ServerTimingMiddleware)
+
 # Include API router
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
 @app.get("/")
 async def root():
-    return {"message": "Welcome to SurfMarc API"} 
\ No newline at end of file
+    return {"message": "Welcome to SurfMarc API"} 
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+@app.get("/health/live", include_in_schema=False)
+async def liveness():
+    return {"status": "alive"}
+
+@app.get("/health/ready", include_in_schema=False)
+async def readiness():
+    state = warmup.status()
+    return JSONResponse(
+        content=state,
+        status_code=status.HTTP_200_OK if state["ready"] else status.HTTP_503_SERVICE_UNAVAILABLE,
+    )
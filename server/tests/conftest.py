@@ -0,0 +1,13 @@
+import os
+import sys
+import tempfile
+
+# The app reads its settings at import time; point the stores at a scratch directory
+# and give the Supabase client placeholder credentials so importing it does not fail
+_scratch = tempfile.mkdtemp(prefix="surfmarc-tests-")
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "test.test.test")
+os.environ.setdefault("PRICE_STORE_BACKEND", "sqlite")
+os.environ.setdefault("PRICE_STORE_PATH", os.path.join(_scratch, "price_tracking.db"))
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
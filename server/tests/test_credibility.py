@@ -0,0 +1,85 @@
+from collections import Counter
+import random
+import re
+
+import pytest
+
+from app.services.credibility import ASCII_CHUNK_SIZE, score_credibility
+
+def reference_score(review: str, review_counts: Counter, near_duplicate: bool = False) -> int:
+    """The original per-review scorer, kept verbatim as the behaviour score_credibility must match."""
+    credibility_score = 100
+    if len(review.split()) < 20:
+        credibility_score -= 30
+    if re.search(r'\b(BUY|SCAM|FAKE|BEST|AMAZING|PERFECT|MUST-HAVE|LIFE-CHANGING|WASTE OF MONEY|DO NOT BUY|GARBAGE)\b', review, re.IGNORECASE):
+        credibility_score -= 25
+    if re.search(r'!{3,}|\?{3,}|\b[A-Z]{5,}\b', review):
+        credibility_score -= 20
+    words = review.lower().split()
+    if words and Counter(words).most_common(1)[0][1] > 3:
+        credibility_score -= 20
+    if review_counts[review.lower()] > 1:
+        credibility_score -= 40
+    elif near_duplicate:
+        credibility_score -= 30
+    return max(0, credibility_score)
+
+def assert_matches_reference(texts, near_duplicates=None):
+    counts = Counter(text.lower() for text in texts)
+    flags = near_duplicates or [False] * len(texts)
+    expected = [reference_score(text, counts, flag) for text, flag in zip(texts, flags)]
+    assert score_credibility(texts, near_duplicates=near_duplicates).tolist() == expected
+
+EDGE_CASES = [
+    # Marketing terms: case, word boundaries, separators, multi-word phrases
+    "buy", "BUY BUY BUY BUY", "x_best", "best_x", "1best", "buyers", "rebuy", "MUST-HAVE", "must -have", "must-have!",
+    "life-changing!", "waste of money", "waste of  money", "waste  of money", "Waste Of Money!!", "do not buy",
+    "DONOTBUY", "garbage.", "(amazing)", "perfect,best", "scam\tfake",
+    # Shouting: punctuation runs and capitals words of 4, 5 and more letters
+    "end???", "!!\n!", "??? ?", "?!?", "ABCD!!", "ABCDE", "ABCDEF1", "_ABCDE", "ABCDE_", "xABCDE", "ABCDEFGHIJKLMNOPQRS",
+    # Repetition across whitespace kinds and packed-word boundaries (8, 9, 16 and 17 bytes)
+    "a a a a", "a a a", "best\nbest best\tbest", "eightchr eightchr eightchr eightchr",
+    "ninechars ninechars ninechars ninechars", "sixteencharacter sixteencharacter sixteencharacter sixteencharacter",
+    "seventeencharacte seventeencharacte seventeencharacte seventeencharacte",
+    "abcdefghijklmnopq abcdefghijklmnopr abcdefghijklmnopq abcdefghijklmnopq abcdefghijklmnopq",
+    "EIGHTCHR eightchr Eightchr eightchR", "x\x1cx\x1dx\x1ex\x1fx", "a\x0bb\x0cc a a a",
+    # Non-ASCII text and NUL take the per-review fallback
+    "Très BESTé produit!!!", "İSTANBUL GREAT", "ſcam here", "über über über über", "x ÜBERALLES y", "ABCDé",
+    "éABCDE", "buyé", "ébuy", "best best best best", "emoji 👍 BEST", "nul\0best", "\0\0\0\0",
+    # Long reviews that escape the short-review penalty
+    " ".join(["word"] * 19), " ".join(["word%d" % i for i in range(20)]), " ".join(["word%d" % i for i in range(25)]) + " BUY",
+]
+
+@pytest.mark.parametrize("text", EDGE_CASES)
+def test_edge_cases_match_reference(text):
+    assert_matches_reference([text])
+
+def test_edge_cases_together_match_reference():
+    # Scanned as one buffer, so features must not leak between neighbouring reviews
+    assert_matches_reference(EDGE_CASES + [text.upper() for text in EDGE_CASES])
+
+def test_duplicates_and_near_duplicates_match_reference():
+    texts = ["Great value", "great VALUE", "Works fine", "Works fine!", "Stopped working"]
+    assert_matches_reference(texts, near_duplicates=[False, False, True, True, False])
+
+def test_empty_input():
+    assert score_credibility([]).tolist() == []
+
+def random_review(rng: random.Random) -> str:
+    words = [
+        "buy", "BEST", "amazing", "Perfect", "must-have", "life-changing", "waste", "of", "money", "do", "not", "garbage",
+        "SCAM", "fake", "GREAT", "OK", "product", "eightchr", "ninechars", "sixteencharacter", "seventeencharacte",
+        "!!!", "???", "!?", "x_y", "über", "ÉCRASÉ", "naïve", "1234567890", "a", "I",
+    ]
+    separators = [" ", " ", " ", "  ", "\t", "\n", "-", ",", ". ", "\x1c", " "]
+    parts = []
+    for _ in range(rng.randint(0, 40)):
+        parts.append(rng.choice(words))
+        parts.append(rng.choice(separators))
+    return "".join(parts).strip() or "x"
+
+def test_random_reviews_match_reference():
+    rng = random.Random(14)
+    # More than one chunk, so reviews on either side of a chunk boundary are covered
+    texts = [random_review(rng) for _ in range(ASCII_CHUNK_SIZE + 500)]
+    assert_matches_reference(texts)
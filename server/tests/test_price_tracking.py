@@ -0,0 +1,90 @@
+import asyncio
+import sqlite3
+import time
+
+import numpy as np
+import pytest
+
+import app.services.price_tracker as price_tracker_module
+from app.db.price_store import SqlitePriceStore, new_tracked_product
+from app.services.price_tracker import PriceTracker, find_alerts
+
+nan = float("nan")
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = SqlitePriceStore(str(tmp_path / "prices.db"))
+    monkeypatch.setattr(price_tracker_module, "price_store", store)
+    return store
+
+def test_checks_run_in_due_order(store, monkeypatch):
+    checked = []
+
+    async def fetch_conditional(url, etag=None, last_modified=None):
+        checked.append(url)
+        return 304, None, etag, last_modified
+
+    monkeypatch.setattr(price_tracker_module, "fetch_conditional", fetch_conditional)
+
+    async def scenario():
+        tracker = PriceTracker(workers=1, domain_rate=0, flush_interval_s=60)
+        await tracker.start()
+        now = time.time()
+        for url, delay in (("https://a.example/p", 0.15), ("https://b.example/p", 0.05), ("https://c.example/p", 0.10)):
+            tracker.track(new_tracked_product("user", url, None, 3600), due=now + delay)
+        await asyncio.sleep(0.4)
+        await tracker.stop()
+
+    asyncio.run(scenario())
+    assert checked == ["https://b.example/p", "https://c.example/p", "https://a.example/p"]
+
+def test_not_modified_keeps_price_and_validators(store, monkeypatch):
+    requests = []
+
+    async def fetch_conditional(url, etag=None, last_modified=None):
+        requests.append((etag, last_modified))
+        return 304, None, None, None
+
+    monkeypatch.setattr(price_tracker_module, "fetch_conditional", fetch_conditional)
+    product = new_tracked_product("user", "https://shop.example/item", None, 3600)
+    product.update(last_price=10.0, currency="USD", etag='"v1"', last_modified="Mon, 01 Jan 2024 00:00:00 GMT")
+
+    async def scenario():
+        await store.add(product)
+        tracker = PriceTracker(workers=1, domain_rate=0, flush_interval_s=60)
+        await tracker.start()
+        tracker.track(product, due=time.time())
+        await asyncio.sleep(0.1)
+        await tracker.stop()
+        return await store.get(product["id"], "user"), await store.history(product["id"], 10)
+
+    stored, history = asyncio.run(scenario())
+    assert requests == [('"v1"', "Mon, 01 Jan 2024 00:00:00 GMT")]
+    assert stored["last_price"] == 10.0
+    assert stored["etag"] == '"v1"'
+    assert stored["last_checked_at"] is not None
+    assert history == []
+
+def test_find_alerts_thresholds():
+    prices = np.array([89.0, 80.0, 85.0, 75.0, 95.0])
+    previous = np.array([100.0, nan, 90.0, 100.0, 100.0])
+    targets = np.array([nan, 85.0, 95.0, 80.0, nan])
+    reached, dropped = find_alerts(prices, previous, targets, drop_pct=10)
+    # Crossing the target fires once; a price already below it does not fire again
+    assert reached.tolist() == [False, True, False, True, False]
+    # A drop alert needs a previous price and is not repeated alongside a target alert
+    assert dropped.tolist() == [True, False, False, False, False]
+
+def test_untracking_records_the_removal(store):
+    product = new_tracked_product("user", "https://shop.example/item", 50.0, 3600)
+
+    async def scenario():
+        await store.add(product)
+        before = time.time() - 1
+        assert not await store.remove(product["id"], "someone-else")
+        assert await store.remove(product["id"], "user")
+        return await store.removed_since(before)
+
+    assert asyncio.run(scenario()) == [product["id"]]
+    rows = sqlite3.connect(store.path).execute("SELECT id FROM untracked_products").fetchall()
+    assert rows == [(product["id"],)]